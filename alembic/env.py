@@ -12,13 +12,29 @@ from sqlmodel import SQLModel
 
 # Import all table models so they are registered with SQLModel.metadata
 # before autogenerate or upgrade. Add new resources here when you add tables.
-from src.resources._base.models import BaseTable  # noqa: F401
+from src.ext.backfill import BackfillCheckpoint  # noqa: F401
+from src.ext.scheduler import ScheduledJob  # noqa: F401
+from src.resources._base.fulltext import is_index_table
+from src.resources._base.models import (  # noqa: F401
+    BaseTable,
+    CacheStamp,
+    MonthlyRollup,
+)
+from src.resources.alerts.models import AlertDelivery, AlertRule  # noqa: F401
+from src.resources.auth.models import AuthSession, User  # noqa: F401
+from src.resources.categories.models import CategoryRule  # noqa: F401
+from src.resources.imports.models import ImportBatch, ImportRow  # noqa: F401
 
 config = context.config
 # Skip fileConfig: alembic.ini has no [loggers]/[handlers]/[formatters]; avoids KeyError in tests.
 target_metadata = SQLModel.metadata
 
 
+def include_name(name: str | None, type_: str, parent_names: object) -> bool:
+    """Leave FTS5 indexes (created by migrations, not models) out of autogenerate."""
+    return not (type_ == "table" and name is not None and is_index_table(name))
+
+
 def get_sync_url() -> str:
     """Database URL from settings, as sync (sqlite://) for Alembic."""
     from src.ext.settings import get_settings
@@ -34,6 +50,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=get_sync_url(),
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -48,6 +65,7 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
+            include_name=include_name,
         )
         with context.begin_transaction():
             context.run_migrations()
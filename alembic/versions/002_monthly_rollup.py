@@ -0,0 +1,35 @@
+"""Monthly rollup table (month x category x kind totals).
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_rollup",
+        sa.Column("month", sa.String(length=7), nullable=False),
+        sa.Column("category_id", sa.String(length=26), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("total_cents", sa.Integer(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("month", "category_id", "kind"),
+    )
+    # No table feeds the rollup at this revision, so there is nothing to
+    # backfill. A later revision that adds a source table backfills it in its
+    # own SQL; `python -m src.resources._base.rollup` rebuilds everything.
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_rollup")
@@ -0,0 +1,64 @@
+"""Bank CSV import batches and staged rows.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_batch",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("bank", sa.String(length=32), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("applied", sa.Boolean(), nullable=False),
+        sa.Column("rows_total", sa.Integer(), nullable=False),
+        sa.Column("rows_new", sa.Integer(), nullable=False),
+        sa.Column("rows_matched", sa.Integer(), nullable=False),
+        sa.Column("elapsed_ms", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "import_row",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("amount_cents", sa.Integer(), nullable=False),
+        sa.Column(
+            "direction", sa.Enum("CREDIT", "DEBIT", name="direction"), nullable=False
+        ),
+        sa.Column("description", sa.String(length=255), nullable=False),
+        sa.Column("bank", sa.String(length=32), nullable=False),
+        sa.Column("batch_id", sa.String(length=26), nullable=False),
+        sa.Column("bank_ref", sa.String(length=64), nullable=False),
+        sa.Column(
+            "state",
+            sa.Enum("NEW", "MATCHED", "APPLIED", name="rowstate"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["batch_id"], ["import_batch.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_import_row_batch_id", "import_row", ["batch_id"])
+    op.create_index("ix_import_row_bank_ref", "import_row", ["bank_ref"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_row_bank_ref", table_name="import_row")
+    op.drop_index("ix_import_row_batch_id", table_name="import_row")
+    op.drop_table("import_row")
+    op.drop_table("import_batch")
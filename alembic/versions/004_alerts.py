@@ -0,0 +1,82 @@
+"""Scheduler job state, alert rules and alert deliveries.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduled_job",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("next_run_at", sa.Float(), nullable=False),
+        sa.Column("lease_owner", sa.String(length=128), nullable=True),
+        sa.Column("lease_until", sa.Float(), nullable=False),
+        sa.Column("last_run_at", sa.Float(), nullable=True),
+        sa.Column("last_duration_ms", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.String(length=1024), nullable=False),
+        sa.Column("run_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.create_table(
+        "alert_rule",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "kind",
+            sa.Enum("UPCOMING_DEBT", "BUDGET_LIMIT", name="alertkind"),
+            nullable=False,
+        ),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("enabled", sa.Boolean(), nullable=False),
+        sa.Column("days_before", sa.Integer(), nullable=True),
+        sa.Column("category_id", sa.String(length=26), nullable=True),
+        sa.Column("limit_cents", sa.Integer(), nullable=True),
+        sa.Column("threshold_pct", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_alert_rule_kind", "alert_rule", ["kind"])
+    op.create_table(
+        "alert_delivery",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("rule_id", sa.String(length=26), nullable=False),
+        sa.Column("reference", sa.String(length=64), nullable=False),
+        sa.Column("period", sa.String(length=10), nullable=False),
+        sa.Column(
+            "state",
+            sa.Enum("PENDING", "SENT", "FAILED", name="deliverystate"),
+            nullable=False,
+        ),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("body", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("error", sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(["rule_id"], ["alert_rule.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("rule_id", "reference", "period"),
+    )
+    op.create_index("ix_alert_delivery_state", "alert_delivery", ["state"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_delivery_state", table_name="alert_delivery")
+    op.drop_table("alert_delivery")
+    op.drop_index("ix_alert_rule_kind", table_name="alert_rule")
+    op.drop_table("alert_rule")
+    op.drop_table("scheduled_job")
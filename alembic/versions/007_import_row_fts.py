@@ -0,0 +1,28 @@
+"""FTS5 full-text index over import_row description and bank, with sync triggers.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.resources._base.fulltext import create_statements, drop_statements
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Creates the index, its triggers, and indexes the rows already there.
+    for statement in create_statements("import_row", ("description", "bank")):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in drop_statements("import_row"):
+        op.execute(statement)
@@ -0,0 +1,52 @@
+"""Per-user category rules, and the category each staged import row got.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "category_rule",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("user_id", sa.String(length=26), nullable=False),
+        sa.Column("category_id", sa.String(length=26), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("pattern", sa.String(length=128), nullable=False),
+        sa.Column(
+            "match", sa.Enum("CONTAINS", "PREFIX", name="matchkind"), nullable=False
+        ),
+        sa.Column("min_cents", sa.Integer(), nullable=True),
+        sa.Column("max_cents", sa.Integer(), nullable=True),
+        sa.Column(
+            "direction", sa.Enum("CREDIT", "DEBIT", name="direction"), nullable=True
+        ),
+        sa.Column("bank", sa.String(length=32), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_category_rule_user_id_id", "category_rule", ["user_id", "id"]
+    )
+    op.add_column(
+        "import_row",
+        sa.Column("category_id", sa.String(length=26), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("import_row", "category_id")
+    op.drop_index("ix_category_rule_user_id_id", table_name="category_rule")
+    op.drop_table("category_rule")
@@ -0,0 +1 @@
+# Benchmarks for repository, template and HTTP hot paths. Run: uv run task bench
@@ -0,0 +1,131 @@
+"""
+Synthetic data for benchmarks: a BaseTable-derived table filled with N rows.
+
+Rows are inserted with Core executemany in chunks, so 1M rows load in seconds and
+the generator itself never holds more than one chunk in memory.
+"""
+
+import random
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel, insert
+from ulid import ULID
+
+from src.resources._base.models import (
+    BaseTable,
+    BinaryIdTable,
+    CacheStamp,
+    IdentityCacheSpec,
+    RollupSpec,
+    SearchSpec,
+)
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+CHUNK_SIZE = 10_000
+
+
+class BenchRow(BaseTable, table=True):
+    """Income/debt-shaped table used only by the benchmarks."""
+
+    __tablename__ = "bench_row"  # pyright: ignore[reportAssignmentType]
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+    description: str = Field(default="", max_length=255)
+
+
+class BenchBinaryRow(BinaryIdTable, table=True):
+    """BenchRow with a 16-byte BLOB id, for comparing key storage."""
+
+    __tablename__ = "bench_binary_row"  # pyright: ignore[reportAssignmentType]
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+    description: str = Field(default="", max_length=255)
+
+
+class BenchLedgerRow(BaseTable, table=True):
+    """BenchRow that feeds the monthly rollups, for the analytics benchmarks."""
+
+    __tablename__ = "bench_ledger_row"  # pyright: ignore[reportAssignmentType]
+    __rollup__ = RollupSpec(kind="debt")
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+    description: str = Field(default="", max_length=255)
+
+
+class BenchCachedRow(BaseTable, table=True):
+    """BenchRow read through the identity cache, for the identity benchmarks."""
+
+    __tablename__ = "bench_cached_row"  # pyright: ignore[reportAssignmentType]
+    __identity_cache__ = IdentityCacheSpec(max_entries=10_000)
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+    description: str = Field(default="", max_length=255)
+
+
+class BenchSearchRow(BaseTable, table=True):
+    """BenchRow with an FTS5 index on description, for the search benchmarks."""
+
+    __tablename__ = "bench_search_row"  # pyright: ignore[reportAssignmentType]
+    __search__ = SearchSpec()
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+    description: str = Field(default="", max_length=255)
+
+
+def _row(rng: random.Random, day: date, created: datetime) -> dict[str, object]:
+    return {
+        "id": str(ULID.from_datetime(created)),
+        "created_at": created,
+        "updated_at": created,
+        "amount": Decimal(rng.randint(100, 500_000)) / 100,
+        "date": day,
+        "description": f"merchant {rng.randint(1, 5_000)}",
+    }
+
+
+async def generate(
+    engine: AsyncEngine,
+    rows: int,
+    seed: int = 42,
+    model: type[BaseTable] = BenchRow,
+) -> list[str]:
+    """Create model's table and fill it with rows rows. Return a sample of ids.
+
+    cache_stamp is created too: every repository write moves it.
+
+    The same seed always produces the same amounts and descriptions.
+    """
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1, tzinfo=UTC)
+    sample: list[str] = []
+    table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    stamps = CacheStamp.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all, tables=[table, stamps])
+    for offset in range(0, rows, CHUNK_SIZE):
+        chunk = []
+        for i in range(offset, min(offset + CHUNK_SIZE, rows)):
+            created = start + timedelta(seconds=i * 60)
+            chunk.append(_row(rng, created.date(), created))
+        sample.extend(str(row["id"]) for row in chunk[:: max(1, CHUNK_SIZE // 100)])
+        async with engine.begin() as conn:
+            await conn.execute(insert(model), chunk)
+    return sample
+
+
+__all__ = [
+    "SIZES",
+    "BenchBinaryRow",
+    "BenchCachedRow",
+    "BenchLedgerRow",
+    "BenchRow",
+    "BenchSearchRow",
+    "generate",
+]
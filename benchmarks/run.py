@@ -0,0 +1,463 @@
+"""
+Benchmark runner: repository operations, template rendering, ASGI requests,
+TEXT versus 16-byte BLOB primary keys (lookup speed plus table and index bytes),
+get_by_id through the identity cache, 5-year analytics trends (cold load,
+cached read, derived series), full-text search against a LIKE scan,
+auto-categorizing imported rows against 300 compiled rules, and writes/sec under
+100 concurrent clients with and without the group-commit write queue.
+
+    python -m benchmarks.run --size 100k --output bench.json
+    python -m benchmarks.run --size 100k --baseline bench.json --threshold 0.2
+
+Each benchmark reports median and p95 milliseconds over --repeat runs. With
+--baseline, any benchmark whose median grew by more than --threshold (a fraction)
+is reported and the process exits with status 1.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.datagen import (
+    SIZES,
+    BenchBinaryRow,
+    BenchCachedRow,
+    BenchLedgerRow,
+    BenchRow,
+    BenchSearchRow,
+    generate,
+)
+from src.ext import writer
+from src.ext.db import build_engine
+from src.ext.templates import templates
+from src.main import app
+from src.resources._base import analytics, fulltext, identity, ids, rollup
+from src.resources._base import repository as base_repo
+from src.resources._base.models import BaseTable, CacheStamp, MonthlyRollup
+from src.resources.categories import logic as categories
+from src.resources.categories.models import CategoryRule, MatchKind
+from src.resources.imports.models import Direction, Movement
+
+type Results = dict[str, dict[str, float]]
+
+
+async def _measure(
+    fn: Callable[[], Awaitable[Any]], repeat: int, warmup: int = 1
+) -> dict[str, float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return {"median_ms": statistics.median(samples), "p95_ms": p95, "runs": repeat}
+
+
+async def bench_repository(rows: int, repeat: int) -> Results:
+    """get_by_id, list_page, stream_all, add and add_many against rows rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        ids = await generate(engine, rows)
+        rng = random.Random(0)
+        results: Results = {}
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+
+            async def get_by_id() -> None:
+                session.expunge_all()
+                await base_repo.get_by_id(session, BenchRow, rng.choice(ids))
+
+            async def list_page() -> None:
+                await base_repo.list_page(session, BenchRow, after=rng.choice(ids))
+
+            async def stream_all() -> None:
+                async with AsyncSession(engine) as stream_session:
+                    async for _ in base_repo.stream_all(stream_session, BenchRow):
+                        pass
+
+            async def add() -> None:
+                row = BenchRow(amount=Decimal("1.00"), date=date.today())
+                await base_repo.add(session, row)
+
+            async def add_many() -> None:
+                today = date.today()
+                batch = [
+                    BenchRow(amount=Decimal("1.00"), date=today) for _ in range(1000)
+                ]
+                await base_repo.add_many(session, batch)
+
+            results["repo.get_by_id"] = await _measure(get_by_id, repeat * 10)
+            results["repo.list_page"] = await _measure(list_page, repeat * 10)
+            stream_repeat = max(1, repeat // 5)
+            results["repo.stream_all"] = await _measure(stream_all, stream_repeat)
+            results["repo.add"] = await _measure(add, repeat)
+            results["repo.add_many_1000"] = await _measure(add_many, repeat)
+        await engine.dispose()
+    return results
+
+
+async def bench_templates(repeat: int) -> Results:
+    """Render index.html and error.html outside of any request."""
+    request = {"type": "http", "headers": [], "query_string": b"", "path": "/"}
+    index = templates.get_template("index.html")
+    error = templates.get_template("error.html")
+    context = {"request": _FakeRequest(request), "active_page": "overview"}
+    error_context = {**context, "status_code": 404, "title": "x", "message": "y"}
+
+    async def render_index() -> None:
+        index.render(context)
+
+    async def render_error() -> None:
+        error.render(error_context)
+
+    return {
+        "template.index": await _measure(render_index, repeat * 10),
+        "template.error": await _measure(render_error, repeat * 10),
+    }
+
+
+async def bench_http(repeat: int) -> Results:
+    """End-to-end ASGI requests through an in-process client."""
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+
+        async def home() -> None:
+            await client.get("/")
+
+        async def not_found() -> None:
+            await client.get("/does-not-exist")
+
+        return {
+            "http.home": await _measure(home, repeat * 5),
+            "http.404": await _measure(not_found, repeat * 5),
+        }
+
+
+async def storage_bytes(engine: AsyncEngine) -> dict[str, int]:
+    """Bytes used by each table and index, from SQLite's dbstat virtual table."""
+    statement = text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")
+    async with engine.connect() as conn:
+        rows = (await conn.execute(statement)).all()
+    return {name: int(size) for name, size in rows if not name.startswith("sqlite_s")}
+
+
+async def bench_ids(rows: int, repeat: int) -> tuple[Results, dict[str, int]]:
+    """get_by_id on TEXT vs BLOB ids, id generation, and the bytes each layout uses."""
+    results: Results = {}
+    storage: dict[str, int] = {}
+    models: dict[str, type[BaseTable]] = {"text": BenchRow, "binary": BenchBinaryRow}
+    for label, model in models.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(f"sqlite+aiosqlite:///{tmp}/ids.db")
+            sample = await generate(engine, rows, model=model)
+            rng = random.Random(0)
+            async with AsyncSession(engine) as session:
+
+                async def get_by_id(
+                    model: type[BaseTable] = model,
+                    rng: random.Random = rng,
+                    sample: list[str] = sample,
+                ) -> None:
+                    session.expunge_all()
+                    await base_repo.get_by_id(session, model, rng.choice(sample))
+
+                results[f"ids.get_by_id.{label}"] = await _measure(
+                    get_by_id, repeat * 10
+                )
+            for name, size in (await storage_bytes(engine)).items():
+                storage[f"{label}:{name}"] = size
+            await engine.dispose()
+
+    async def new_ulid() -> None:
+        for _ in range(1000):
+            ids.new_ulid()
+
+    async def ulid_batch() -> None:
+        ids.ulid_batch(1000)
+
+    results["ids.new_ulid_1000"] = await _measure(new_ulid, repeat)
+    results["ids.ulid_batch_1000"] = await _measure(ulid_batch, repeat)
+    return results, storage
+
+
+async def bench_identity(repeat: int) -> Results:
+    """get_by_id on an identity-cached table: cached hit versus cold miss."""
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp}/identity.db")
+        sample = await generate(engine, 1_000, model=BenchCachedRow)
+        rng = random.Random(0)
+        async with AsyncSession(engine) as session:
+            for row_id in sample:
+                await base_repo.get_by_id(session, BenchCachedRow, row_id)
+
+            async def cached() -> None:
+                session.expunge_all()
+                await base_repo.get_by_id(session, BenchCachedRow, rng.choice(sample))
+
+            async def miss() -> None:
+                session.expunge_all()
+                identity.invalidate(BenchCachedRow)
+                await base_repo.get_by_id(session, BenchCachedRow, rng.choice(sample))
+
+            results["identity.get_by_id_cached"] = await _measure(cached, repeat * 10)
+            results["identity.get_by_id_miss"] = await _measure(miss, repeat * 10)
+        await engine.dispose()
+    identity.clear()
+    return results
+
+
+async def bench_search(rows: int, repeat: int) -> Results:
+    """First page of a ranked FTS5 search versus the LIKE scan it replaces."""
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp}/search.db")
+        await generate(engine, rows, model=BenchSearchRow)
+        async with engine.begin() as conn:
+            for statement in fulltext.index_statements(BenchSearchRow):
+                await conn.execute(text(statement))
+        like = (
+            select(BenchSearchRow)
+            .where(col(BenchSearchRow.description).like("%4217%"))
+            .order_by(col(BenchSearchRow.id))
+            .limit(20)
+        )
+        async with AsyncSession(engine) as session:
+
+            async def fts_search() -> None:
+                await base_repo.search(session, BenchSearchRow, "4217", limit=20)
+
+            async def fts_prefix() -> None:
+                await base_repo.search(session, BenchSearchRow, "421", limit=20)
+
+            async def like_scan() -> None:
+                (await session.exec(like)).all()
+
+            results["search.fts_first_page"] = await _measure(fts_search, repeat)
+            results["search.fts_prefix_page"] = await _measure(fts_prefix, repeat)
+            results["search.like_scan"] = await _measure(like_scan, repeat)
+        await engine.dispose()
+    return results
+
+
+async def bench_categorize(rows: int, repeat: int) -> Results:
+    """Compiling 300 rules, then classifying rows movements with the result."""
+    rng = random.Random(0)
+    rules = [
+        CategoryRule(
+            user_id="bench",
+            category_id=f"category {i % 40}",
+            pattern=f"merchant {i * 13}",
+            match=MatchKind.PREFIX if i % 5 == 0 else MatchKind.CONTAINS,
+            min_cents=1_000 if i % 7 == 0 else None,
+            direction=Direction.DEBIT if i % 3 == 0 else None,
+            bank="itau" if i % 11 == 0 else None,
+        )
+        for i in range(300)
+    ]
+    movements = [
+        Movement(
+            bank_ref=str(i),
+            date=date(2026, 1, 1),
+            amount_cents=rng.randint(100, 500_000),
+            direction=rng.choice(list(Direction)),
+            description=f"compra merchant {rng.randint(1, 5_000)} são paulo",
+            bank=rng.choice(("nubank", "itau")),
+        )
+        for i in range(rows)
+    ]
+    matcher = categories.compile_rules(rules)
+
+    async def compile_all() -> None:
+        categories.compile_rules(rules)
+
+    async def classify() -> None:
+        matcher.classify_many(movements)
+
+    return {
+        "categorize.compile": await _measure(compile_all, repeat),
+        "categorize.classify": await _measure(classify, repeat),
+    }
+
+
+async def _concurrent_adds(
+    engine: AsyncEngine, clients: int, per_client: int
+) -> dict[str, float]:
+    samples: list[float] = []
+
+    async def client() -> None:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            for i in range(per_client):
+                row = BenchRow(amount=Decimal(i), date=date(2024, 1, 1))
+                started = time.perf_counter()
+                await base_repo.add(session, row)
+                samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "runs": len(samples),
+        "writes_per_sec": len(samples) / elapsed,
+    }
+
+
+async def bench_writes(repeat: int, clients: int = 100) -> Results:
+    """repository.add from clients concurrent sessions, direct versus queued."""
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("direct", "queued"):
+            engine = build_engine(f"sqlite+aiosqlite:///{tmp}/{mode}.db")
+            tables = [
+                BenchRow.__table__,  # pyright: ignore[reportAttributeAccessIssue]
+                CacheStamp.__table__,  # pyright: ignore[reportAttributeAccessIssue]
+            ]
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all, tables=tables)
+            queue = writer.WriteQueue(engine) if mode == "queued" else None
+            if queue is not None:
+                await queue.start()
+                writer.install(queue)
+            try:
+                results[f"writes.{mode}_{clients}_clients"] = await _concurrent_adds(
+                    engine, clients, repeat
+                )
+            finally:
+                if queue is not None:
+                    await queue.stop()
+            await engine.dispose()
+    return results
+
+
+async def bench_analytics(rows: int, repeat: int) -> Results:
+    """A 5-year breakdown: grouped load, cached read, and the derived series."""
+    start, end = date(2020, 1, 1), date(2024, 12, 31)
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp}/analytics.db")
+        await generate(engine, rows, model=BenchLedgerRow)
+        summary = MonthlyRollup.__table__  # pyright: ignore[reportAttributeAccessIssue]
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[summary])
+        async with AsyncSession(engine) as session:
+            await rollup.rebuild_from(session, [BenchLedgerRow])
+            await session.commit()
+            loaded = await analytics.load(session, start, end)
+
+            async def load() -> None:
+                await analytics.load(session, start, end)
+
+            async def cached() -> None:
+                await analytics.breakdown(session, start, end)
+
+            async def trend() -> None:
+                analytics.rolling_average(loaded.totals("debt"), 3)
+                analytics.cumulative(loaded.net())
+                analytics.shares(loaded.category_totals("debt"))
+
+            results["analytics.load_5y"] = await _measure(load, repeat)
+            results["analytics.breakdown_5y_cached"] = await _measure(cached, repeat)
+            results["analytics.trend_5y"] = await _measure(trend, repeat)
+        await engine.dispose()
+    analytics.clear()
+    return results
+
+
+class _FakeRequest:
+    """Just enough of a Request for layout.html (cookies lookup)."""
+
+    def __init__(self, scope: dict[str, Any]) -> None:
+        self.scope = scope
+        self.cookies: dict[str, str] = {}
+
+
+def compare(current: Results, baseline: Results, threshold: float) -> list[str]:
+    """Names of benchmarks whose median regressed by more than threshold."""
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None or before["median_ms"] <= 0:
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{name}: {before['median_ms']:.3f} -> "
+                f"{result['median_ms']:.3f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+async def run(size: str, repeat: int) -> dict[str, Any]:
+    results: Results = {}
+    results.update(await bench_repository(SIZES[size], repeat))
+    results.update(await bench_templates(repeat))
+    results.update(await bench_http(repeat))
+    id_results, storage = await bench_ids(SIZES[size], repeat)
+    results.update(id_results)
+    results.update(await bench_identity(repeat))
+    results.update(await bench_analytics(SIZES[size], repeat))
+    results.update(await bench_search(SIZES[size], repeat))
+    results.update(await bench_categorize(SIZES[size], repeat))
+    results.update(await bench_writes(repeat))
+    return {
+        "size": size,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+        "storage_bytes": storage,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", choices=sorted(SIZES), default="1k")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.size, args.repeat))
+    for name, result in report["results"].items():
+        median, p95 = result["median_ms"], result["p95_ms"]
+        rate = result.get("writes_per_sec")
+        extra = f"  {rate:9.0f} writes/s" if rate is not None else ""
+        print(f"{name:24} median {median:9.3f} ms  p95 {p95:9.3f} ms{extra}")
+    for name, size in report["storage_bytes"].items():
+        print(f"{name:40} {size / 1024:12.1f} KiB")
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(report["results"], baseline["results"], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Static asset pipeline: content-hashed copies, precompressed variants, and a
+static handler that serves them with immutable caching.
+
+    python -m src.ext.assets
+
+copies every file under src/static to src/static/dist as <stem>.<hash>.<ext>
+(output.css -> output.3f2a9c1b0d.css), next to a .gz (and a .br when the
+optional brotli package is installed) and a manifest.json mapping source names
+to hashed ones. Templates call asset_url("output.css"): with templates_production
+on it returns the hashed /assets/... URL from the manifest, otherwise the plain
+/static/... URL, so a Tailwind watch rebuild shows up without a new build step.
+
+A hashed name changes whenever the content does, so PrecompressedStaticFiles
+(mounted at /assets) can tell browsers to keep each file for a year without
+revalidating. It picks the .br or .gz variant the client accepts and sends it
+as-is; nothing is compressed per request. Dynamic pages keep their own policy.
+"""
+
+import functools
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import stat
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from src.ext.settings import get_settings
+
+try:
+    import brotli  # pyright: ignore[reportMissingImports]
+except ImportError:  # optional: .br variants are skipped without it
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+ASSETS_DIR = STATIC_DIR / "dist"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Tried in order of preference; a variant is only used if the client accepts it.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Files smaller than this are not worth a compressed variant.
+MIN_COMPRESS_BYTES = 256
+
+
+def fingerprint(data: bytes) -> str:
+    """Short content hash used in asset file names."""
+    return hashlib.blake2b(data, digest_size=5).hexdigest()
+
+
+def hashed_name(name: str, data: bytes) -> str:
+    """Insert the content hash before the suffix: output.css -> output.<hash>.css."""
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}.{fingerprint(data)}{path.suffix}"))
+
+
+def _sources(source_dir: Path, out_dir: Path) -> list[Path]:
+    return sorted(
+        path
+        for path in source_dir.rglob("*")
+        if path.is_file() and out_dir not in path.parents
+    )
+
+
+def _write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".tmp")
+    partial.write_bytes(data)
+    os.replace(partial, path)
+
+
+def build(source_dir: Path = STATIC_DIR, out_dir: Path = ASSETS_DIR) -> dict[str, str]:
+    """Write hashed and precompressed copies of source_dir into out_dir.
+
+    Returns the manifest (source name -> hashed name), also written to
+    out_dir/manifest.json. Files left over from earlier builds are removed.
+    """
+    manifest: dict[str, str] = {}
+    written: set[Path] = set()
+    for source in _sources(source_dir, out_dir):
+        name = source.relative_to(source_dir).as_posix()
+        data = source.read_bytes()
+        target = out_dir / hashed_name(name, data)
+        manifest[name] = target.relative_to(out_dir).as_posix()
+        variants = {target: data}
+        if len(data) >= MIN_COMPRESS_BYTES:
+            # mtime=0 keeps the .gz byte-identical across builds of the same input.
+            variants[target.with_name(target.name + ".gz")] = gzip.compress(
+                data, compresslevel=9, mtime=0
+            )
+            if brotli is not None:
+                variants[target.with_name(target.name + ".br")] = brotli.compress(data)
+        for path, content in variants.items():
+            if not path.exists() or path.read_bytes() != content:
+                _write(path, content)
+            written.add(path)
+    manifest_path = out_dir / MANIFEST_NAME
+    _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    written.add(manifest_path)
+    for path in out_dir.rglob("*"):
+        if path.is_file() and path not in written:
+            path.unlink()
+    return manifest
+
+
+@functools.cache
+def load_manifest(out_dir: Path = ASSETS_DIR) -> dict[str, str]:
+    """The manifest written by build(), or {} if it was never run. Read once."""
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_bytes())
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(name: str) -> str:
+    """URL of a static file; the hashed, immutable one in production mode."""
+    if get_settings().templates_production:
+        hashed = load_manifest().get(name)
+        if hashed is not None:
+            return f"/assets/{hashed}"
+    return f"/static/{name}"
+
+
+def _accepted(scope: Scope) -> set[str]:
+    header = Headers(scope=scope).get("accept-encoding", "")
+    return {part.split(";")[0].strip().lower() for part in header.split(",")}
+
+
+def _set_encoding(headers: MutableMapping[str, Any], path: str, encoding: str) -> None:
+    media_type, _ = mimetypes.guess_type(path)
+    headers["Content-Type"] = media_type or "application/octet-stream"
+    if media_type is not None and media_type.startswith("text/"):
+        headers["Content-Type"] += "; charset=utf-8"
+    headers["Content-Encoding"] = encoding
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles for fingerprinted assets: .br/.gz variants, cached for a year."""
+
+    async def check_config(self) -> None:
+        # The build output may not exist in development; every path is a 404 then.
+        if self.directory is None or Path(self.directory).is_dir():
+            await super().check_config()
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response: Response | None = None
+        accepted = _accepted(scope)
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + suffix
+            )
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                _set_encoding(response.headers, path, encoding)
+                break
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+__all__ = [
+    "ASSETS_DIR",
+    "IMMUTABLE",
+    "PrecompressedStaticFiles",
+    "asset_url",
+    "build",
+    "fingerprint",
+    "hashed_name",
+    "load_manifest",
+]
+
+
+if __name__ == "__main__":
+    built = build()
+    for source, target in sorted(built.items()):
+        print(f"{source} -> {target}")
@@ -0,0 +1,315 @@
+"""
+Online data migrations for SQLite: chunked, resumable backfills and table rebuilds.
+
+Every chunk commits in its own short transaction, so app writers get the lock in
+between, and records its progress in backfill_checkpoint. Call them on an
+AUTOCOMMIT connection: in a migration, inside op.get_context().autocommit_block().
+"""
+
+import logging
+import time
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import JSON, Connection, MetaData, Table, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import Field, SQLModel, col, select
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_PAUSE_SECONDS = 0.05
+
+
+class BackfillCheckpoint(SQLModel, table=True):
+    """Progress of one named backfill or rebuild: the last key it finished."""
+
+    __tablename__ = "backfill_checkpoint"  # pyright: ignore[reportAssignmentType]
+
+    name: str = Field(primary_key=True, max_length=128)
+    # JSON so TEXT (ULID) and INTEGER keys come back with their own type.
+    last_key: str | int | None = Field(default=None, sa_type=JSON)
+    rows_done: int = 0
+    updated_at: float = 0.0
+    finished_at: float | None = None
+
+
+@dataclass(frozen=True)
+class Progress:
+    """Where a job stands after a run: totals across runs, chunks in this one."""
+
+    name: str
+    rows_done: int
+    chunks: int
+    last_key: Any
+    finished: bool
+
+
+class RebuildError(RuntimeError):
+    """The rebuilt table failed its foreign-key check; nothing was swapped."""
+
+
+def _require_autocommit(connection: Connection) -> None:
+    # pysqlite's AUTOCOMMIT: no implicit BEGIN, so ours are the only transactions.
+    dbapi_connection = connection.connection.dbapi_connection
+    if getattr(dbapi_connection, "isolation_level", "") is not None:
+        raise ValueError(
+            "online migrations manage their own transactions: call them on an "
+            "AUTOCOMMIT connection (op.get_context().autocommit_block())"
+        )
+
+
+@contextmanager
+def _immediate(connection: Connection) -> Iterator[None]:
+    # BEGIN IMMEDIATE takes the write lock up front, so a chunk never fails
+    # halfway on a lock upgrade; busy_timeout covers waiting for app writers.
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.exec_driver_sql("ROLLBACK")
+        raise
+    connection.exec_driver_sql("COMMIT")
+
+
+def checkpoint(connection: Connection, name: str) -> BackfillCheckpoint | None:
+    """The saved progress of name, or None if it never ran."""
+    statement = select(BackfillCheckpoint).where(col(BackfillCheckpoint.name) == name)
+    row = connection.execute(statement).mappings().first()
+    return None if row is None else BackfillCheckpoint.model_validate(dict(row))
+
+
+def _save(
+    connection: Connection,
+    name: str,
+    last_key: Any,
+    rows_done: int,
+    finished: bool = False,
+) -> None:
+    now = time.time()
+    values = {
+        "name": name,
+        "last_key": last_key,
+        "rows_done": rows_done,
+        "updated_at": now,
+        "finished_at": now if finished else None,
+    }
+    statement = sqlite_insert(BackfillCheckpoint).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["name"],
+        set_={key: value for key, value in values.items() if key != "name"},
+    )
+    connection.execute(statement)
+
+
+def _run_chunks(
+    connection: Connection,
+    name: str,
+    table: str,
+    key: str,
+    where: str | None,
+    apply: Callable[[str, dict[str, Any]], None],
+    chunk_size: int,
+    pause: float,
+    max_chunks: int | None,
+    params: Mapping[str, Any],
+) -> Progress:
+    """Walk table by key in chunks, calling apply(key_range_sql, params) for each.
+
+    key_range_sql selects the chunk's rows (`key > :after AND key <= :upper`).
+    Stops when no rows are left (finished) or after max_chunks chunks.
+    """
+    saved = checkpoint(connection, name)
+    last = saved.last_key if saved is not None else None
+    rows_done = saved.rows_done if saved is not None else 0
+    if saved is not None and saved.finished_at is not None:
+        return Progress(name, rows_done, 0, last, finished=True)
+    extra = f" AND ({where})" if where else ""
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        lower = "" if last is None else f' AND "{key}" > :after'
+        bounds = text(
+            f'SELECT count(*), max(k) FROM (SELECT "{key}" AS k FROM "{table}"'
+            f' WHERE true{lower}{extra} ORDER BY "{key}" LIMIT :limit)'
+        )
+        with _immediate(connection):
+            values = {**params, "after": last, "limit": chunk_size}
+            count, upper = connection.execute(bounds, values).one()
+            if not count:
+                _save(connection, name, last, rows_done, finished=True)
+                return Progress(name, rows_done, chunks, last, finished=True)
+            key_range = f'true{lower} AND "{key}" <= :upper{extra}'
+            apply(key_range, {**params, "after": last, "upper": upper})
+            last, rows_done = upper, rows_done + count
+            _save(connection, name, last, rows_done)
+        chunks += 1
+        logger.debug("%s: %d rows done, up to %s", name, rows_done, last)
+        time.sleep(pause)
+    return Progress(name, rows_done, chunks, last, finished=False)
+
+
+def backfill(
+    connection: Connection,
+    name: str,
+    table: str,
+    assignments: str,
+    where: str | None = None,
+    params: Mapping[str, Any] | None = None,
+    key: str = "id",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pause: float = DEFAULT_PAUSE_SECONDS,
+    max_chunks: int | None = None,
+) -> Progress:
+    """UPDATE table SET assignments for the rows matching where, chunk by chunk.
+
+    name identifies the job's checkpoint (use the revision, e.g. "006_user_id").
+    params are bound in assignments and where. max_chunks stops early (the next
+    call resumes); otherwise it runs until every row is done.
+    """
+    _require_autocommit(connection)
+
+    def apply(key_range: str, values: dict[str, Any]) -> None:
+        update = text(f'UPDATE "{table}" SET {assignments} WHERE {key_range}')
+        connection.execute(update, values)
+
+    return _run_chunks(
+        connection,
+        name,
+        table,
+        key,
+        where,
+        apply,
+        chunk_size,
+        pause,
+        max_chunks,
+        params or {},
+    )
+
+
+def _quoted(name: str) -> str:
+    return f'"{name}"'
+
+
+def rebuild_table(
+    connection: Connection,
+    name: str,
+    table: Table,
+    columns: Mapping[str, str] | None = None,
+    key: str = "id",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pause: float = DEFAULT_PAUSE_SECONDS,
+    max_chunks: int | None = None,
+) -> Progress:
+    """Rebuild table.name to match table (its new definition) without blocking.
+
+    Each new column is copied from the old column of the same name, or from the
+    SQL expression over the old row given in columns (literal SQL: it also runs
+    in the mirroring triggers, where nothing can be bound); columns the old
+    table lacks and columns does not name get their default. The final swap
+    drops the old table, renames the new one into place and creates its indexes
+    in one transaction, checking foreign keys before it commits.
+    """
+    _require_autocommit(connection)
+    temp = f"_rebuild_{table.name}"
+    saved = checkpoint(connection, name)
+    staged = _table_exists(connection, temp)
+    if saved is not None and saved.finished_at is not None and not staged:
+        return Progress(name, saved.rows_done, 0, saved.last_key, finished=True)
+
+    columns = dict(columns or {})
+    pragma = connection.exec_driver_sql(f'PRAGMA table_info("{table.name}")')
+    old_columns = {row[1] for row in pragma}
+    copied = [c.name for c in table.c if c.name in columns or c.name in old_columns]
+    copy_sql = (
+        f'INSERT OR REPLACE INTO "{temp}" ({", ".join(_quoted(c) for c in copied)})'
+        f" SELECT {', '.join(columns.get(c, _quoted(c)) for c in copied)}"
+        f' FROM "{table.name}"'
+    )
+    if not staged:
+        with _immediate(connection):
+            connection.execute(CreateTable(_staging(table, temp)))
+            for statement in _mirror_triggers(table.name, temp, key, copy_sql):
+                connection.exec_driver_sql(statement)
+
+    def apply(key_range: str, values: dict[str, Any]) -> None:
+        connection.execute(text(f"{copy_sql} WHERE {key_range}"), values)
+
+    progress = _run_chunks(
+        connection,
+        name,
+        table.name,
+        key,
+        None,
+        apply,
+        chunk_size,
+        pause,
+        max_chunks,
+        {},
+    )
+    if progress.finished:
+        _swap(connection, table, temp)
+    return progress
+
+
+def _staging(table: Table, temp: str) -> Table:
+    # A copy named temp, in a MetaData of its own that also holds the tables its
+    # foreign keys refer to, so CreateTable can render them.
+    metadata = MetaData()
+    for foreign_key in table.foreign_keys:
+        foreign_key.column.table.to_metadata(metadata)
+    return table.to_metadata(metadata, name=temp)
+
+
+def _table_exists(connection: Connection, name: str) -> bool:
+    query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return connection.exec_driver_sql(query, (name,)).first() is not None
+
+
+def _mirror_triggers(name: str, temp: str, key: str, copy_sql: str) -> list[str]:
+    upsert = f'{copy_sql} WHERE "{key}" = NEW."{key}"'
+    remove = f'DELETE FROM "{temp}" WHERE "{key}" = OLD."{key}"'
+    return [
+        f'CREATE TRIGGER "{temp}_ins" AFTER INSERT ON "{name}" BEGIN {upsert}; END',
+        f'CREATE TRIGGER "{temp}_upd" AFTER UPDATE ON "{name}"'
+        f" BEGIN {remove}; {upsert}; END",
+        f'CREATE TRIGGER "{temp}_del" AFTER DELETE ON "{name}" BEGIN {remove}; END',
+    ]
+
+
+def _swap(connection: Connection, table: Table, temp: str) -> None:
+    name = table.name
+    # foreign_keys cannot change inside a transaction; off, DROP TABLE does not
+    # cascade or fail on rows still referencing the table being replaced.
+    enforced = connection.exec_driver_sql("PRAGMA foreign_keys").scalar()
+    connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    try:
+        with _immediate(connection):
+            for suffix in ("ins", "upd", "del"):
+                connection.exec_driver_sql(f'DROP TRIGGER "{temp}_{suffix}"')
+            connection.exec_driver_sql(f'DROP TABLE "{name}"')
+            connection.exec_driver_sql(f'ALTER TABLE "{temp}" RENAME TO "{name}"')
+            for index in table.indexes:
+                connection.execute(CreateIndex(index))
+            problems = connection.exec_driver_sql(
+                f'PRAGMA foreign_key_check("{name}")'
+            ).all()
+            if problems:
+                raise RebuildError(f"{name}: {len(problems)} foreign-key violations")
+    finally:
+        if enforced:
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "DEFAULT_PAUSE_SECONDS",
+    "BackfillCheckpoint",
+    "Progress",
+    "RebuildError",
+    "backfill",
+    "checkpoint",
+    "rebuild_table",
+]
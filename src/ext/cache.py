@@ -0,0 +1,218 @@
+"""
+In-process response cache for rendered pages and HTMX fragments, with ETags.
+
+Entries are dropped when a table they were rendered from is written, here or (via
+share_versions()) in another worker. They are keyed per user, so a route that
+renders per-user data must depend on current_session.
+"""
+
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, NamedTuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.ext.htmx import hx_target
+from src.ext.settings import get_settings
+
+# Headers copied from the rendered response into cached replays.
+_KEPT_HEADERS = ("content-type", "hx-trigger", "hx-push-url")
+
+
+class CachedResponse(NamedTuple):
+    versions: tuple[int, ...]
+    body: bytes
+    status_code: int
+    headers: dict[str, str]
+    etag: str
+
+
+type StampReader = Callable[[], Awaitable[Mapping[str, int]]]
+
+# Writes bumped here since the last read of the shared stamps, and that read.
+_table_versions: dict[str, int] = {}
+_shared_versions: Mapping[str, int] = {}
+_reader: StampReader | None = None
+_checked_at = float("-inf")
+_entries: OrderedDict[str, CachedResponse] = OrderedDict()
+_size = 0
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "not_modified": 0,
+    "evictions": 0,
+    "stamp_checks": 0,
+}
+
+
+def bump(*tables: str) -> None:
+    """Mark tables as changed; cached entries rendered from them become stale."""
+    for table in tables:
+        _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+def versions(tables: tuple[str, ...]) -> tuple[int, ...]:
+    """Current version of each table, in the given order."""
+    return tuple(
+        _shared_versions.get(table, 0) + _table_versions.get(table, 0)
+        for table in tables
+    )
+
+
+def share_versions(reader: StampReader | None) -> None:
+    """Read the shared write stamps through reader from now on (None: stop)."""
+    global _reader, _shared_versions, _checked_at
+    _reader = reader
+    _shared_versions = {}
+    _checked_at = float("-inf")
+
+
+async def refresh() -> None:
+    """Re-read the shared write stamps if response_cache_stamp_seconds passed."""
+    global _shared_versions, _checked_at
+    now = time.monotonic()
+    interval = get_settings().response_cache_stamp_seconds
+    if _reader is None or now - _checked_at < interval:
+        return
+    _checked_at = now
+    stats["stamp_checks"] += 1
+    # Writes bumped before the read are committed, so the read includes them;
+    # only those bumped while it runs are kept on top of it.
+    counted = dict(_table_versions)
+    shared = await _reader()
+    for table, count in counted.items():
+        _table_versions[table] -= count
+    _shared_versions = shared
+
+
+def clear() -> None:
+    """Drop every entry and reset counters (tests and admin use)."""
+    global _size
+    _entries.clear()
+    _size = 0
+    for name in stats:
+        stats[name] = 0
+
+
+def cache_key(request: Request) -> str:
+    """Path, query, theme cookie, HTMX target and user: all a page varies on."""
+    theme = request.cookies.get("theme", "light")
+    target = hx_target(request)
+    hx = "full" if target is None else f"hx:{target}"
+    user = getattr(request.state, "user_id", None) or "anon"
+    return f"{request.url.path}?{request.url.query}|{theme}|{hx}|{user}"
+
+
+def _etag(body: bytes) -> str:
+    digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Weak comparison: a compressed response went out as W/"...".
+    if if_none_match is None:
+        return False
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in tags
+
+
+def _get(key: str, current: tuple[int, ...]) -> CachedResponse | None:
+    entry = _entries.get(key)
+    if entry is None or entry.versions != current:
+        return None
+    _entries.move_to_end(key)
+    return entry
+
+
+def _put(key: str, entry: CachedResponse) -> None:
+    global _size
+    settings = get_settings()
+    if len(entry.body) > settings.response_cache_max_bytes:
+        return
+    old = _entries.pop(key, None)
+    if old is not None:
+        _size -= len(old.body)
+    _entries[key] = entry
+    _size += len(entry.body)
+    while (
+        len(_entries) > settings.response_cache_max_entries
+        or _size > settings.response_cache_max_bytes
+    ):
+        _, evicted = _entries.popitem(last=False)
+        _size -= len(evicted.body)
+        stats["evictions"] += 1
+
+
+def _replay(request: Request, entry: CachedResponse) -> Response:
+    headers = {
+        **entry.headers,
+        "ETag": entry.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Cookie, HX-Request, HX-Target",
+    }
+    if _etag_matches(request.headers.get("If-None-Match"), entry.etag):
+        stats["not_modified"] += 1
+        headers.pop("content-type", None)
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=entry.body, status_code=entry.status_code, headers=headers
+    )
+
+
+def cached_page(
+    *tables: str,
+) -> Callable[
+    [Callable[..., Awaitable[Response]]], Callable[..., Awaitable[Response]]
+]:
+    """Cache a route's 200 responses until one of tables changes.
+
+    The route must take `request: Request`. Non-200 responses are never cached.
+    """
+
+    def decorator(
+        handler: Callable[..., Awaitable[Response]],
+    ) -> Callable[..., Awaitable[Response]]:
+        @functools.wraps(handler)
+        async def wrapper(*args: Any, **kwargs: Any) -> Response:
+            request: Request = kwargs["request"]
+            key = cache_key(request)
+            if tables:
+                await refresh()
+            current = versions(tables)
+            entry = _get(key, current)
+            if entry is not None:
+                stats["hits"] += 1
+                return _replay(request, entry)
+            stats["misses"] += 1
+            response = await handler(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = bytes(response.body)
+            headers = {
+                name: value
+                for name, value in response.headers.items()
+                if name in _KEPT_HEADERS
+            }
+            entry = CachedResponse(current, body, 200, headers, _etag(body))
+            _put(key, entry)
+            return _replay(request, entry)
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = [
+    "bump",
+    "cache_key",
+    "cached_page",
+    "clear",
+    "refresh",
+    "share_versions",
+    "stats",
+    "versions",
+]
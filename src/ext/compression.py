@@ -0,0 +1,137 @@
+"""
+Response compression for HTML and JSON: brotli when the optional brotli package
+is installed and the client accepts it, gzip otherwise.
+
+Bodies shorter than compression_min_bytes go out as they are; below that the
+headers cost more than the bytes saved. Streaming responses (the import diff) are
+compressed chunk by chunk, each flushed so the browser keeps receiving rows as
+they render. Anything else passes through untouched: responses that already
+carry a Content-Encoding (precompressed /assets, see src.ext.assets) and other
+media types (CSV/NDJSON exports, gzip downloads, images).
+
+A compressed body is a different representation of the page, so its ETag is
+made weak; src.ext.cache compares If-None-Match weakly.
+"""
+
+import zlib
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.ext.settings import get_settings
+
+try:
+    import brotli  # pyright: ignore[reportMissingImports]
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({"text/html", "application/json"})
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes, final: bool) -> bytes: ...
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._stream = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._stream.compress(data) + self._stream.flush(mode)
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._stream = brotli.Compressor(quality=quality)  # pyright: ignore
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        tail = self._stream.finish() if final else self._stream.flush()
+        return self._stream.process(data) + tail
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """"br" or "gzip", whichever the client accepts (br needs brotli), else None."""
+    accepted = set()
+    for token in accept_encoding.lower().split(","):
+        coding, _, params = token.partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    return "gzip" if "gzip" in accepted else None
+
+
+def _compressor(encoding: str) -> _Compressor:
+    settings = get_settings()
+    if encoding == "br":
+        return _Brotli(settings.compression_brotli_quality)
+    return _Gzip(settings.compression_gzip_level)
+
+
+def _compressible(headers: Headers) -> bool:
+    media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+    return media_type in COMPRESSIBLE_TYPES and "content-encoding" not in headers
+
+
+class CompressionMiddleware:
+    """ASGI middleware: compress HTML and JSON responses; see the module docstring."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        minimum = get_settings().compression_min_bytes
+        # The start message is held back until the first body chunk shows whether
+        # the response is worth compressing.
+        start: Message | None = None
+        compressor: _Compressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                if _compressible(Headers(raw=message["headers"])):
+                    start = message
+                else:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if len(body) < minimum and not more_body:
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _compressor(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag is not None and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                message["body"] = compressor.compress(body, final=not more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(message["body"]))
+                await send(start)
+                await send(message)
+                return
+            message["body"] = compressor.compress(body, final=not more_body)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+__all__ = ["COMPRESSIBLE_TYPES", "CompressionMiddleware", "choose_encoding"]
@@ -2,37 +2,179 @@
 Async database adapter: engine and session factory from settings.
 
 Uses get_settings().database_url by default; build_engine(url) for tests.
+SQLite connections get the tuning profile from settings (WAL, synchronous,
+cache/mmap sizes, busy timeout, foreign keys) through a connect event. Reads that
+must not queue behind a write transaction use get_read_engine / get_read_session,
+a separate pool of query-only connections.
+
+Importing this module opens nothing: the default engines and session factories
+are built on first use (get_engine, get_sessionmaker, ...) and kept until
+dispose_engines(), which the app lifespan calls on shutdown.
+
+Pools are never shared across fork(): a forked child forgets the connections it
+inherited (without closing them under the parent) and opens its own.
 """
 
+import os
 from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.ext.settings import get_settings
+from src.ext.metrics import TrackedSession, instrument_engine
+from src.ext.settings import Settings, get_settings
+
+
+def sqlite_pragmas(settings: Settings, read_only: bool = False) -> list[str]:
+    """PRAGMA statements for the tuning profile in settings."""
+    foreign_keys = "ON" if settings.sqlite_foreign_keys else "OFF"
+    pragmas = [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA cache_size={settings.sqlite_cache_size}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+        f"PRAGMA foreign_keys={foreign_keys}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return _is_sqlite(url) and (":memory:" in url or url.rstrip("/").endswith(":"))
 
 
-def build_engine(database_url: str | None = None) -> AsyncEngine:
-    """Build an async engine. If database_url is None, use settings' database_url."""
+def build_engine(
+    database_url: str | None = None, read_only: bool = False
+) -> AsyncEngine:
+    """Build an async engine. If database_url is None, use settings' database_url.
+
+    For SQLite the settings' tuning profile is applied to each new connection;
+    read_only=True additionally sets query_only so the pool can never write.
+    Cursor executes are timed for Server-Timing and slow-query logging, and the
+    pool is reported in /metrics as "read" or "write".
+    """
+    settings = get_settings()
     url = database_url
     if url is None:
-        _s = get_settings()
-        url = _s.database_url
-    return create_async_engine(
+        url = settings.database_url
+    engine = create_async_engine(
         url,
-        echo=get_settings().sql_echo,
+        echo=settings.sql_echo,
         future=True,
     )
+    if _is_sqlite(url):
+        pragmas = sqlite_pragmas(settings, read_only=read_only)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection: Any, _record: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    instrument_engine(engine, pool="read" if read_only else "write")
+    return engine
+
+
+def build_read_engine(database_url: str | None = None) -> AsyncEngine | None:
+    """Build the read-only pool, or None for in-memory SQLite (nothing to share)."""
+    settings = get_settings()
+    url = database_url
+    if url is None:
+        url = settings.database_url
+    if _is_memory_sqlite(url):
+        return None
+    return build_engine(url, read_only=True)
+
 
+# Default engines and session factories, built on first use. Keyed by "write" /
+# "read"; both keys hold the same engine for in-memory SQLite.
+_engines: dict[str, AsyncEngine] = {}
+_sessionmakers: dict[str, async_sessionmaker[AsyncSession]] = {}
 
-# Default engine from settings. Used by get_session and by Alembic.
-engine = build_engine()
+
+def get_engine() -> AsyncEngine:
+    """The default engine from settings, built on first call. Used by Alembic too."""
+    engine = _engines.get("write")
+    if engine is None:
+        engine = _engines["write"] = build_engine()
+    return engine
+
+
+def get_read_engine() -> AsyncEngine:
+    """The default read-only engine, built on first call.
+
+    In-memory SQLite has one private DB per connection, so reads fall back to
+    get_engine().
+    """
+    engine = _engines.get("read")
+    if engine is None:
+        engine = _engines["read"] = build_read_engine() or get_engine()
+    return engine
+
+
+def get_sessionmaker(read_only: bool = False) -> async_sessionmaker[AsyncSession]:
+    """Session factory on the default (or read-only) engine, built on first call.
+
+    Its sessions are TrackedSessions, so /metrics counts them per pool and a
+    session left open too long is logged with the code that opened it.
+    """
+    key = "read" if read_only else "write"
+    factory = _sessionmakers.get(key)
+    if factory is None:
+        engine = get_read_engine() if read_only else get_engine()
+        factory = _sessionmakers[key] = async_sessionmaker(
+            engine, class_=TrackedSession, expire_on_commit=False, info={"pool": key}
+        )
+    return factory
+
+
+async def dispose_engines() -> None:
+    """Close every default engine built so far; the next use builds new ones."""
+    engines = set(_engines.values())
+    _engines.clear()
+    _sessionmakers.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+def _forget_inherited_pools() -> None:
+    for pooled in set(_engines.values()):
+        pooled.sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_forget_inherited_pools)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession]:
     """Async generator yielding an AsyncSession. Caller must use in async context."""
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+    async with get_sessionmaker()() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession]:
+    """Like get_session, but on the read-only pool; use for dashboards and lists."""
+    async with get_sessionmaker(read_only=True)() as session:
         yield session
 
 
-__all__ = ["build_engine", "engine", "get_session"]
+__all__ = [
+    "build_engine",
+    "build_read_engine",
+    "dispose_engines",
+    "get_engine",
+    "get_read_engine",
+    "get_read_session",
+    "get_session",
+    "get_sessionmaker",
+    "sqlite_pragmas",
+]
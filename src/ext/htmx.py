@@ -0,0 +1,22 @@
+"""
+HTMX request headers, read the same way by the template layer and the cache.
+"""
+
+from starlette.requests import Request
+
+
+def hx_target(request: Request) -> str | None:
+    """Id of the element an HTMX request swaps ('' if it has none).
+
+    None when the whole page is wanted: a request htmx did not send, or a history
+    restore (back button with the page no longer in htmx's cache).
+    """
+    headers = request.headers
+    if headers.get("HX-Request") != "true":
+        return None
+    if headers.get("HX-History-Restore-Request") == "true":
+        return None
+    return headers.get("HX-Target", "")
+
+
+__all__ = ["hx_target"]
@@ -0,0 +1,225 @@
+"""
+Outgoing mail: a bounded pool of reusable SMTP connections, plus a local stand-in.
+
+SMTPPool.send() never holds more than `size` connections open; idle connections
+are reused by later sends and re-opened if the server dropped them. smtplib is
+blocking, so each send runs in a worker thread.
+
+LocalSMTPServer is a minimal SMTP server that keeps messages in memory, for tests
+and local development: `python -m src.ext.mail` listens on localhost:1025 and
+prints what it receives (set SMTP_PORT=1025 for the app).
+"""
+
+import asyncio
+import email
+import email.policy
+import logging
+import smtplib
+from email.message import EmailMessage
+from types import TracebackType
+from typing import Self
+
+from src.ext.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """At most size concurrent SMTP connections, kept open between sends."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        size: int = 4,
+        user: str | None = None,
+        password: str | None = None,
+        starttls: bool = False,
+        timeout: float = 10.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[smtplib.SMTP] = []
+
+    def message(self, to: str, subject: str, body: str) -> EmailMessage:
+        """Plain-text message from the pool's sender address."""
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.user is not None and self.password is not None:
+            connection.login(self.user, self.password)
+        return connection
+
+    def _deliver(
+        self, connection: smtplib.SMTP | None, message: EmailMessage
+    ) -> smtplib.SMTP:
+        if connection is not None:
+            try:
+                connection.noop()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+                connection = None
+        if connection is None:
+            connection = self._connect()
+        try:
+            connection.send_message(message)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send message on an idle or new connection; raise if delivery fails."""
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            connection = await asyncio.to_thread(self._deliver, connection, message)
+            self._idle.append(connection)
+
+    async def close(self) -> None:
+        """QUIT every idle connection."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            try:
+                await asyncio.to_thread(connection.quit)
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+
+def build_pool(settings: Settings | None = None) -> SMTPPool:
+    """SMTPPool configured from the smtp_* settings."""
+    settings = settings or get_settings()
+    return SMTPPool(
+        settings.smtp_host,
+        settings.smtp_port,
+        settings.smtp_from,
+        size=settings.smtp_pool_size,
+        user=settings.smtp_user,
+        password=settings.smtp_password,
+        starttls=settings.smtp_starttls,
+        timeout=settings.smtp_timeout_seconds,
+    )
+
+
+class LocalSMTPServer:
+    """In-memory SMTP stand-in. Recipients in reject are refused with 550."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        reject: frozenset[str] = frozenset(),
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.reject = reject
+        self.messages: list[EmailMessage] = []
+        self.connections = 0
+        self.max_active = 0
+        self._active = 0
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        _type: type[BaseException] | None,
+        _value: BaseException | None,
+        _traceback: TracebackType | None,
+    ) -> None:
+        await self.stop()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        self._active += 1
+        self.max_active = max(self.max_active, self._active)
+        try:
+            await self._session(reader, writer)
+        except ConnectionError:
+            pass
+        finally:
+            self._active -= 1
+            writer.close()
+
+    async def _session(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        writer.write(b"220 localhost ESMTP\r\n")
+        while line := await reader.readline():
+            command = line[:4].upper()
+            if command == b"EHLO":
+                reply = b"250-localhost\r\n250 8BITMIME\r\n"
+            elif command == b"RCPT":
+                address = line.split(b":", 1)[1].strip(b" <>\r\n").decode()
+                rejected = address in self.reject
+                reply = b"550 No such user\r\n" if rejected else b"250 OK\r\n"
+            elif command == b"DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                self.messages.append(await self._read_data(reader))
+                reply = b"250 OK\r\n"
+            elif command == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                return
+            elif command in (b"HELO", b"MAIL", b"RSET", b"NOOP"):
+                reply = b"250 OK\r\n"
+            else:
+                reply = b"502 Command not implemented\r\n"
+            writer.write(reply)
+            await writer.drain()
+
+    async def _read_data(self, reader: asyncio.StreamReader) -> EmailMessage:
+        lines = []
+        while (line := await reader.readline()) not in (b".\r\n", b""):
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        message = email.message_from_bytes(b"".join(lines), policy=email.policy.default)
+        return message  # type: ignore[return-value]
+
+
+async def _main() -> None:
+    server = LocalSMTPServer(port=1025)
+    await server.start()
+    logger.warning("Local SMTP server on %s:%d", server.host, server.port)
+    seen = 0
+    while True:
+        await asyncio.sleep(1)
+        for message in server.messages[seen:]:
+            print(f"--- {message['To']}: {message['Subject']}\n{message.get_content()}")
+        seen = len(server.messages)
+
+
+__all__ = ["LocalSMTPServer", "SMTPPool", "build_pool"]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
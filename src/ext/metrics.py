@@ -0,0 +1,379 @@
+"""
+Request timing: per-phase durations, Server-Timing header, Prometheus histograms.
+
+TimingMiddleware opens a per-request timings dict in a context variable. SQL time
+is added by cursor events on every engine built by src.ext.db, and template render
+time by the Jinja template class in src.ext.templates. When the response starts,
+the phases go out as a Server-Timing header; when it ends, they are folded into
+per-route histograms that /metrics exposes in the Prometheus text format. Every
+worker process keeps its own, so each series carries a pid label.
+
+Connection pools and sessions are tracked per pool name ("write" / "read"):
+connections in use, callers waiting for one, how long getting one took (the wait
+when the pool is exhausted) and how long each was checked out; open sessions and
+how long each stayed open. A TrackedSession (the class of db.get_sessionmaker())
+open longer than session_warn_seconds is logged once with the stack that opened
+it, and one garbage-collected without close() is logged as leaked.
+"""
+
+import functools
+import logging
+import os
+import sys
+import time
+import traceback
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.ext.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, as in the Prometheus client defaults.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ("db", "render", "total")
+
+_timings: ContextVar[dict[str, float] | None] = ContextVar("timings", default=None)
+
+# (method, route, phase) -> [count per bucket..., +Inf count, sum]
+_histograms: dict[tuple[str, str, str], list[float]] = {}
+
+
+def add_time(phase: str, seconds: float) -> None:
+    """Add seconds to phase for the current request; no-op outside a request."""
+    timings = _timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time the block and add it to phase."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(phase, time.perf_counter() - started)
+
+
+def _add_observation[K](
+    histograms: dict[K, list[float]], key: K, seconds: float
+) -> None:
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = [0.0] * (len(BUCKETS) + 2)
+        histograms[key] = histogram
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            histogram[i] += 1
+    histogram[len(BUCKETS)] += 1
+    histogram[-1] += seconds
+
+
+def observe(method: str, route: str, phase: str, seconds: float) -> None:
+    """Record one observation in the (method, route, phase) histogram."""
+    _add_observation(_histograms, (method, route, phase), seconds)
+
+
+def reset() -> None:
+    """Forget every histogram and counter (tests); gauges keep their values."""
+    _histograms.clear()
+    _pool_histograms.clear()
+    for key in list(_pool_counts):
+        if POOL_METRICS[key[0]][0] == "counter":
+            del _pool_counts[key]
+
+
+def _histogram_lines(name: str, labels: str, histogram: list[float]) -> list[str]:
+    lines = [
+        f'{name}_bucket{{{labels},le="{bound}"}} {int(count)}'
+        for bound, count in zip(BUCKETS, histogram, strict=False)
+    ]
+    total = int(histogram[len(BUCKETS)])
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram[-1]:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {total}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """All histograms and pool gauges in the Prometheus text exposition format."""
+    pid = f'pid="{os.getpid()}"'
+    name = "http_request_phase_seconds"
+    lines = [
+        f"# HELP {name} Time spent per request phase (db, render, total).",
+        f"# TYPE {name} histogram",
+    ]
+    for (method, route, phase), histogram in sorted(_histograms.items()):
+        labels = f'method="{method}",route="{route}",phase="{phase}",{pid}'
+        lines.extend(_histogram_lines(name, labels, histogram))
+    check_sessions()
+    for metric, (kind, help_text) in POOL_METRICS.items():
+        name = f"db_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (series, pool), histogram in sorted(_pool_histograms.items()):
+                if series == metric:
+                    labels = f'pool="{pool}",{pid}'
+                    lines.extend(_histogram_lines(name, labels, histogram))
+            continue
+        for (series, pool), value in sorted(_pool_counts.items()):
+            if series == metric:
+                lines.append(f'{name}{{pool="{pool}",{pid}}} {int(value)}')
+    return "\n".join(lines) + "\n"
+
+
+# metric -> (Prometheus type, help); each series is labelled with its pool name
+# and the worker's pid.
+POOL_METRICS = {
+    "pool_connections_in_use": ("gauge", "Connections checked out of the pool."),
+    "pool_waiting": ("gauge", "Callers waiting for a connection from the pool."),
+    "pool_wait_seconds": (
+        "histogram",
+        "Time to get a connection, including waiting while the pool is exhausted.",
+    ),
+    "pool_checkout_seconds": ("histogram", "Time a connection was checked out."),
+    "sessions_open": ("gauge", "Sessions created and not yet closed."),
+    "session_seconds": ("histogram", "Time from opening a session to closing it."),
+    "sessions_held_too_long_total": (
+        "counter",
+        "Sessions open longer than session_warn_seconds, or never closed.",
+    ),
+}
+
+# (metric, pool) -> gauge or counter value, and -> histogram.
+_pool_counts: dict[tuple[str, str], float] = {}
+_pool_histograms: dict[tuple[str, str], list[float]] = {}
+
+
+def _count(metric: str, pool: str, delta: float) -> None:
+    key = (metric, pool)
+    _pool_counts[key] = _pool_counts.get(key, 0.0) + delta
+
+
+def pool_snapshot() -> dict[str, dict[str, float]]:
+    """Current gauges and counters by pool, plus each histogram's count and sum."""
+    check_sessions()
+    snapshot: dict[str, dict[str, float]] = {}
+    for (metric, pool), value in _pool_counts.items():
+        snapshot.setdefault(pool, {})[metric] = value
+    for (metric, pool), histogram in _pool_histograms.items():
+        values = snapshot.setdefault(pool, {})
+        values[f"{metric}_count"] = histogram[len(BUCKETS)]
+        values[f"{metric}_sum"] = histogram[-1]
+    return snapshot
+
+
+@functools.cache
+def _timed_pool_class(base: type[Pool], name: str) -> type[Pool]:
+    # Pool.recreate() (engine.dispose(), fork) builds self.__class__, so timing
+    # set up by swapping the instance's class survives; events carry over too.
+    class TimedPool(base):  # type: ignore[misc, valid-type]
+        def _do_get(self) -> Any:
+            _count("pool_waiting", name, 1)
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                _count("pool_waiting", name, -1)
+                elapsed = time.perf_counter() - started
+                _add_observation(_pool_histograms, ("pool_wait_seconds", name), elapsed)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def instrument_pool(engine: AsyncEngine, name: str) -> None:
+    """Report engine's pool under name: in-use count, wait and checkout times."""
+    pool = engine.sync_engine.pool
+    pool.__class__ = _timed_pool_class(type(pool), name)
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(_dbapi_connection: Any, record: Any, _proxy: Any) -> None:
+        record.info["checked_out_at"] = time.perf_counter()
+        _count("pool_connections_in_use", name, 1)
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(_dbapi_connection: Any, record: Any) -> None:
+        started = record.info.pop("checked_out_at", None)
+        if started is None:
+            return
+        _count("pool_connections_in_use", name, -1)
+        elapsed = time.perf_counter() - started
+        _add_observation(_pool_histograms, ("pool_checkout_seconds", name), elapsed)
+
+
+@dataclass
+class _OpenSession:
+    pool: str
+    opened_at: float
+    stack: traceback.StackSummary | None
+    warned: bool = False
+
+
+_open_sessions: dict[int, _OpenSession] = {}
+_last_check = 0.0
+# How often opening a session also looks for ones held too long.
+_CHECK_INTERVAL_SECONDS = 1.0
+
+
+def _opened_by(record: _OpenSession) -> str:
+    if record.stack is None:
+        return ""
+    return "\nOpened at (most recent call last):\n" + "".join(record.stack.format())
+
+
+def _warn_held(record: _OpenSession, held: float, state: str) -> None:
+    record.warned = True
+    _count("sessions_held_too_long_total", record.pool, 1)
+    logger.warning(
+        "Session on pool %r %s after %.1f s%s",
+        record.pool,
+        state,
+        held,
+        _opened_by(record),
+    )
+
+
+def check_sessions() -> None:
+    """Warn once about every session open longer than session_warn_seconds."""
+    global _last_check
+    threshold = get_settings().session_warn_seconds
+    now = time.perf_counter()
+    _last_check = now
+    if threshold is None:
+        return
+    for record in list(_open_sessions.values()):
+        held = now - record.opened_at
+        if not record.warned and held > threshold:
+            _warn_held(record, held, "still open")
+
+
+def _session_closed(key: int, leaked: bool = False) -> None:
+    record = _open_sessions.pop(key, None)
+    if record is None:
+        return
+    held = time.perf_counter() - record.opened_at
+    _count("sessions_open", record.pool, -1)
+    _add_observation(_pool_histograms, ("session_seconds", record.pool), held)
+    threshold = get_settings().session_warn_seconds
+    if leaked:
+        _warn_held(record, held, "was garbage-collected without close()")
+    elif threshold is not None and held > threshold and not record.warned:
+        _warn_held(record, held, "closed")
+
+
+class TrackedSession(AsyncSession):
+    """AsyncSession counted in the pool metrics from creation to close().
+
+    The pool name comes from info={"pool": ...}, which db.get_sessionmaker sets.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        pool = self.info.get("pool", "default")
+        stack = None
+        if get_settings().session_warn_seconds is not None:
+            # Line text is looked up only if a warning is ever formatted.
+            frames = traceback.walk_stack(sys._getframe(1))
+            stack = traceback.StackSummary.extract(frames, limit=20, lookup_lines=False)
+            stack.reverse()
+        key = id(self)
+        _open_sessions[key] = _OpenSession(pool, time.perf_counter(), stack)
+        _count("sessions_open", pool, 1)
+        self._leak_check = weakref.finalize(self, _session_closed, key, True)
+        if time.perf_counter() - _last_check >= _CHECK_INTERVAL_SECONDS:
+            check_sessions()
+
+    async def close(self) -> None:
+        try:
+            await super().close()
+        finally:
+            self._leak_check.detach()
+            _session_closed(id(self))
+
+
+def instrument_engine(engine: AsyncEngine, pool: str = "default") -> None:
+    """Time every cursor execute on engine; log those above slow_query_ms.
+
+    Also reports engine's connection pool under the name pool.
+    """
+    instrument_pool(engine, pool)
+    slow_query_ms = get_settings().slow_query_ms
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn: Any, *_args: Any) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        add_time("db", elapsed)
+        if slow_query_ms is not None and elapsed * 1000 >= slow_query_ms:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+def _server_timing(timings: dict[str, float]) -> str:
+    return ", ".join(
+        f"{phase};dur={timings.get(phase, 0.0) * 1000:.1f}" for phase in PHASES
+    )
+
+
+class TimingMiddleware:
+    """ASGI middleware: Server-Timing header plus per-route phase histograms."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings: dict[str, float] = {}
+        token = _timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timings["total"] = time.perf_counter() - started
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", _server_timing(timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            timings["total"] = time.perf_counter() - started
+            route = scope.get("route")
+            route_path = getattr(route, "path", "<unmatched>")
+            for phase in PHASES:
+                observe(scope["method"], route_path, phase, timings.get(phase, 0.0))
+
+
+__all__ = [
+    "POOL_METRICS",
+    "TimingMiddleware",
+    "TrackedSession",
+    "add_time",
+    "check_sessions",
+    "instrument_engine",
+    "instrument_pool",
+    "observe",
+    "pool_snapshot",
+    "render_prometheus",
+    "reset",
+    "timed",
+]
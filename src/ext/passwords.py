@@ -0,0 +1,147 @@
+"""
+Password hashing off the event loop: scrypt in a small dedicated thread pool.
+
+A hash costs tens of milliseconds of CPU (and 16 MiB) by design. Run inline it
+would stall every request on the worker for that long; run in the shared
+threadpool, a burst of logins would queue ahead of import parsing and template
+streaming. PasswordHasher gives hashing its own `workers` threads (hashlib.scrypt
+releases the GIL, so they run beside the loop) and admits at most `max_pending`
+jobs: past that, hash() and verify() raise HasherBusyError at once, which a
+route turns into 503 + Retry-After instead of letting the queue and latency grow.
+
+Hashes are stored as `scrypt$<n>$<r>$<p>$<salt>$<key>` (base64), so the cost
+can be raised later and old hashes still verify; needs_rehash() tells when.
+"""
+
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ext.settings import get_settings
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+_R = 8
+_P = 1
+
+
+class HasherBusyError(RuntimeError):
+    """Too many hashes queued; retry shortly."""
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _derive(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=2 * 128 * r * n,
+        dklen=KEY_BYTES,
+    )
+
+
+def hash_sync(password: str, n: int) -> str:
+    """Encoded scrypt hash of password with a fresh salt (blocking)."""
+    salt = os.urandom(SALT_BYTES)
+    key = _derive(password, salt, n, _R, _P)
+    return f"scrypt${n}${_R}${_P}${_b64(salt)}${_b64(key)}"
+
+
+def verify_sync(password: str, encoded: str) -> bool:
+    """True if password matches encoded (blocking); False if encoded is malformed."""
+    try:
+        scheme, n, r, p, salt, key = encoded.split("$")
+        if scheme != "scrypt":
+            return False
+        expected = base64.b64decode(key)
+        actual = _derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+class PasswordHasher:
+    """Bounded, non-blocking hash()/verify(); see the module docstring."""
+
+    def __init__(self, workers: int = 2, max_pending: int = 16, n: int = 2**14):
+        self.n = n
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="hasher")
+        self._pending = 0
+        # Verified when the user is unknown, so that answer takes as long as a
+        # wrong password.
+        self._dummy = hash_sync("", n)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run[T](self, fn: functools.partial[T]) -> T:
+        if self._pending >= self.max_pending:
+            raise HasherBusyError("password hasher is busy")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(functools.partial(hash_sync, password, self.n))
+
+    async def verify(self, password: str, encoded: str | None) -> bool:
+        """True if password matches encoded; pass None for an unknown user."""
+        target = self._dummy if encoded is None else encoded
+        matched = await self._run(functools.partial(verify_sync, password, target))
+        return matched and encoded is not None
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """True if encoded was made with a different cost than this hasher's."""
+        parts = encoded.split("$")
+        return len(parts) != 6 or parts[1:4] != [str(self.n), str(_R), str(_P)]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher: PasswordHasher | None = None
+
+
+def get_hasher() -> PasswordHasher:
+    """The process's PasswordHasher, built from settings on first use."""
+    global _hasher
+    if _hasher is None:
+        settings = get_settings()
+        _hasher = PasswordHasher(
+            workers=settings.auth_hash_workers,
+            max_pending=settings.auth_hash_max_pending,
+            n=settings.auth_scrypt_n,
+        )
+    return _hasher
+
+
+def close() -> None:
+    """Shut down the process's hasher, if one was built (app shutdown, tests)."""
+    global _hasher
+    if _hasher is not None:
+        _hasher.close()
+        _hasher = None
+
+
+__all__ = [
+    "HasherBusyError",
+    "PasswordHasher",
+    "close",
+    "get_hasher",
+    "hash_sync",
+    "verify_sync",
+]
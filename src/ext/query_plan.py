@@ -0,0 +1,94 @@
+"""
+EXPLAIN QUERY PLAN guard: fail tests whose queries fall back to full table scans.
+
+    async with forbid_full_scans(engine):
+        await scoped.list_page(session, Income, user_id)
+
+While the block runs, every SELECT / UPDATE / DELETE sent through engine is first
+explained on the same connection with the same parameters. On exit, any plan step
+that walks a whole table raises FullScanError naming the statement. That is every
+SCAN step, "SCAN income" and "SCAN income USING INDEX ..." (older SQLite writes
+"SCAN TABLE income") alike: walking all of an index still reads every row. Only
+SEARCH steps and virtual tables answering through their own index (an FTS5 MATCH
+shows as "SCAN income_fts VIRTUAL TABLE INDEX 0:M1") pass; tables in allow are
+ignored.
+"""
+
+import re
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_CHECKED = ("SELECT", "UPDATE", "DELETE", "WITH")
+# "SCAN income", "SCAN TABLE income", "SCAN income USING [COVERING] INDEX ...".
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)\b")
+# A SELECT without FROM, not a table.
+_CONSTANT_ROW = "SCAN CONSTANT ROW"
+# A virtual table answering through its own index, e.g. an FTS5 MATCH.
+_VIRTUAL_INDEX = re.compile(r"^SCAN \w+ VIRTUAL TABLE INDEX ")
+
+
+class FullScanError(AssertionError):
+    """A query in a forbid_full_scans block read a whole table."""
+
+
+def full_scans(plan: Iterable[tuple[Any, ...]]) -> list[str]:
+    """Tables read in full by an EXPLAIN QUERY PLAN result (id, parent, _, detail)."""
+    scans = []
+    for row in plan:
+        detail = str(row[-1])
+        if detail == _CONSTANT_ROW or _VIRTUAL_INDEX.match(detail):
+            continue
+        match = _FULL_SCAN.match(detail)
+        if match is not None:
+            scans.append(match.group(1))
+    return scans
+
+
+@asynccontextmanager
+async def forbid_full_scans(
+    engine: AsyncEngine, allow: Iterable[str] = ()
+) -> AsyncIterator[list[str]]:
+    """Explain each query run on engine in the block; raise if any scans a table.
+
+    Yields the list of explained statements (handy to assert something ran).
+    """
+    allowed = set(allow)
+    explained: list[str] = []
+    offenders: list[str] = []
+
+    def _explain(
+        conn: Any,
+        _cursor: Any,
+        statement: str,
+        parameters: Any,
+        _context: Any,
+        executemany: bool,
+    ) -> None:
+        if executemany or not statement.lstrip().upper().startswith(_CHECKED):
+            return
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plan = cursor.fetchall()
+        finally:
+            cursor.close()
+        explained.append(statement)
+        scanned = [table for table in full_scans(plan) if table not in allowed]
+        if scanned:
+            offenders.append(f"full scan of {', '.join(scanned)}: {statement}")
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _explain)
+    try:
+        yield explained
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _explain)
+    if offenders:
+        raise FullScanError("\n".join(offenders))
+
+
+__all__ = ["FullScanError", "forbid_full_scans", "full_scans"]
@@ -0,0 +1,179 @@
+"""
+In-process asyncio job scheduler with durable state and leases in SQLite.
+
+Each job has one scheduled_job row holding its next run time and, while it runs,
+a lease (owner + expiry). A worker runs a job only after winning the lease with a
+conditional UPDATE, so with several workers (or several replicas on one database
+file) each due run happens once. A worker that dies mid-run simply lets its lease
+expire. Intervals are jittered so workers started together do not stay in step.
+
+Times are stored as Unix timestamps (float seconds) so comparisons stay numeric.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel, col, or_, update
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob(SQLModel, table=True):
+    """Durable state of one job: when it runs next and who holds its lease."""
+
+    __tablename__ = "scheduled_job"  # pyright: ignore[reportAssignmentType]
+
+    name: str = Field(primary_key=True, max_length=64)
+    next_run_at: float = 0.0
+    lease_owner: str | None = Field(default=None, max_length=128)
+    lease_until: float = 0.0
+    last_run_at: float | None = None
+    last_duration_ms: int = 0
+    last_error: str = Field(default="", max_length=1024)
+    run_count: int = 0
+
+
+@dataclass(frozen=True)
+class Job:
+    """A coroutine function run every interval seconds, +/- jitter (a fraction).
+
+    lease is how long a run may take before another worker may take the job over.
+    """
+
+    name: str
+    func: Callable[[], Awaitable[None]]
+    interval: float
+    jitter: float = 0.1
+    lease: float = 300.0
+
+    def next_delay(self) -> float:
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Scheduler:
+    """Runs due jobs every tick seconds until stopped."""
+
+    def __init__(self, engine: AsyncEngine, tick: float = 5.0) -> None:
+        self.engine = engine
+        self.tick = tick
+        self.owner = _owner_id()
+        self.jobs: dict[str, Job] = {}
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def add(self, job: Job) -> None:
+        self.jobs[job.name] = job
+
+    async def register(self) -> None:
+        """Create a state row for every job that has none; first runs are jittered."""
+        now = time.time()
+        rows = [
+            {
+                "name": job.name,
+                "next_run_at": now + random.uniform(0, job.interval * job.jitter),
+            }
+            for job in self.jobs.values()
+        ]
+        if not rows:
+            return
+        statement = sqlite_insert(ScheduledJob).on_conflict_do_nothing()
+        async with self.engine.begin() as conn:
+            await conn.execute(statement, rows)
+
+    async def _acquire(self, job: Job, now: float) -> bool:
+        statement = (
+            update(ScheduledJob)
+            .where(
+                col(ScheduledJob.name) == job.name,
+                col(ScheduledJob.next_run_at) <= now,
+                or_(
+                    col(ScheduledJob.lease_owner).is_(None),
+                    col(ScheduledJob.lease_until) < now,
+                ),
+            )
+            .values(lease_owner=self.owner, lease_until=now + job.lease)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(statement)
+        return result.rowcount == 1
+
+    async def _release(self, job: Job, started: float, error: str) -> None:
+        finished = time.time()
+        statement = (
+            update(ScheduledJob)
+            .where(
+                col(ScheduledJob.name) == job.name,
+                col(ScheduledJob.lease_owner) == self.owner,
+            )
+            .values(
+                lease_owner=None,
+                lease_until=0.0,
+                next_run_at=finished + job.next_delay(),
+                last_run_at=started,
+                last_duration_ms=int((finished - started) * 1000),
+                last_error=error[:1024],
+                run_count=ScheduledJob.run_count + 1,
+            )
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(statement)
+
+    async def run_pending(self) -> list[str]:
+        """Run every due job whose lease this worker wins. Return their names."""
+        ran = []
+        for job in self.jobs.values():
+            started = time.time()
+            if not await self._acquire(job, started):
+                continue
+            error = ""
+            try:
+                await job.func()
+            except Exception as exc:
+                logger.exception("Job %s failed", job.name)
+                error = f"{type(exc).__name__}: {exc}"
+            await self._release(job, started, error)
+            ran.append(job.name)
+        return ran
+
+    async def _loop(self) -> None:
+        try:
+            await self.register()
+        except Exception:
+            logger.exception("Scheduler could not register its jobs")
+        while not self._stopping.is_set():
+            try:
+                await self.run_pending()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), self.tick)
+
+    def start(self) -> None:
+        """Start the loop as a background task of the running event loop."""
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._loop(), name="scheduler")
+
+    async def stop(self) -> None:
+        """Stop after the job currently running (if any) finishes."""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+__all__ = ["Job", "ScheduledJob", "Scheduler"]
@@ -4,9 +4,13 @@ Application settings loaded from environment and .env file.
 Uses pydantic-settings: env vars override .env; .env is loaded from current
 working directory or from env_file path. Use get_settings() for FastAPI
 Depends() or to obtain a consistent entry point; tests can override by
-replacing or wrapping the factory.
+replacing or wrapping the factory. Nothing is read at import: the first
+get_settings() call parses the environment and .env, later calls reuse it.
 """
 
+import functools
+from typing import Any
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -23,14 +27,102 @@ class Settings(BaseSettings):
     database_url: str = "sqlite+aiosqlite:///./finadv.db"
     sql_echo: bool = False
 
+    # SQLite tuning profile, applied as PRAGMAs on every new connection.
+    # cache_size is negative to mean KiB (-64000 = ~64 MB per connection).
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size: int = -64000
+    sqlite_mmap_size: int = 268_435_456
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_foreign_keys: bool = True
+
+    # Response cache (src.ext.cache): LRU bounds for rendered pages and fragments,
+    # and how often a worker re-reads cache_stamp to notice other workers' writes.
+    response_cache_max_entries: int = 512
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    response_cache_stamp_seconds: float = 1.0
+
+    # Response compression (src.ext.compression) of HTML and JSON bodies.
+    compression_min_bytes: int = 500
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5
+
+    # Identity cache (src.resources._base.identity): how often a worker re-reads
+    # the cache_stamp table to notice rows another worker changed.
+    identity_cache_stamp_seconds: float = 1.0
+
+    # Templates (src.ext.templates): production turns off auto_reload, caches
+    # bytecode on disk (Jinja's temp dir when templates_bytecode_dir is None) and
+    # precompiles every template at startup.
+    templates_production: bool = False
+    templates_bytecode_dir: str | None = None
+
+    # Instrumentation (src.ext.metrics): log SQL statements slower than this, and
+    # sessions kept open longer than session_warn_seconds (None turns either off).
+    slow_query_ms: float | None = None
+    session_warn_seconds: float | None = 30.0
+
+    # Production server (python -m src.serve): workers defaults to the CPU count.
+    # The graceful timeout must stay below Docker's stop_grace_period (30s).
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_workers: int | None = None
+    server_graceful_timeout_seconds: int = 25
+    server_migrate: bool = True
+    server_forwarded_allow_ips: str = "127.0.0.1"
 
+    # Background jobs (src.ext.scheduler): off unless enabled, so tests and one-off
+    # scripts never start it. Jobs are leased in the DB; any number of workers may
+    # run the scheduler and each job still runs once per interval.
+    scheduler_enabled: bool = False
+    scheduler_tick_seconds: float = 5.0
+    alerts_interval_seconds: float = 900.0
+
+    # Write queue (src.ext.writer): group-commit repository writes through one
+    # connection per worker. Needs a file database.
+    write_queue_enabled: bool = False
+    write_queue_max_batch: int = 64
+    write_queue_max_delay_ms: float = 1.0
+    write_queue_max_pending: int = 1024
+
+    # Outgoing mail (src.ext.mail): at most smtp_pool_size open connections.
+    smtp_host: str = "localhost"
+    smtp_port: int = 25
+    smtp_user: str | None = None
+    smtp_password: str | None = None
+    smtp_starttls: bool = False
+    smtp_from: str = "finadv@localhost"
+    smtp_pool_size: int = 4
+    smtp_timeout_seconds: float = 10.0
+
+    # Auth (src.resources.auth): session cookies are signed with auth_secret_key.
+    # Empty means a random key, per process in dev and shared by the workers of
+    # python -m src.serve; either way sessions end on restart, so set it in
+    # production. Hashing runs on auth_hash_workers threads with at most
+    # auth_hash_max_pending queued (src.ext.passwords).
+    auth_secret_key: str = ""
+    auth_session_days: int = 30
+    auth_cookie_secure: bool = True
+    auth_hash_workers: int = 2
+    auth_hash_max_pending: int = 16
+    auth_scrypt_n: int = 2**14
+
+
+@functools.cache
 def get_settings() -> Settings:
-    """Return application settings. Use in Depends(get_settings) or as entry point."""
-    return _settings
+    """Return application settings. Use in Depends(get_settings) or as entry point.
+
+    Built once, on first call. Tests can set os.environ before it, or patch it.
+    """
+    return Settings()
+
 
+def __getattr__(name: str) -> Any:
+    # `settings` stays importable, but is only built when first looked up.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Singleton; created once at import. Tests can set os.environ or patch get_settings.
-_settings = Settings()
-settings = _settings
 
-__all__ = ["Settings", "get_settings", "settings"]
+__all__ = ["Settings", "get_settings"]
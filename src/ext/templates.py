@@ -0,0 +1,226 @@
+"""
+Shared Jinja2 templates instance.
+
+Base templates resolve by bare name ('layout.html'), each resource's templates/
+under its name ('imports/diff.html'). An HTMX request targeting #some-id gets
+only the block some_id of the page, plus its <title>.
+"""
+
+from collections.abc import AsyncIterator, Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import (
+    BaseLoader,
+    BytecodeCache,
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    PrefixLoader,
+    Template,
+)
+from starlette.background import BackgroundTask
+
+from src.ext.assets import asset_url
+from src.ext.htmx import hx_target
+from src.ext.metrics import timed
+from src.ext.settings import get_settings
+
+RESOURCES_DIR = Path(__file__).resolve().parent.parent / 'resources'
+TEMPLATES_DIR = RESOURCES_DIR / '_base' / 'templates'
+STREAM_CHUNK_CHARS = 8192
+
+
+def _resource_loaders() -> dict[str, FileSystemLoader]:
+    return {
+        path.parent.name: FileSystemLoader(str(path))
+        for path in sorted(RESOURCES_DIR.glob('*/templates'))
+        if not path.parent.name.startswith('_')
+    }
+
+
+def _loader() -> BaseLoader:
+    return ChoiceLoader(
+        [FileSystemLoader(str(TEMPLATES_DIR)), PrefixLoader(_resource_loaders())]
+    )
+
+
+class _TimedTemplate(Template):
+    """Template whose render time is reported as the request's render phase."""
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        with timed('render'):
+            return super().render(*args, **kwargs)
+
+
+def _bytecode_cache() -> BytecodeCache | None:
+    settings = get_settings()
+    if not settings.templates_production:
+        return None
+    directory = settings.templates_bytecode_dir
+    if directory is None:
+        return FileSystemBytecodeCache()
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(directory)
+
+
+def build_environment(
+    enable_async: bool = False,
+    loader: BaseLoader | None = None,
+    bytecode_cache: BytecodeCache | None = None,
+) -> Environment:
+    """Jinja environment with the base loader and one prefixed loader per resource."""
+    settings = get_settings()
+    env = Environment(
+        loader=loader or _loader(),
+        autoescape=True,
+        auto_reload=not settings.templates_production,
+        bytecode_cache=bytecode_cache,
+        enable_async=enable_async,
+    )
+    env.template_class = _TimedTemplate
+    env.globals['asset_url'] = asset_url
+    return env
+
+
+def fragment_block(request: Request, template: Template) -> str | None:
+    """The block to render alone for request, or None for the whole template.
+
+    Target ids map to block names with dashes as underscores (#import-panel ->
+    import_panel); the block must hold exactly what the target's swap expects.
+    """
+    target = hx_target(request)
+    if not target:
+        return None
+    block = target.replace('-', '_')
+    return block if block in template.blocks else None
+
+
+def _title(template: Template, context: Any) -> Iterator[str]:
+    if 'title' in template.blocks:
+        yield '<title>'
+        yield from template.blocks['title'](context)
+        yield '</title>'
+
+
+class FragmentTemplates(Jinja2Templates):
+    """Jinja2Templates whose TemplateResponse renders an HTMX fragment_block()."""
+
+    def TemplateResponse(  # type: ignore[override]
+        self,
+        request: Request,
+        name: str,
+        context: dict[str, Any] | None = None,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        background: BackgroundTask | None = None,
+    ) -> HTMLResponse:
+        template = self.get_template(name)
+        block = fragment_block(request, template)
+        if block is None:
+            return super().TemplateResponse(
+                request=request,
+                name=name,
+                context=context,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                background=background,
+            )
+        values = {**(context or {}), 'request': request}
+        for processor in self.context_processors:
+            values.update(processor(request))
+        with timed('render'):
+            jinja_context = template.new_context(values)
+            title = ''.join(_title(template, jinja_context))
+            content = title + ''.join(template.blocks[block](jinja_context))
+        return HTMLResponse(content, status_code, headers, media_type, background)
+
+
+_shared_loader = _loader()
+_shared_bytecode_cache = _bytecode_cache()
+templates = FragmentTemplates(
+    env=build_environment(loader=_shared_loader, bytecode_cache=_shared_bytecode_cache)
+)
+_stream_env = build_environment(
+    enable_async=True, loader=_shared_loader, bytecode_cache=_shared_bytecode_cache
+)
+_stream_env.globals.update(templates.env.globals)
+
+
+def precompile() -> int:
+    """Compile every template into both environments' caches. Return how many."""
+    names = templates.env.list_templates()
+    for name in names:
+        templates.env.get_template(name)
+        _stream_env.get_template(name)
+    return len(names)
+
+
+async def _buffered_chunks(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    # Jinja yields one piece per output node; group them into STREAM_CHUNK_CHARS
+    # writes. Render time excludes the time spent waiting on the client.
+    buffer: list[str] = []
+    size = 0
+    while True:
+        with timed('render'):
+            chunk = await anext(chunks, None)
+        if chunk is None:
+            break
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_CHARS:
+            yield ''.join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def _async_fragment(
+    template: Template, block: str, values: dict[str, Any]
+) -> AsyncIterator[str]:
+    context = template.new_context(values)
+    if 'title' in template.blocks:
+        title = [chunk async for chunk in template.blocks['title'](context)]
+        yield f'<title>{"".join(title)}</title>'
+    async for chunk in template.blocks[block](context):
+        yield chunk
+
+
+def stream_template(
+    request: Request,
+    name: str,
+    context: Mapping[str, Any],
+    status_code: int = 200,
+) -> StreamingResponse:
+    """Render name with generate_async and stream the chunks as they are produced.
+
+    Context values may be async iterables (e.g. a repository row generator); the
+    template's `{% for %}` consumes them lazily, so the page is never built whole.
+    """
+    template = _stream_env.get_template(name)
+    values = {**context, 'request': request}
+    block = fragment_block(request, template)
+    if block is None:
+        chunks = template.generate_async(values)
+    else:
+        chunks = _async_fragment(template, block, values)
+    return StreamingResponse(
+        _buffered_chunks(chunks), status_code=status_code, media_type='text/html'
+    )
+
+
+__all__ = [
+    'TEMPLATES_DIR',
+    'FragmentTemplates',
+    'fragment_block',
+    'precompile',
+    'stream_template',
+    'templates',
+]
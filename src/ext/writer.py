@@ -0,0 +1,226 @@
+"""
+Single-writer queue: one task owns the write connection and commits in groups.
+
+With a WriteQueue installed, the base repository's writes are submitted as
+operations and run max_batch at a time in one BEGIN IMMEDIATE transaction. It
+needs a file database; each worker runs its own queue.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+type Operation[T] = Callable[[AsyncSession], Awaitable[T]]
+type _Item = tuple[Operation[Any], asyncio.Future[Any]]
+type _Done = tuple[asyncio.Future[Any], Any, list[Callable[[], None]]]
+
+_AFTER_COMMIT = "after_commit"
+
+
+class WriteQueue:
+    """Group-commit writer on engine's database; start() before submitting."""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        max_batch: int = 64,
+        max_delay: float = 0.001,
+        max_pending: int = 1024,
+    ) -> None:
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue[_Item | None] = asyncio.Queue(max_pending)
+        self._task: asyncio.Task[None] | None = None
+        self._connection: AsyncConnection | None = None
+        self.stats = {"batches": 0, "writes": 0, "failed": 0}
+
+    async def start(self) -> None:
+        """Open the write connection and start the writer task."""
+        if self.engine.url.database in (None, "", ":memory:"):
+            raise ValueError("WriteQueue needs a file database")
+        self._connection = await self.engine.connect()
+        self._task = asyncio.create_task(self._run(), name="write-queue")
+
+    async def stop(self) -> None:
+        """Finish every queued operation, then close the write connection.
+
+        If this is the installed queue, new writes go direct from now on.
+        """
+        if _current is self:
+            install(None)
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def submit[T](self, operation: Operation[T]) -> T:
+        """Run operation in the next group commit; return its result once committed.
+
+        Raises whatever operation raised (the rest of its batch still commits), or
+        the commit's error for every operation of a batch that failed to commit.
+        A failed operation's batch is retried without it, so operations must only
+        touch the database.
+        """
+        if self._task is None:
+            raise RuntimeError("WriteQueue is not running")
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def _next_batch(self) -> tuple[list[_Item], bool]:
+        """Up to max_batch items, waiting max_delay for more; True when stopping."""
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self) -> None:
+        stopping = False
+        try:
+            while not stopping:
+                batch, stopping = await self._next_batch()
+                if batch:
+                    await self._commit(batch)
+        finally:
+            # Cancelled instead of stopped: nothing will run what is still queued.
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None and not item[1].done():
+                    item[1].set_exception(RuntimeError("WriteQueue stopped"))
+
+    async def _commit(self, batch: list[_Item]) -> None:
+        items = [item for item in batch if not item[1].cancelled()]
+        failed: list[tuple[asyncio.Future[Any], BaseException]] = []
+        while True:
+            try:
+                done = await self._transaction(items)
+            except _OperationFailed as failure:
+                # Everything was rolled back; run the rest again without it.
+                _operation, future = items.pop(failure.index)
+                failed.append((future, failure.error))
+                continue
+            except Exception as exc:
+                logger.exception("Group commit of %d writes failed", len(batch))
+                for _operation, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                self.stats["failed"] += len(batch)
+                return
+            except BaseException as exc:
+                # Cancelled mid-batch: its callers would otherwise wait forever.
+                error = RuntimeError("WriteQueue stopped")
+                error.__cause__ = exc
+                for _operation, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                raise
+            break
+        self.stats["batches"] += 1
+        self.stats["writes"] += len(done)
+        self.stats["failed"] += len(failed)
+        for future, result, callbacks in done:
+            for callback in callbacks:
+                callback()
+            if not future.done():
+                future.set_result(result)
+        for future, exc in failed:
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _transaction(self, items: list[_Item]) -> list[_Done]:
+        """Run items in one transaction and commit; _OperationFailed rolls all back.
+
+        No savepoints: a batch that fails is rare, so it pays for a rerun rather
+        than every batch paying a SAVEPOINT round trip per operation.
+        """
+        assert self._connection is not None
+        done: list[_Done] = []
+        if not items:
+            return done
+        session = AsyncSession(bind=self._connection, expire_on_commit=False)
+        try:
+            # Take the write lock up front: a deferred transaction that reads
+            # first can fail to upgrade its lock instead of waiting for it.
+            connection = await session.connection()
+            await connection.exec_driver_sql("BEGIN IMMEDIATE")
+            for index, (operation, future) in enumerate(items):
+                callbacks: list[Callable[[], None]] = []
+                session.info[_AFTER_COMMIT] = callbacks
+                try:
+                    result = await operation(session)
+                except Exception as exc:
+                    raise _OperationFailed(index, exc) from exc
+                done.append((future, result, callbacks))
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+        return done
+
+
+class _OperationFailed(Exception):
+    def __init__(self, index: int, error: Exception) -> None:
+        super().__init__(index, error)
+        self.index = index
+        self.error = error
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run callback once the operation's batch has committed.
+
+    Outside a WriteQueue operation (a session that commits itself), runs it now;
+    callers register after their own commit in that case.
+    """
+    callbacks = session.info.get(_AFTER_COMMIT)
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+_current: WriteQueue | None = None
+
+
+def current() -> WriteQueue | None:
+    """The running queue the repository submits writes to, if any."""
+    return _current
+
+
+def install(queue: WriteQueue | None) -> None:
+    """Make queue the one current() returns (None: write directly again)."""
+    global _current
+    _current = queue
+
+
+__all__ = ["Operation", "WriteQueue", "after_commit", "current", "install"]
@@ -4,17 +4,30 @@ FinAdv FastAPI app: routers, static files, and template config.
 
 import http
 import logging
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import partial
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Response
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.exception_handlers import http_exception_handler
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-TEMPLATES_DIR = Path(__file__).resolve().parent / 'resources' / '_base' / 'templates'
+from src.ext import cache, compression, db, metrics, passwords, writer
+from src.ext.assets import ASSETS_DIR, PrecompressedStaticFiles
+from src.ext.mail import build_pool
+from src.ext.scheduler import Job, Scheduler
+from src.ext.settings import get_settings
+from src.ext.templates import precompile, templates
+from src.resources._base import stamps
+from src.resources.alerts import logic as alerts
+from src.resources.auth.routes import current_session
+from src.resources.auth.routes import router as auth_router
+from src.resources.exports.routes import router as exports_router
+from src.resources.imports.routes import router as imports_router
+from src.resources.search.routes import router as search_router
+
 STATIC_DIR = Path(__file__).resolve().parent / 'static'
 
 _4XX_5XX_MESSAGES: dict[int, tuple[str, str]] = {
@@ -29,6 +42,9 @@ _4XX_5XX_MESSAGES: dict[int, tuple[str, str]] = {
 def _error_context(status_code: int, detail: object) -> dict[str, str | int]:
     if status_code in _4XX_5XX_MESSAGES:
         title, message = _4XX_5XX_MESSAGES[status_code]
+        # A 400 raised with its own detail (an unreadable import line) shows it.
+        if status_code == 400 and isinstance(detail, str) and detail != 'Bad Request':
+            message = detail
     else:
         try:
             title = http.HTTPStatus(status_code).phrase
@@ -38,16 +54,63 @@ def _error_context(status_code: int, detail: object) -> dict[str, str | int]:
     return {'status_code': status_code, 'title': title, 'message': message}
 
 
+async def _read_cache_stamps() -> dict[str, int]:
+    async with db.get_sessionmaker(read_only=True)() as session:
+        return await stamps.read(session)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    yield
+    settings = get_settings()
+    if settings.templates_production:
+        precompile()
+    async with AsyncExitStack() as stack:
+        # Engines are built on first use; whatever was opened is closed on shutdown.
+        stack.push_async_callback(db.dispose_engines)
+        stack.callback(passwords.close)
+        # Other workers' writes reach this worker's cached pages via cache_stamp.
+        cache.share_versions(_read_cache_stamps)
+        stack.callback(cache.share_versions, None)
+        if settings.write_queue_enabled:
+            queue = writer.WriteQueue(
+                db.get_engine(),
+                max_batch=settings.write_queue_max_batch,
+                max_delay=settings.write_queue_max_delay_ms / 1000,
+                max_pending=settings.write_queue_max_pending,
+            )
+            await queue.start()
+            writer.install(queue)
+            stack.push_async_callback(queue.stop)
+        if settings.scheduler_enabled:
+            pool = build_pool(settings)
+            stack.push_async_callback(pool.close)
+            scheduler = Scheduler(db.get_engine(), tick=settings.scheduler_tick_seconds)
+            scheduler.add(
+                Job(
+                    'alerts',
+                    partial(alerts.run_pass, pool),
+                    settings.alerts_interval_seconds,
+                )
+            )
+            scheduler.start()
+            stack.push_async_callback(scheduler.stop)
+        yield
 
 
 app = FastAPI(title='FinAdv', description='Income & Debt tracking', lifespan=lifespan)
 
+app.add_middleware(compression.CompressionMiddleware)
+app.add_middleware(metrics.TimingMiddleware)
 app.mount('/static', StaticFiles(directory=str(STATIC_DIR)), name='static')
-
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+app.mount(
+    '/assets',
+    PrecompressedStaticFiles(directory=str(ASSETS_DIR), check_dir=False),
+    name='assets',
+)
+app.include_router(auth_router)
+app.include_router(imports_router)
+app.include_router(exports_router)
+app.include_router(search_router)
 
 
 @app.exception_handler(StarletteHTTPException)
@@ -77,18 +140,32 @@ async def unhandled_exception_handler(request: Request, exc: Exception) -> HTMLR
     )
 
 
-@app.get('/', response_class=HTMLResponse)
-async def home(request: Request) -> HTMLResponse:
+# current_session puts the user in the cache key, should the page show their data.
+@app.get('/', response_class=HTMLResponse, dependencies=[Depends(current_session)])
+@cache.cached_page()
+async def home(request: Request) -> Response:
     return templates.TemplateResponse(
         request=request, name='index.html', context={'active_page': 'overview'}
     )
 
 
+@app.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    body = metrics.render_prometheus()
+    return PlainTextResponse(body, media_type='text/plain; version=0.0.4')
+
+
+@app.get('/metrics/pools', include_in_schema=False)
+async def pool_metrics() -> dict[str, dict[str, float]]:
+    return metrics.pool_snapshot()
+
+
 @app.post('/theme/toggle')
 async def toggle_theme(request: Request) -> Response:
     current = request.cookies.get('theme', 'light')
     next_theme = 'dark' if current == 'light' else 'light'
     response = Response(status_code=204)
     response.set_cookie('theme', next_theme, max_age=60 * 60 * 24 * 365, samesite='lax')
-    response.headers['HX-Refresh'] = 'true'
+    # layout.html flips the dark class on <html> when this event fires; no reload.
+    response.headers['HX-Trigger'] = f'{{"theme-changed": "{next_theme}"}}'
     return response
@@ -0,0 +1,256 @@
+"""
+Analytics: monthly trends and category breakdowns as integer-cent arrays.
+
+load() reads totals already summed to integer cents per month and category:
+from MonthlyRollup for the whole household, or with one GROUP BY per user-scoped
+rollup source for a single user, so only grouped rows cross into Python. They
+are packed into array("q") columns, one per kind and category, aligned on the
+months of the range. The derived series (rolling averages, cumulative balances,
+category shares) are computed over those arrays with C-level passes (accumulate,
+map, sum); no ORM object is ever built.
+
+breakdown() caches results per (user_id, first month, last month). Each entry
+remembers the src.ext.cache versions of the tables it read; every committed
+write bumps them, which makes the entry stale. Like cached pages, it refreshes
+those versions from the shared cache_stamp table first, so a write made by
+another worker is seen within response_cache_stamp_seconds.
+"""
+
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from itertools import accumulate, starmap
+from operator import neg, sub
+from typing import Any
+
+from sqlalchemy import Integer, cast, func, literal
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import cache
+from src.resources._base.models import BaseTable, MonthlyRollup
+from src.resources._base.rollup import rollup_models
+
+# Kinds that add to the balance; every other kind is money going out.
+INCOME_KINDS = frozenset({"income"})
+CACHE_MAX_ENTRIES = 128
+
+type Key = tuple[str | None, str, str]
+
+
+@dataclass(frozen=True)
+class Breakdown:
+    """Cents per month for one range, by kind and category ("" = uncategorized).
+
+    Every array in by_category has one slot per entry of months. Instances are
+    shared through the cache: treat them as read-only.
+    """
+
+    months: tuple[str, ...]
+    by_category: dict[str, dict[str, array[int]]]
+
+    def totals(self, kind: str) -> array[int]:
+        """Cents per month for kind, all categories together."""
+        columns = self.by_category.get(kind)
+        if not columns:
+            return _zeros(len(self.months))
+        return array("q", map(sum, zip(*columns.values(), strict=True)))
+
+    def category_totals(self, kind: str) -> dict[str, int]:
+        """Cents per category for kind over the whole range."""
+        columns = self.by_category.get(kind, {})
+        return {name: sum(column) for name, column in columns.items()}
+
+    def net(self) -> array[int]:
+        """Income minus every other kind, per month (cumulative() gives the balance)."""
+        signed = [
+            self.totals(kind) if kind in INCOME_KINDS else map(neg, self.totals(kind))
+            for kind in self.by_category
+        ]
+        if not signed:
+            return _zeros(len(self.months))
+        return array("q", map(sum, zip(*signed, strict=True)))
+
+
+def _zeros(size: int) -> array[int]:
+    return array("q", [0]) * size
+
+
+def month_labels(start: date, end: date) -> tuple[str, ...]:
+    """ "YYYY-MM" for every month from start's to end's, inclusive."""
+    first = start.year * 12 + start.month - 1
+    last = end.year * 12 + end.month - 1
+    if last < first:
+        raise ValueError(f"end {end} is before start {start}")
+    return tuple(f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(first, last + 1))
+
+
+def rolling_average(values: Sequence[int], window: int) -> list[float]:
+    """Mean of the last window values at each position (fewer at the start)."""
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    prefix = list(accumulate(values, initial=0))
+    head = [prefix[i] / i for i in range(1, min(window, len(values)) + 1)]
+    pairs = zip(prefix[window + 1 :], prefix[1:-window], strict=True)
+    full = starmap(sub, pairs)
+    return head + [total / window for total in full]
+
+
+def cumulative(values: Sequence[int], opening: int = 0) -> array[int]:
+    """Running total of values, starting from opening."""
+    return array("q", accumulate(values, initial=opening))[1:]
+
+
+def shares(totals: dict[str, int]) -> list[tuple[str, float]]:
+    """(name, fraction of the sum) for each entry, largest first."""
+    grand = sum(totals.values())
+    if not grand:
+        return []
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [(name, cents / grand) for name, cents in ranked if cents]
+
+
+def _month_after(day: date) -> date:
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def _grouped(
+    model: type[BaseTable], first: date, stop: date, user_id: str | None
+) -> Any:
+    spec = model.__rollup__
+    assert spec is not None
+    table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    day = table.c[spec.date_field]
+    category = (
+        func.coalesce(table.c[spec.category_field], "")
+        if spec.category_field is not None
+        else literal("")
+    )
+    month = func.strftime("%Y-%m", day)
+    cents = func.sum(cast(func.round(table.c[spec.amount_field] * 100), Integer))
+    statement = (
+        select(month, category, cents)
+        .where(day >= first, day < stop)
+        .group_by(month, category)
+    )
+    if user_id is not None:
+        statement = statement.where(table.c.user_id == user_id)
+    return statement
+
+
+def _scoped_sources() -> list[type[BaseTable]]:
+    # Per-user reads only cover tables that have an owner column.
+    return [
+        model
+        for model in rollup_models()
+        if "user_id" in model.__table__.c  # type: ignore[attr-defined]
+    ]
+
+
+async def _grouped_rows(
+    session: AsyncSession, start: date, end: date, user_id: str | None
+) -> list[tuple[str, str, str, int]]:
+    """(month, category, kind, cents) rows, from MonthlyRollup or the user's rows."""
+    if user_id is None:
+        statement = select(
+            col(MonthlyRollup.month),
+            col(MonthlyRollup.category_id),
+            col(MonthlyRollup.kind),
+            col(MonthlyRollup.total_cents),
+        ).where(
+            col(MonthlyRollup.month) >= f"{start.year:04d}-{start.month:02d}",
+            col(MonthlyRollup.month) <= f"{end.year:04d}-{end.month:02d}",
+        )
+        result = await session.exec(statement)
+        return list(result.all())
+    first = date(start.year, start.month, 1)
+    stop = _month_after(end)
+    rows: list[tuple[str, str, str, int]] = []
+    for model in _scoped_sources():
+        kind = model.__rollup__.kind  # type: ignore[union-attr]
+        statement = _grouped(model, first, stop, user_id)
+        result = await session.exec(statement)  # type: ignore[call-overload]
+        rows.extend((month, category, kind, cents) for month, category, cents in result)
+    return rows
+
+
+async def load(
+    session: AsyncSession, start: date, end: date, user_id: str | None = None
+) -> Breakdown:
+    """Cents per month and category for every kind, from start's month to end's.
+
+    Without user_id the totals come straight from MonthlyRollup (a range read on
+    its primary key). With user_id, that user's rows of every user-scoped rollup
+    source are grouped in SQLite, one GROUP BY per table.
+    """
+    months = month_labels(start, end)
+    slot = {month: i for i, month in enumerate(months)}
+    by_category: dict[str, dict[str, array[int]]] = {}
+    rows = await _grouped_rows(session, start, end, user_id)
+    for month, category, kind, cents in rows:
+        columns = by_category.setdefault(kind, {})
+        column = columns.get(category)
+        if column is None:
+            column = columns[category] = _zeros(len(months))
+        column[slot[month]] += cents
+    return Breakdown(months=months, by_category=by_category)
+
+
+_entries: OrderedDict[Key, tuple[tuple[int, ...], Breakdown]] = OrderedDict()
+stats = {"hits": 0, "misses": 0}
+
+
+def _tables(user_id: str | None) -> tuple[str, ...]:
+    if user_id is None:
+        return (MonthlyRollup.__table__.name,)  # type: ignore[attr-defined]
+    models = _scoped_sources()
+    return tuple(model.__table__.name for model in models)  # type: ignore[attr-defined]
+
+
+async def breakdown(
+    session: AsyncSession, start: date, end: date, user_id: str | None = None
+) -> Breakdown:
+    """load(), cached per (user_id, range) until a source table is written."""
+    months = month_labels(start, end)
+    key: Key = (user_id, months[0], months[-1])
+    # Read versions before loading, so a write racing the load leaves it stale.
+    await cache.refresh()
+    current = cache.versions(_tables(user_id))
+    entry = _entries.get(key)
+    if entry is not None and entry[0] == current:
+        _entries.move_to_end(key)
+        stats["hits"] += 1
+        return entry[1]
+    stats["misses"] += 1
+    result = await load(session, start, end, user_id)
+    _entries[key] = (current, result)
+    _entries.move_to_end(key)
+    while len(_entries) > CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+    return result
+
+
+def clear() -> None:
+    """Drop every cached breakdown and reset counters."""
+    _entries.clear()
+    for name in stats:
+        stats[name] = 0
+
+
+__all__ = [
+    "CACHE_MAX_ENTRIES",
+    "INCOME_KINDS",
+    "Breakdown",
+    "breakdown",
+    "clear",
+    "cumulative",
+    "load",
+    "month_labels",
+    "rolling_average",
+    "shares",
+    "stats",
+]
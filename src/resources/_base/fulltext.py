@@ -0,0 +1,176 @@
+"""
+Full-text search: an SQLite FTS5 index per table that sets __search__.
+
+The index `<table>_fts` is external-content: it stores only the tokens and reads
+the text back from the table by rowid, so the descriptions are not kept twice.
+Triggers created with it keep it in sync with every insert, delete and update of
+an indexed column, whichever code path writes. A migration creates both with
+create_statements(); tests run index_statements() after create_all. Prefix
+indexes on 2 and 3 characters keep search-as-you-type queries off a full scan
+of the term list.
+
+A table with a TEXT primary key keeps an implicit rowid that VACUUM or a
+backfill.rebuild_table() swap may renumber; run rebuild_statement() after
+either, or the index points at the wrong rows.
+
+match_query() turns what the user typed into an FTS5 query (every word must
+occur, each as a prefix, so results narrow as they type); ranked() selects the
+matching rows by bm25 with a highlighted snippet, for the base repository's
+search() to page through.
+"""
+
+import re
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+from markupsafe import Markup, escape
+from sqlalchemy import Select, func, literal_column, select
+from sqlalchemy import column as sql_column
+from sqlalchemy import table as sql_table
+
+from src.resources._base.models import BaseTable
+
+SUFFIX = "_fts"
+SNIPPET_TOKENS = 12
+# Snippet markers: control characters cannot occur in the indexed text, so the
+# text around them can be escaped before they become <mark> tags.
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+_WORD = re.compile(r"\w+")
+_SHADOW = re.compile(rf".+{SUFFIX}(_(data|idx|docsize|config|content))?")
+
+
+class SearchHit[M: BaseTable](NamedTuple):
+    """One search result: the row, its highlighted snippet, and its cursor."""
+
+    entity: M
+    snippet: Markup
+    cursor: str
+
+
+def index_name(table: str) -> str:
+    return f"{table}{SUFFIX}"
+
+
+def is_index_table(name: str) -> bool:
+    """True for an FTS5 index or one of its shadow tables (not in the models)."""
+    return _SHADOW.fullmatch(name) is not None
+
+
+def create_statements(table: str, fields: Sequence[str]) -> list[str]:
+    """SQL creating table's index on fields, its sync triggers, and its content."""
+    index = index_name(table)
+    names = ", ".join(f'"{name}"' for name in fields)
+    new = ", ".join(f'new."{name}"' for name in fields)
+    old = ", ".join(f'old."{name}"' for name in fields)
+    insert = f'INSERT INTO "{index}"(rowid, {names}) VALUES (new.rowid, {new})'
+    remove = (
+        f'INSERT INTO "{index}"("{index}", rowid, {names})'
+        f" VALUES ('delete', old.rowid, {old})"
+    )
+    return [
+        f'CREATE VIRTUAL TABLE "{index}" USING fts5({names},'
+        f" content='{table}', content_rowid='rowid',"
+        " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f'CREATE TRIGGER "{index}_ai" AFTER INSERT ON "{table}" BEGIN {insert}; END',
+        f'CREATE TRIGGER "{index}_ad" AFTER DELETE ON "{table}" BEGIN {remove}; END',
+        f'CREATE TRIGGER "{index}_au" AFTER UPDATE OF {names} ON "{table}"'
+        f" BEGIN {remove}; {insert}; END",
+        rebuild_statement(table),
+    ]
+
+
+def drop_statements(table: str) -> list[str]:
+    """SQL dropping table's index and triggers."""
+    index = index_name(table)
+    return [
+        *(f'DROP TRIGGER IF EXISTS "{index}_{op}"' for op in ("ai", "ad", "au")),
+        f'DROP TABLE IF EXISTS "{index}"',
+    ]
+
+
+def rebuild_statement(table: str) -> str:
+    """SQL re-reading every row of table into its index."""
+    index = index_name(table)
+    return f"INSERT INTO \"{index}\"(\"{index}\") VALUES ('rebuild')"
+
+
+def index_statements(model: type[BaseTable]) -> list[str]:
+    """create_statements() for model's __search__ fields."""
+    spec = model.__search__
+    if spec is None:
+        raise ValueError(f"{model.__name__} has no __search__")
+    return create_statements(_table_name(model), spec.fields)
+
+
+def match_query(text: str) -> str | None:
+    """An FTS5 query requiring every word of text as a prefix; None if no words."""
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def ranked(model: type[BaseTable], query: str) -> Select[Any]:
+    """Rows of model matching query, with rank, rowid and snippet columns.
+
+    Lower rank is a better match (bm25); order by (rank, rowid) to page.
+    """
+    if model.__search__ is None:
+        raise ValueError(f"{model.__name__} has no __search__")
+    name = _table_name(model)
+    index = index_name(name)
+    fts = sql_table(index, sql_column("rowid"), sql_column("rank"))
+    match_target = literal_column(f'"{index}"')
+    hits = (
+        select(
+            fts.c.rowid.label("hit_rowid"),
+            fts.c.rank.label("rank"),
+            func.snippet(
+                match_target, -1, _MARK_START, _MARK_END, "…", SNIPPET_TOKENS
+            ).label("snippet"),
+        )
+        .where(match_target.op("MATCH")(query))
+        .subquery("hits")
+    )
+    rowid = literal_column(f'"{name}".rowid')
+    return select(model, hits.c.rank, hits.c.hit_rowid, hits.c.snippet).join(
+        hits, hits.c.hit_rowid == rowid
+    )
+
+
+def highlight(snippet: str) -> Markup:
+    """snippet with its text escaped and the matched terms in <mark> tags."""
+    escaped = str(escape(snippet))
+    return Markup(escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>"))
+
+
+def encode_cursor(rank: float, rowid: int) -> str:
+    return f"{rank!r}:{rowid}"
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    """The (rank, rowid) of a cursor; ValueError if it was not made here."""
+    rank, _, rowid = cursor.partition(":")
+    return float(rank), int(rowid)
+
+
+def _table_name(model: type[BaseTable]) -> str:
+    return model.__table__.name  # type: ignore[attr-defined]
+
+
+__all__ = [
+    "SUFFIX",
+    "SearchHit",
+    "create_statements",
+    "decode_cursor",
+    "drop_statements",
+    "encode_cursor",
+    "highlight",
+    "index_name",
+    "index_statements",
+    "is_index_table",
+    "match_query",
+    "ranked",
+    "rebuild_statement",
+]
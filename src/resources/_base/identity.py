@@ -0,0 +1,216 @@
+"""
+Identity cache: get_by_id for small, hot tables without a database round trip.
+
+A model opts in with `__identity_cache__ = IdentityCacheSpec(ttl, max_entries)`.
+The base repository evicts rows it updates or deletes and moves the table's stamp
+so other workers drop theirs; writes that bypass it must call invalidate(model).
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.settings import get_settings
+from src.resources._base.models import BaseTable, CacheStamp
+
+Values = dict[str, Any]
+
+
+class _Entry(NamedTuple):
+    values: Values
+    expires_at: float
+
+
+@dataclass
+class _TableCache:
+    entries: OrderedDict[str, _Entry] = field(default_factory=OrderedDict)
+    # Incremented whenever entries are dropped, so a load that started before
+    # does not store a row read before the write.
+    generation: int = 0
+    stamp: int | None = None
+    checked_at: float = float("-inf")
+    inflight: dict[str, asyncio.Future[Values | None]] = field(default_factory=dict)
+
+
+_tables: dict[str, _TableCache] = {}
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "expired": 0,
+    "coalesced": 0,
+    "evictions": 0,
+    "invalidations": 0,
+    "stamp_checks": 0,
+}
+
+
+def _name(model: type[BaseTable]) -> str:
+    return model.__table__.name  # type: ignore[attr-defined]
+
+
+def _cache(model: type[BaseTable]) -> _TableCache:
+    name = _name(model)
+    cache = _tables.get(name)
+    if cache is None:
+        cache = _tables[name] = _TableCache()
+    return cache
+
+
+def stamp_key(model: type[BaseTable]) -> str | None:
+    """model's identity row in cache_stamp, or None if it is not cached."""
+    if model.__identity_cache__ is None:
+        return None
+    return f"{_name(model)}:identity"
+
+
+def _drop(cache: _TableCache) -> None:
+    if cache.entries:
+        stats["invalidations"] += len(cache.entries)
+        cache.entries.clear()
+    cache.generation += 1
+
+
+async def get[M: BaseTable](session: AsyncSession, model: type[M], id: str) -> M | None:
+    """The entity with the given id, or None, read through model's cache."""
+    spec = model.__identity_cache__
+    if spec is None:
+        return await session.get(model, id)
+    held = session.sync_session.identity_map.get(identity_key(model, id))
+    if held is not None:
+        return held  # type: ignore[return-value]
+    cache = _cache(model)
+    await _check_stamp(session, model, cache)
+    entry = cache.entries.get(id)
+    if entry is not None:
+        if entry.expires_at > time.monotonic():
+            cache.entries.move_to_end(id)
+            stats["hits"] += 1
+            return _attach(session, model, entry.values)
+        del cache.entries[id]
+        stats["expired"] += 1
+    stats["misses"] += 1
+    values = await _load(session, model, id, cache)
+    return None if values is None else _attach(session, model, values)
+
+
+async def _check_stamp(
+    session: AsyncSession, model: type[BaseTable], cache: _TableCache
+) -> None:
+    now = time.monotonic()
+    if now - cache.checked_at < get_settings().identity_cache_stamp_seconds:
+        return
+    cache.checked_at = now
+    stats["stamp_checks"] += 1
+    statement = select(CacheStamp.version).where(
+        col(CacheStamp.table_name) == stamp_key(model)
+    )
+    stamp = (await session.exec(statement)).first() or 0
+    if stamp != cache.stamp:
+        _drop(cache)
+        cache.stamp = stamp
+
+
+async def _fetch(
+    session: AsyncSession, model: type[BaseTable], id: str
+) -> Values | None:
+    table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    statement = select(*table.c).where(table.c.id == id)
+    row = (await session.exec(statement)).mappings().first()
+    return None if row is None else dict(row)
+
+
+async def _load(
+    session: AsyncSession, model: type[BaseTable], id: str, cache: _TableCache
+) -> Values | None:
+    pending = cache.inflight.get(id)
+    if pending is not None:
+        stats["coalesced"] += 1
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                raise
+            # The first caller failed or was cancelled: query for ourselves.
+            return await _fetch(session, model, id)
+    future: asyncio.Future[Values | None] = asyncio.get_running_loop().create_future()
+    cache.inflight[id] = future
+    generation = cache.generation
+    try:
+        values = await _fetch(session, model, id)
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        del cache.inflight[id]
+    future.set_result(values)
+    if values is not None and generation == cache.generation:
+        _put(model, cache, id, values)
+    return values
+
+
+def _put(model: type[BaseTable], cache: _TableCache, id: str, values: Values) -> None:
+    spec = model.__identity_cache__
+    assert spec is not None
+    cache.entries[id] = _Entry(values, time.monotonic() + spec.ttl)
+    cache.entries.move_to_end(id)
+    while len(cache.entries) > spec.max_entries:
+        cache.entries.popitem(last=False)
+        stats["evictions"] += 1
+
+
+def _attach[M: BaseTable](session: AsyncSession, model: type[M], values: Values) -> M:
+    # A detached instance with the row's identity and no pending changes; adding
+    # it makes it persistent in this session without any SQL.
+    entity = model(**values)
+    make_transient_to_detached(entity)
+    session.add(entity)
+    return entity
+
+
+def evict(
+    model: type[BaseTable], new_stamp: int | None, ids: Sequence[str] | None
+) -> None:
+    """After a committed write: drop ids (None: every entry) of model's cache.
+
+    new_stamp is what stamps.stamp() returned for stamp_key(model); if it is not the
+    next value after the one the entries were read at, another worker wrote too
+    and all are dropped.
+    """
+    cache = _tables.get(_name(model))
+    if new_stamp is None or cache is None:
+        return
+    if ids is None or cache.stamp is None or new_stamp != cache.stamp + 1:
+        _drop(cache)
+    else:
+        for id in ids:
+            if cache.entries.pop(id, None) is not None:
+                stats["invalidations"] += 1
+        cache.generation += 1
+    cache.stamp = new_stamp
+
+
+def invalidate(model: type[BaseTable]) -> None:
+    """Drop model's cached rows and re-read its stamp on the next get."""
+    cache = _tables.get(_name(model))
+    if cache is not None:
+        _drop(cache)
+        cache.checked_at = float("-inf")
+
+
+def clear() -> None:
+    """Drop every cached row and reset counters (tests and admin use)."""
+    _tables.clear()
+    for name in stats:
+        stats[name] = 0
+
+
+__all__ = ["clear", "evict", "get", "invalidate", "stamp_key", "stats"]
@@ -0,0 +1,160 @@
+"""
+ULID generation and the compact binary primary key type.
+
+new_ulid() is monotonic within a process: ids made in the same millisecond
+increment the random part instead of drawing a new one, so they sort in creation
+order. ulid_batch(n) reserves n consecutive ids with one clock read, for bulk
+inserts.
+
+ULIDBinary stores ids as 16-byte BLOBs (instead of 26-char TEXT) while Python and
+the API still see the Crockford string. Byte order equals string order, so keyset
+pagination by id keeps working. Tables opt in through BinaryIdTable; existing
+tables are converted in a migration with migrate_to_binary().
+"""
+
+import os
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Connection, LargeBinary, bindparam, text
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import TypeDecorator
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+# Two symbols (10 bits) per lookup: 13 lookups encode the 130-bit padded value.
+_PAIRS = tuple(a + b for a in CROCKFORD for b in CROCKFORD)
+_SHIFTS = tuple(range(120, -1, -10))
+# Crockford symbols to int(..., 32) digits; lowercase and I/L/O aliases accepted.
+_TO_BASE32 = str.maketrans(
+    CROCKFORD + CROCKFORD.lower() + "ILOilo",
+    "0123456789abcdefghijklmnopqrstuv" * 2 + "110110",
+)
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_random = 0
+
+
+def encode(value: int) -> str:
+    """128-bit integer to its 26-character Crockford string."""
+    return "".join([_PAIRS[(value >> shift) & 1023] for shift in _SHIFTS])
+
+
+def decode(value: str) -> int:
+    """Crockford string to its 128-bit integer. ValueError if it is not a ULID."""
+    if len(value) != 26:
+        raise ValueError(f"ULID must be 26 characters: {value!r}")
+    number = int(value.translate(_TO_BASE32), 32)
+    if number >> 128:
+        raise ValueError(f"ULID out of range: {value!r}")
+    return number
+
+
+def to_bytes(value: str) -> bytes:
+    """Crockford string to the 16-byte big-endian form stored by ULIDBinary."""
+    return decode(value).to_bytes(16)
+
+
+def from_bytes(value: bytes) -> str:
+    """16-byte big-endian ULID to its Crockford string."""
+    return encode(int.from_bytes(value))
+
+
+def _reserve(count: int) -> tuple[int, int]:
+    # Returns (ms, first random part) for count consecutive ids.
+    global _last_ms, _last_random
+    now = time.time_ns() // 1_000_000
+    with _lock:
+        if now > _last_ms:
+            ms = now
+            # Top bit clear: room to keep counting within the millisecond.
+            first = int.from_bytes(os.urandom(10)) >> 1
+        else:
+            # Same millisecond (or the clock went back): continue the sequence.
+            ms = _last_ms
+            first = _last_random + 1
+        if first + count - 1 > _RANDOM_MAX:
+            ms += 1
+            first = int.from_bytes(os.urandom(10)) >> 1
+        _last_ms = ms
+        _last_random = first + count - 1
+    return ms, first
+
+
+def new_ulid() -> str:
+    """A new ULID string, greater than every id this process generated before."""
+    ms, random_part = _reserve(1)
+    return encode(ms << _RANDOM_BITS | random_part)
+
+
+def ulid_batch(count: int) -> list[str]:
+    """count new ULIDs, consecutive and increasing, from a single reservation."""
+    if count <= 0:
+        return []
+    ms, first = _reserve(count)
+    base = ms << _RANDOM_BITS | first
+    return [encode(base + i) for i in range(count)]
+
+
+class ULIDBinary(TypeDecorator[str]):
+    """ULID stored as a 16-byte BLOB, exposed to Python as the Crockford string."""
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect: Dialect) -> Any:
+        return None if value is None else to_bytes(value)
+
+    def process_result_value(self, value: Any, dialect: Dialect) -> str | None:
+        return None if value is None else from_bytes(value)
+
+
+def migrate_to_binary(
+    connection: Connection,
+    table: str,
+    columns: tuple[str, ...] = ("id",),
+    chunk_size: int = 5000,
+) -> int:
+    """Rewrite TEXT ULIDs in table.columns as 16-byte BLOBs. Returns rows changed.
+
+    For use inside an Alembic migration (op.get_bind()). SQLite keeps BLOBs in
+    VARCHAR columns as-is, so the values can be converted in place; afterwards
+    declare the model with ULIDBinary (BinaryIdTable for id) so reads decode them.
+    Foreign-key columns pointing at a converted id must be converted in the same
+    migration. Rows already converted are skipped, so a failed run can be resumed.
+    """
+    changed = 0
+    for column in columns:
+        select = text(
+            f'SELECT rowid, "{column}" FROM "{table}" '
+            f'WHERE typeof("{column}") = \'text\' AND rowid > :after '
+            f"ORDER BY rowid LIMIT :limit"
+        )
+        update = text(
+            f'UPDATE "{table}" SET "{column}" = :value WHERE rowid = :row'
+        ).bindparams(bindparam("value", type_=LargeBinary))
+        after = 0
+        while rows := connection.execute(
+            select, {"after": after, "limit": chunk_size}
+        ).all():
+            connection.execute(
+                update, [{"value": to_bytes(v), "row": rowid} for rowid, v in rows]
+            )
+            after = rows[-1][0]
+            changed += len(rows)
+    return changed
+
+
+__all__ = [
+    "ULIDBinary",
+    "decode",
+    "encode",
+    "from_bytes",
+    "migrate_to_binary",
+    "new_ulid",
+    "to_bytes",
+    "ulid_batch",
+]
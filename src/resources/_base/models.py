@@ -3,30 +3,169 @@ Base table model: shared fields for all domain tables.
 
 Inherit from BaseTable (without table=True on the base) and set table=True
 on your resource model so it gets id, created_at, updated_at.
+
+Large tables can inherit from BinaryIdTable instead: same fields, but id is stored
+as a 16-byte BLOB (see src.resources._base.ids).
+
+Composite indexes are declared as column-name tuples in `__indexes__`, e.g.
+`__indexes__ = (("user_id", "date"),)`, and are inherited: each becomes an Index
+named ix_<table>_<columns>. Per-user tables inherit from UserScopedTable, which
+adds user_id and an index on (user_id, id) for the scoped repository.
+
+Tables that feed the monthly dashboards set `__rollup__ = RollupSpec(...)`; the
+base repository then keeps MonthlyRollup in sync on every write.
+
+Small tables read by id on most requests set `__identity_cache__ =
+IdentityCacheSpec(...)`; the base repository's get_by_id then serves them from an
+in-process cache (see src.resources._base.identity).
+
+Tables whose text users look things up in set `__search__ = SearchSpec(...)`;
+a migration then creates their FTS5 index (see src.resources._base.fulltext)
+and the base repository's search() queries it.
 """
 
+from dataclasses import dataclass
 from datetime import UTC, datetime
+from typing import Any, ClassVar
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
-from ulid import ULID
+
+from src.resources._base.ids import ULIDBinary, new_ulid
 
 
 def _ulid_default() -> str:
-    return str(ULID())
+    return new_ulid()
 
 
 def _utc_now() -> datetime:
     return datetime.now(UTC)
 
 
+@dataclass(frozen=True)
+class RollupSpec:
+    """Which columns of a table feed MonthlyRollup, and under which kind."""
+
+    kind: str
+    amount_field: str = "amount"
+    date_field: str = "date"
+    category_field: str | None = None
+
+
+@dataclass(frozen=True)
+class DueSpec:
+    """Which columns of a table hold a payable item's due date and paid flag."""
+
+    due_field: str = "due_date"
+    paid_field: str = "paid"
+    amount_field: str = "amount"
+    description_field: str = "description"
+
+
+@dataclass(frozen=True)
+class IdentityCacheSpec:
+    """How long and how many rows of a table get_by_id keeps in process."""
+
+    ttl: float = 60.0
+    max_entries: int = 1024
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    """Which text columns of a table its full-text index covers."""
+
+    fields: tuple[str, ...] = ("description",)
+
+
 class BaseTable(SQLModel):
     """Mixin: id (ULID), created_at, updated_at. Abstract so no table is created."""
 
     __abstract__ = True
+    __rollup__: ClassVar[RollupSpec | None] = None
+    __due__: ClassVar[DueSpec | None] = None
+    __identity_cache__: ClassVar[IdentityCacheSpec | None] = None
+    __search__: ClassVar[SearchSpec | None] = None
+    __indexes__: ClassVar[tuple[tuple[str, ...], ...]] = ()
 
     id: str = Field(primary_key=True, default_factory=_ulid_default)
     created_at: datetime = Field(default_factory=_utc_now)
     updated_at: datetime = Field(default_factory=_utc_now)
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get("__abstract__"):
+            return
+        # Runs before SQLAlchemy maps the class, so __table_args__ is still read.
+        columns: list[tuple[str, ...]] = []
+        for klass in reversed(cls.__mro__):
+            for names in klass.__dict__.get("__indexes__", ()):
+                if names not in columns:
+                    columns.append(names)
+        if not columns:
+            return
+        table = cls.__dict__.get("__tablename__", cls.__name__.lower())
+        indexes = [Index(f"ix_{table}_{'_'.join(c)}", *c) for c in columns]
+        args = cls.__dict__.get("__table_args__", ())
+        if args and isinstance(args[-1], dict):
+            cls.__table_args__ = (*args[:-1], *indexes, args[-1])
+        else:
+            cls.__table_args__ = (*args, *indexes)
+
+
+class BinaryIdTable(BaseTable):
+    """BaseTable whose id is stored as a 16-byte BLOB; still a ULID string in Python."""
+
+    __abstract__ = True
+
+    id: str = Field(primary_key=True, default_factory=_ulid_default, sa_type=ULIDBinary)
+
+
+class UserScopedTable(BaseTable):
+    """BaseTable owned by one user; read and write it through _base.scoped."""
+
+    __abstract__ = True
+    __indexes__ = (("user_id", "id"),)
+
+    user_id: str = Field(max_length=26)
+
+
+class MonthlyRollup(SQLModel, table=True):
+    """Precomputed totals per month x category x kind (e.g. "income", "debt").
+
+    category_id is "" for uncategorized rows so it can be part of the primary key.
+    Amounts are summed as integer cents.
+    """
+
+    __tablename__ = "monthly_rollup"  # pyright: ignore[reportAssignmentType]
+
+    month: str = Field(primary_key=True, max_length=7)
+    category_id: str = Field(primary_key=True, default="", max_length=26)
+    kind: str = Field(primary_key=True, max_length=16)
+    total_cents: int = 0
+    row_count: int = 0
+
+
+class CacheStamp(SQLModel, table=True):
+    """Write counter per identity-cached table, shared by every worker.
+
+    Writers increment it in the same transaction as their change; a worker that
+    sees another value than the one its cached rows were read at drops them.
+    """
+
+    __tablename__ = "cache_stamp"  # pyright: ignore[reportAssignmentType]
+
+    table_name: str = Field(primary_key=True, max_length=64)
+    version: int = 0
+
 
-__all__ = ["BaseTable"]
+__all__ = [
+    "BaseTable",
+    "BinaryIdTable",
+    "CacheStamp",
+    "DueSpec",
+    "IdentityCacheSpec",
+    "MonthlyRollup",
+    "RollupSpec",
+    "SearchSpec",
+    "UserScopedTable",
+]
@@ -1,41 +1,201 @@
 """
-Base repository helpers: get_by_id, list_all, add, update, delete_by_id.
+Base repository helpers: get_by_id, list_all, list_page, stream_all, stream_rows,
+search, add, update, delete_by_id, plus batch writes add_many, upsert_many,
+delete_many.
 
-Pure functions taking AsyncSession and model/entity; no class.
+Pure functions taking AsyncSession and model/entity; no class. Write helpers keep
+MonthlyRollup in sync (see rollup.py) within the same commit, move the shared
+write stamp of every table they change in that commit too (stamps.py), and bump
+the response cache version of those tables once the commit succeeds. get_by_id
+reads models with __identity_cache__ through identity.py, which the write
+helpers keep current the same way.
+
+While a write queue is installed (src.ext.writer), add, update and delete_by_id
+hand the write to it instead of committing on the caller's session: the queue
+group-commits it with other requests' writes, and the entity is then attached
+to the caller's session as if it had been loaded.
 """
 
-from sqlmodel import select
+from collections.abc import AsyncGenerator, Sequence
+from typing import Any
+
+from sqlalchemy import ColumnElement, Row, Table, inspect, tuple_
+from sqlalchemy import update as sql_update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import make_transient, make_transient_to_detached, object_session
+from sqlmodel import col, delete, insert, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.resources._base.models import BaseTable
+from src.ext import cache, writer
+from src.resources._base import fulltext, identity, rollup, stamps
+from src.resources._base.models import BaseTable, MonthlyRollup
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_STREAM_BATCH_SIZE = 500
+# Values per `IN (...)` clause; stays well under SQLite's bound-parameter limit.
+IN_CHUNK_SIZE = 500
 
 
 async def get_by_id[M: BaseTable](
     session: AsyncSession, model: type[M], id: str
 ) -> M | None:
     """Return the entity with the given id, or None."""
-    return await session.get(model, id)
+    return await identity.get(session, model, id)
 
 
-async def list_all[M: BaseTable](session: AsyncSession, model: type[M]) -> list[M]:
-    """Return all rows for the model, no ordering."""
-    statement = select(model)
+async def list_all[M: BaseTable](
+    session: AsyncSession,
+    model: type[M],
+    where: Sequence[ColumnElement[Any]] = (),
+) -> list[M]:
+    """Return all rows for the model ordered by id (creation order).
+
+    Loads every row into memory; use list_page or stream_all for large tables.
+    where adds filter clauses (the scoped repository passes user_id here).
+    """
+    statement = select(model).where(*where).order_by(col(model.id))
     result = await session.exec(statement)
     return list(result.all())
 
 
+async def list_page[M: BaseTable](
+    session: AsyncSession,
+    model: type[M],
+    after: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    where: Sequence[ColumnElement[Any]] = (),
+) -> tuple[list[M], str | None]:
+    """Return one keyset page of rows ordered by id, plus the cursor for the next page.
+
+    ULIDs sort by creation time, so `id > after` walks the table in insertion order
+    using the primary key index, at the same cost for every page. The cursor is the
+    last id of the page, or None when there are no more rows.
+    """
+    statement = select(model).where(*where).order_by(col(model.id)).limit(limit + 1)
+    if after is not None:
+        statement = statement.where(col(model.id) > after)
+    result = await session.exec(statement)
+    rows = list(result.all())
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    next_cursor = page[-1].id
+    return page, next_cursor
+
+
+async def stream_all[M: BaseTable](
+    session: AsyncSession,
+    model: type[M],
+    batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+    where: Sequence[ColumnElement[Any]] = (),
+) -> AsyncGenerator[list[M]]:
+    """Yield all rows ordered by id in batches of at most batch_size.
+
+    Rows are fetched through a streaming cursor, so memory stays bounded by one batch
+    regardless of table size. Intended for exports and background jobs.
+    """
+    statement = (
+        select(model)
+        .where(*where)
+        .order_by(col(model.id))
+        .execution_options(yield_per=batch_size)
+    )
+    result = await session.stream_scalars(statement)
+    async for partition in result.partitions(batch_size):
+        yield list(partition)
+
+
+async def stream_rows(
+    session: AsyncSession,
+    model: type[BaseTable],
+    batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+    where: Sequence[ColumnElement[Any]] = (),
+) -> AsyncGenerator[Sequence[Row[Any]]]:
+    """Like stream_all, but yield plain column tuples in table column order.
+
+    Skips building ORM objects, so bulk readers (exports) pay only for the values.
+    """
+    table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    statement = (
+        select(*table.c)
+        .where(*where)
+        .order_by(table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await session.stream(statement)
+    async for partition in result.partitions(batch_size):
+        yield partition
+
+
+async def search[M: BaseTable](
+    session: AsyncSession,
+    model: type[M],
+    text: str,
+    after: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    where: Sequence[ColumnElement[Any]] = (),
+) -> tuple[list[fulltext.SearchHit[M]], str | None]:
+    """Return one page of rows whose __search__ fields match text, best first.
+
+    Uses the table's FTS5 index (see fulltext.py): every word of text must occur
+    as a prefix. Hits are ordered by bm25 rank, ties by rowid, and the cursor is
+    the last hit's (rank, rowid), so each page is one indexed query whatever its
+    depth. Raises ValueError for a cursor this function did not return.
+    """
+    query = fulltext.match_query(text)
+    if query is None:
+        return [], None
+    statement = fulltext.ranked(model, query).where(*where)
+    if after is not None:
+        rank, rowid = fulltext.decode_cursor(after)
+        columns = statement.selected_columns
+        statement = statement.where(
+            tuple_(columns.rank, columns.hit_rowid) > tuple_(rank, rowid)
+        )
+    statement = statement.order_by("rank", "hit_rowid").limit(limit + 1)
+    result = await session.exec(statement)  # pyright: ignore[reportCallIssue]
+    hits = [
+        fulltext.SearchHit(
+            entity,
+            fulltext.highlight(snippet),
+            fulltext.encode_cursor(rank, rowid),
+        )
+        for entity, rank, rowid, snippet in result.all()
+    ]
+    if len(hits) <= limit:
+        return hits, None
+    page = hits[:limit]
+    return page, page[-1].cursor
+
+
 async def add[M: BaseTable](session: AsyncSession, entity: M) -> M:
     """Persist entity, commit, refresh, return it."""
+    queue = writer.current()
+    if queue is not None:
+        return await _queued_add(session, queue, entity)
+    model = type(entity)
     session.add(entity)
+    await rollup.apply(session, model, added=_rows([entity]))
+    await _stamp(session, model, rows_changed=False)
     await session.commit()
+    _bump(model)
     await session.refresh(entity)
     return entity
 
 
 async def update[M: BaseTable](session: AsyncSession, entity: M) -> M:
     """Commit and refresh entity, return it."""
+    queue = writer.current()
+    if queue is not None:
+        return await _queued_update(session, queue, entity)
+    model = type(entity)
+    old = await rollup.stored_rows(session, model, ("id",), [(entity.id,)])
     session.add(entity)
+    await rollup.apply(session, model, added=_rows([entity]), removed=old)
+    stamp = await _stamp(session, model)
     await session.commit()
+    _bump(model)
+    identity.evict(model, stamp, [entity.id])
     await session.refresh(entity)
     return entity
 
@@ -44,12 +204,257 @@ async def delete_by_id[M: BaseTable](
     session: AsyncSession, model: type[M], id: str
 ) -> M | None:
     """Delete the entity with the given id. Return the deleted entity or None."""
+    queue = writer.current()
+    if queue is not None:
+        return await _queued_delete(session, queue, model, id)
     entity = await session.get(model, id)
     if entity is None:
         return None
     await session.delete(entity)
+    await rollup.apply(session, model, removed=_rows([entity]))
+    stamp = await _stamp(session, model)
     await session.commit()
+    _bump(model)
+    identity.evict(model, stamp, [id])
+    return entity
+
+
+async def add_many[M: BaseTable](
+    session: AsyncSession, entities: Sequence[M], refresh: bool = False
+) -> list[M]:
+    """Insert all entities with one executemany and a single commit.
+
+    Ids and timestamps come from the model defaults, so the returned entities are
+    complete without a refresh; pass refresh=True to reload them from the DB.
+    """
+    items = list(entities)
+    if not items:
+        return items
+    model = type(items[0])
+    rows = [entity.model_dump() for entity in items]
+    await session.exec(insert(model), params=rows)
+    await rollup.apply(session, model, added=_rows(items))
+    await _stamp(session, model, rows_changed=False)
+    await session.commit()
+    _bump(model)
+    if refresh:
+        items = await _reload(session, model, items, ("id",))
+    return items
+
+
+async def upsert_many[M: BaseTable](
+    session: AsyncSession,
+    entities: Sequence[M],
+    key: Sequence[str] = ("id",),
+    refresh: bool = False,
+) -> list[M]:
+    """Insert or update all entities in one transaction with INSERT ... ON CONFLICT.
+
+    key names the conflict target: the primary key by default, or the columns of a
+    unique natural-key index. On conflict every other column is overwritten except
+    id and created_at, which keep their stored values.
+    """
+    items = list(entities)
+    if not items:
+        return items
+    model = type(items[0])
+    rows = [entity.model_dump() for entity in items]
+    keys = [tuple(getattr(item, name) for name in key) for item in items]
+    old = await rollup.stored_rows(session, model, key, keys)
+    statement = sqlite_insert(model)
+    keep = {"id", "created_at", *key}
+    updates = {
+        name: statement.excluded[name] for name in rows[0] if name not in keep
+    }
+    if updates:
+        statement = statement.on_conflict_do_update(index_elements=key, set_=updates)
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=key)
+    await session.exec(statement, params=rows)
+    await rollup.apply(session, model, added=_rows(items), removed=old)
+    stamp = await _stamp(session, model)
+    await session.commit()
+    _bump(model)
+    identity.evict(model, stamp, None)
+    if refresh:
+        items = await _reload(session, model, items, key)
+    return items
+
+
+async def delete_many[M: BaseTable](
+    session: AsyncSession, model: type[M], ids: Sequence[str]
+) -> int:
+    """Delete all rows whose id is in ids in a single commit. Return rows deleted."""
+    deleted = 0
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start : start + IN_CHUNK_SIZE]
+        old = await rollup.stored_rows(session, model, ("id",), [(i,) for i in chunk])
+        statement = delete(model).where(col(model.id).in_(chunk))
+        result = await session.exec(statement)
+        deleted += result.rowcount
+        await rollup.apply(session, model, removed=old)
+    stamp = await _stamp(session, model)
+    await session.commit()
+    _bump(model)
+    identity.evict(model, stamp, ids)
+    return deleted
+
+
+async def _queued_add[M: BaseTable](
+    session: AsyncSession, queue: writer.WriteQueue, entity: M
+) -> M:
+    # Values are read here: the operation runs in the queue's task and session,
+    # where the caller's entity cannot load anything.
+    model = type(entity)
+    values = entity.model_dump()
+    added = _rows([entity])
+
+    async def operation(write: AsyncSession) -> None:
+        await write.exec(insert(_table(model)).values(values))
+        await rollup.apply(write, model, added=added)
+        await _stamp(write, model, rows_changed=False)
+        writer.after_commit(write, lambda: _bump(model))
+
+    await queue.submit(operation)
+    _settle(session, entity)
     return entity
 
 
-__all__ = ["get_by_id", "list_all", "add", "update", "delete_by_id"]
+async def _queued_update[M: BaseTable](
+    session: AsyncSession, queue: writer.WriteQueue, entity: M
+) -> M:
+    model = type(entity)
+    id = entity.id
+    values = entity.model_dump(exclude={"id"})
+    added = _rows([entity])
+
+    async def operation(write: AsyncSession) -> None:
+        old = await rollup.stored_rows(write, model, ("id",), [(id,)])
+        table = _table(model)
+        statement = sql_update(table).where(table.c.id == id).values(values)
+        await write.exec(statement)
+        await rollup.apply(write, model, added=added, removed=old)
+        stamp = await _stamp(write, model)
+
+        def committed() -> None:
+            _bump(model)
+            identity.evict(model, stamp, [id])
+
+        writer.after_commit(write, committed)
+
+    await queue.submit(operation)
+    _settle(session, entity)
+    return entity
+
+
+async def _queued_delete[M: BaseTable](
+    session: AsyncSession, queue: writer.WriteQueue, model: type[M], id: str
+) -> M | None:
+    entity = await get_by_id(session, model, id)
+    if entity is None:
+        return None
+
+    async def operation(write: AsyncSession) -> int:
+        old = await rollup.stored_rows(write, model, ("id",), [(id,)])
+        table = _table(model)
+        result = await write.exec(delete(table).where(table.c.id == id))
+        await rollup.apply(write, model, removed=old)
+        stamp = await _stamp(write, model)
+
+        def committed() -> None:
+            _bump(model)
+            identity.evict(model, stamp, [id])
+
+        writer.after_commit(write, committed)
+        return result.rowcount
+
+    deleted = await queue.submit(operation)
+    session.expunge(entity)
+    return entity if deleted else None
+
+
+def _table(model: type[BaseTable]) -> Table:
+    # Core statements on the table skip the ORM's bulk-persistence layer, which
+    # costs more than the single-row write itself.
+    return model.__table__  # type: ignore[attr-defined]
+
+
+def _settle(session: AsyncSession, entity: BaseTable) -> None:
+    """Attach entity to session as persistent and unmodified, without any SQL."""
+    owner = object_session(entity)
+    if owner is not None:
+        owner.expunge(entity)
+    if inspect(entity).key is not None:
+        make_transient(entity)
+    make_transient_to_detached(entity)
+    session.add(entity)
+
+
+def _written(model: type[BaseTable]) -> list[str]:
+    tables = [model.__table__.name]  # type: ignore[attr-defined]
+    if model.__rollup__ is not None:
+        tables.append(MonthlyRollup.__table__.name)  # type: ignore[attr-defined]
+    return tables
+
+
+async def _stamp(
+    session: AsyncSession, model: type[BaseTable], rows_changed: bool = True
+) -> int | None:
+    # Inside the write's transaction. A write that changed or removed rows also
+    # moves the identity cache's stamp, whose new value goes to identity.evict();
+    # new rows cannot make cached ones stale, so adds leave it alone.
+    tables = _written(model)
+    key = identity.stamp_key(model) if rows_changed else None
+    if key is None:
+        await stamps.stamp(session, *tables)
+        return None
+    return (await stamps.stamp(session, *tables, key))[key]
+
+
+def _bump(model: type[BaseTable]) -> None:
+    cache.bump(*_written(model))
+
+
+def _rows(entities: Sequence[BaseTable]) -> list[rollup.RollupRow]:
+    rows = [rollup.entity_row(entity) for entity in entities]
+    return [row for row in rows if row is not None]
+
+
+async def _reload[M: BaseTable](
+    session: AsyncSession, model: type[M], items: list[M], key: Sequence[str]
+) -> list[M]:
+    """Fetch items from the DB again by key columns, preserving the input order.
+
+    populate_existing overwrites instances already in the identity map, since the
+    Core INSERT/UPDATE statements above bypass the ORM unit of work.
+    """
+    columns = [getattr(model, name) for name in key]
+    keys = [tuple(getattr(item, name) for name in key) for item in items]
+    by_key: dict[tuple[object, ...], M] = {}
+    for start in range(0, len(keys), IN_CHUNK_SIZE):
+        chunk = keys[start : start + IN_CHUNK_SIZE]
+        statement = (
+            select(model)
+            .where(tuple_(*columns).in_(chunk))
+            .execution_options(populate_existing=True)
+        )
+        result = await session.exec(statement)
+        for row in result.all():
+            by_key[tuple(getattr(row, name) for name in key)] = row
+    return [by_key.get(k, item) for k, item in zip(keys, items, strict=True)]
+
+
+__all__ = [
+    "get_by_id",
+    "list_all",
+    "list_page",
+    "stream_all",
+    "stream_rows",
+    "search",
+    "add",
+    "update",
+    "delete_by_id",
+    "add_many",
+    "upsert_many",
+    "delete_many",
+]
@@ -0,0 +1,249 @@
+"""
+MonthlyRollup maintenance: incremental deltas, full rebuild, and dashboard reads.
+
+The base repository write helpers call apply() inside their own transaction, so the
+rollup always commits together with the rows it summarizes. rebuild() recomputes
+every total from scratch, streaming each source table once. Both round amounts to
+cents the same way, with _cents() on the stored value's text (ROUND_HALF_UP).
+
+Rebuild from the command line with `python -m src.resources._base.rollup`.
+"""
+
+import asyncio
+from collections.abc import Iterable, Sequence
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any
+
+from sqlalchemy import String, cast, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import cache
+from src.resources._base import stamps
+from src.resources._base.models import BaseTable, MonthlyRollup, RollupSpec
+
+# (amount, date, category_id) as read from a source row.
+type RollupRow = tuple[Any, date, str | None]
+type RollupKey = tuple[str, str, str]
+
+
+def rollup_models() -> list[type[BaseTable]]:
+    """Every table model that declares a RollupSpec."""
+    found: list[type[BaseTable]] = []
+    pending: list[type[BaseTable]] = [BaseTable]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if cls.__rollup__ is not None and hasattr(cls, "__table__"):
+            found.append(cls)
+    return found
+
+
+def _month(value: date) -> str:
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def _cents(value: Any) -> int:
+    amount = Decimal(str(value)) * 100
+    return int(amount.to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def _columns(spec: RollupSpec) -> list[str]:
+    names = [spec.amount_field, spec.date_field]
+    if spec.category_field is not None:
+        names.append(spec.category_field)
+    return names
+
+
+def _stored_columns(model: type[BaseTable], spec: RollupSpec) -> list[Any]:
+    # The amount as SQLite's text of the stored value ("1.005"), not through
+    # Numeric's result processor, which formats the float with "%.2f" first.
+    amount, *others = (getattr(model, name) for name in _columns(spec))
+    return [cast(amount, String).label(spec.amount_field), *others]
+
+
+def _as_row(spec: RollupSpec, values: Sequence[Any]) -> RollupRow:
+    category = values[2] if spec.category_field is not None else None
+    return values[0], values[1], category
+
+
+def entity_row(entity: BaseTable) -> RollupRow | None:
+    """The rollup inputs of entity, or None if its table has no RollupSpec."""
+    spec = entity.__rollup__
+    if spec is None:
+        return None
+    values = [getattr(entity, name) for name in _columns(spec)]
+    return _as_row(spec, values)
+
+
+async def stored_rows(
+    session: AsyncSession,
+    model: type[BaseTable],
+    key: Sequence[str],
+    keys: Sequence[tuple[Any, ...]],
+) -> list[RollupRow]:
+    """Rollup inputs currently stored for the rows matching keys.
+
+    Runs without autoflush so pending changes on those rows are not written first;
+    callers use this to subtract the old values before applying the new ones.
+    """
+    spec = model.__rollup__
+    if spec is None or not keys:
+        return []
+    key_columns = [getattr(model, name) for name in key]
+    statement = select(*_stored_columns(model, spec)).where(
+        tuple_(*key_columns).in_(keys)
+    )
+    with session.no_autoflush:
+        result = await session.exec(statement)
+        rows = result.all()
+    return [_as_row(spec, row) for row in rows]
+
+
+async def apply(
+    session: AsyncSession,
+    model: type[BaseTable],
+    added: Iterable[RollupRow] = (),
+    removed: Iterable[RollupRow] = (),
+) -> None:
+    """Add the added rows to, and subtract the removed rows from, MonthlyRollup.
+
+    Deltas are folded per (month, category, kind) first, so a batch touches each
+    rollup row once. Does not commit; the caller's commit covers both tables.
+    """
+    spec = model.__rollup__
+    if spec is None:
+        return
+    deltas: dict[RollupKey, list[int]] = {}
+    _fold(deltas, spec, added, 1)
+    _fold(deltas, spec, removed, -1)
+    await _merge(session, deltas)
+
+
+def _fold(
+    deltas: dict[RollupKey, list[int]],
+    spec: RollupSpec,
+    rows: Iterable[RollupRow],
+    sign: int,
+) -> None:
+    for amount, day, category in rows:
+        group = (_month(day), category or "", spec.kind)
+        delta = deltas.setdefault(group, [0, 0])
+        delta[0] += sign * _cents(amount)
+        delta[1] += sign
+
+
+async def _merge(session: AsyncSession, deltas: dict[RollupKey, list[int]]) -> None:
+    """Add deltas to MonthlyRollup and drop rows left without any source row."""
+    changed = {group: d for group, d in deltas.items() if d != [0, 0]}
+    if not changed:
+        return
+    params = [
+        {
+            "month": month,
+            "category_id": category,
+            "kind": kind,
+            "total_cents": cents,
+            "row_count": count,
+        }
+        for (month, category, kind), (cents, count) in changed.items()
+    ]
+    statement = sqlite_insert(MonthlyRollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=["month", "category_id", "kind"],
+        set_={
+            "total_cents": MonthlyRollup.total_cents + statement.excluded.total_cents,
+            "row_count": MonthlyRollup.row_count + statement.excluded.row_count,
+        },
+    )
+    await session.exec(statement, params=params)
+    emptied = delete(MonthlyRollup).where(
+        tuple_(
+            col(MonthlyRollup.month),
+            col(MonthlyRollup.category_id),
+            col(MonthlyRollup.kind),
+        ).in_(list(changed)),
+        col(MonthlyRollup.row_count) <= 0,
+    )
+    await session.exec(emptied)
+
+
+async def rebuild_from(
+    session: AsyncSession,
+    models: Iterable[type[BaseTable]],
+    batch_size: int = 5000,
+) -> None:
+    """Replace MonthlyRollup with totals recomputed from models; does not commit.
+
+    Rows are streamed batch_size at a time and folded per group, so memory is
+    bounded by the number of (month, category, kind) groups.
+    """
+    await session.exec(delete(MonthlyRollup))
+    deltas: dict[RollupKey, list[int]] = {}
+    for model in models:
+        spec = model.__rollup__
+        if spec is None:
+            continue
+        statement = select(*_stored_columns(model, spec)).execution_options(
+            yield_per=batch_size
+        )
+        result = await session.stream(statement)
+        async for partition in result.partitions(batch_size):
+            _fold(deltas, spec, (_as_row(spec, row) for row in partition), 1)
+    await _merge(session, deltas)
+
+
+async def rebuild(session: AsyncSession) -> None:
+    """Recompute MonthlyRollup from every rollup source table and commit."""
+    await rebuild_from(session, rollup_models())
+    await stamps.stamp(session, "monthly_rollup")
+    await session.commit()
+    cache.bump("monthly_rollup")
+
+
+async def list_months(
+    session: AsyncSession,
+    start: str,
+    end: str,
+    kind: str | None = None,
+) -> list[MonthlyRollup]:
+    """Rollup rows with start <= month <= end ("YYYY-MM"), ordered by month."""
+    statement = (
+        select(MonthlyRollup)
+        .where(col(MonthlyRollup.month) >= start, col(MonthlyRollup.month) <= end)
+        .order_by(
+            col(MonthlyRollup.month),
+            col(MonthlyRollup.kind),
+            col(MonthlyRollup.category_id),
+        )
+    )
+    if kind is not None:
+        statement = statement.where(col(MonthlyRollup.kind) == kind)
+    result = await session.exec(statement)
+    return list(result.all())
+
+
+async def _main() -> None:
+    import src.main  # noqa: F401  (registers every resource model via its router)
+    from src.ext import db
+
+    async with AsyncSession(db.get_engine()) as session:
+        await rebuild(session)
+    await db.dispose_engines()
+
+
+__all__ = [
+    "apply",
+    "entity_row",
+    "list_months",
+    "rebuild",
+    "rebuild_from",
+    "rollup_models",
+    "stored_rows",
+]
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,183 @@
+"""
+Scoped repository: the base helpers for UserScopedTable models, bound to one user.
+
+Every function takes the current user_id and adds `user_id = :user_id` to each
+select, update and delete, so a row of another user behaves exactly like a
+missing one (None / not counted), and writes stamp user_id on new rows. Reads go
+through the (user_id, id) index every UserScopedTable declares, so a scoped page
+costs the same as an unscoped one.
+"""
+
+from collections.abc import AsyncGenerator, Sequence
+from typing import Any
+
+from sqlalchemy import ColumnElement, tuple_
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.resources._base import repository as base_repo
+from src.resources._base.models import UserScopedTable
+from src.resources._base.repository import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_STREAM_BATCH_SIZE,
+    IN_CHUNK_SIZE,
+)
+
+
+class ScopeError(PermissionError):
+    """A write would touch a row that belongs to another user."""
+
+
+def _owned(model: type[UserScopedTable], user_id: str) -> list[ColumnElement[Any]]:
+    return [col(model.user_id) == user_id]
+
+
+async def get_by_id[M: UserScopedTable](
+    session: AsyncSession, model: type[M], user_id: str, id: str
+) -> M | None:
+    """Return the user's entity with the given id, or None."""
+    if model.__identity_cache__ is not None:
+        entity = await base_repo.get_by_id(session, model, id)
+        return entity if entity is not None and entity.user_id == user_id else None
+    statement = select(model).where(col(model.id) == id, *_owned(model, user_id))
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def list_all[M: UserScopedTable](
+    session: AsyncSession, model: type[M], user_id: str
+) -> list[M]:
+    """Return all of the user's rows ordered by id."""
+    return await base_repo.list_all(session, model, where=_owned(model, user_id))
+
+
+async def list_page[M: UserScopedTable](
+    session: AsyncSession,
+    model: type[M],
+    user_id: str,
+    after: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> tuple[list[M], str | None]:
+    """One keyset page of the user's rows, plus the cursor for the next page."""
+    where = _owned(model, user_id)
+    return await base_repo.list_page(session, model, after, limit, where=where)
+
+
+async def stream_all[M: UserScopedTable](
+    session: AsyncSession,
+    model: type[M],
+    user_id: str,
+    batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+) -> AsyncGenerator[list[M]]:
+    """Yield all of the user's rows ordered by id in batches of batch_size."""
+    where = _owned(model, user_id)
+    async for batch in base_repo.stream_all(session, model, batch_size, where=where):
+        yield batch
+
+
+async def add[M: UserScopedTable](session: AsyncSession, user_id: str, entity: M) -> M:
+    """Persist entity as the user's, commit, refresh, return it."""
+    entity.user_id = user_id
+    return await base_repo.add(session, entity)
+
+
+async def add_many[M: UserScopedTable](
+    session: AsyncSession,
+    user_id: str,
+    entities: Sequence[M],
+    refresh: bool = False,
+) -> list[M]:
+    """Insert all entities as the user's with one executemany and one commit."""
+    for entity in entities:
+        entity.user_id = user_id
+    return await base_repo.add_many(session, entities, refresh)
+
+
+async def update[M: UserScopedTable](
+    session: AsyncSession, user_id: str, entity: M
+) -> M:
+    """Commit and refresh entity. ScopeError if it is (or would become) not the user's.
+
+    The stored owner is read without autoflush, so a changed user_id on entity is
+    checked before it can be written.
+    """
+    model = type(entity)
+    statement = select(model.user_id).where(col(model.id) == entity.id)
+    with session.no_autoflush:
+        result = await session.exec(statement)
+        owner = result.first()
+    if entity.user_id != user_id or owner not in (None, user_id):
+        raise ScopeError(f"{model.__name__} {entity.id} is not owned by {user_id}")
+    return await base_repo.update(session, entity)
+
+
+async def upsert_many[M: UserScopedTable](
+    session: AsyncSession,
+    user_id: str,
+    entities: Sequence[M],
+    key: Sequence[str] = ("id",),
+    refresh: bool = False,
+) -> list[M]:
+    """Insert or update entities as the user's. ScopeError if a key is someone else's.
+
+    The ownership check runs before anything is written, so a rejected batch
+    changes nothing.
+    """
+    items = list(entities)
+    if not items:
+        return items
+    model = type(items[0])
+    columns = [getattr(model, name) for name in key]
+    keys = [tuple(getattr(item, name) for name in key) for item in items]
+    for start in range(0, len(keys), IN_CHUNK_SIZE):
+        chunk = keys[start : start + IN_CHUNK_SIZE]
+        statement = select(col(model.id)).where(
+            tuple_(*columns).in_(chunk), col(model.user_id) != user_id
+        )
+        result = await session.exec(statement)
+        foreign = result.first()
+        if foreign is not None:
+            raise ScopeError(f"{model.__name__} {foreign} is not owned by {user_id}")
+    for item in items:
+        item.user_id = user_id
+    return await base_repo.upsert_many(session, items, key, refresh)
+
+
+async def delete_by_id[M: UserScopedTable](
+    session: AsyncSession, model: type[M], user_id: str, id: str
+) -> M | None:
+    """Delete the user's entity with the given id. Return it, or None."""
+    entity = await get_by_id(session, model, user_id, id)
+    if entity is None:
+        return None
+    return await base_repo.delete_by_id(session, model, entity.id)
+
+
+async def delete_many[M: UserScopedTable](
+    session: AsyncSession, model: type[M], user_id: str, ids: Sequence[str]
+) -> int:
+    """Delete those of ids that are the user's in one commit. Return rows deleted."""
+    owned: list[str] = []
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start : start + IN_CHUNK_SIZE]
+        statement = select(col(model.id)).where(
+            col(model.id).in_(chunk), *_owned(model, user_id)
+        )
+        result = await session.exec(statement)
+        owned.extend(result.all())
+    return await base_repo.delete_many(session, model, owned)
+
+
+__all__ = [
+    "ScopeError",
+    "add",
+    "add_many",
+    "delete_by_id",
+    "delete_many",
+    "get_by_id",
+    "list_all",
+    "list_page",
+    "stream_all",
+    "update",
+    "upsert_many",
+]
@@ -0,0 +1,44 @@
+"""
+Write stamps: one counter per table in cache_stamp, moved by every committed write.
+
+Writers call stamp() inside the transaction of their change, so a counter moves
+exactly when the change becomes visible to other connections. The caches of each
+worker compare it with the value their entries were built at: the identity cache
+(identity) re-reads its table's row, and the response and analytics caches
+(src.ext.cache) re-read all of them through read(), installed by the app's
+lifespan. A table nobody has written yet has no row and counts as 0.
+"""
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.resources._base.models import CacheStamp
+
+
+async def stamp(session: AsyncSession, *tables: str) -> dict[str, int]:
+    """Increment each table's stamp inside the caller's transaction.
+
+    One INSERT ... ON CONFLICT for all tables. Returns the new stamps by table.
+    """
+    if not tables:
+        return {}
+    statement = (
+        sqlite_insert(CacheStamp)
+        .values([{"table_name": table, "version": 1} for table in tables])
+        .on_conflict_do_update(
+            index_elements=["table_name"], set_={"version": CacheStamp.version + 1}
+        )
+        .returning(CacheStamp.table_name, CacheStamp.version)
+    )
+    result = await session.exec(statement)
+    return dict(result.all())
+
+
+async def read(session: AsyncSession) -> dict[str, int]:
+    """Every table's current stamp."""
+    result = await session.exec(select(CacheStamp.table_name, CacheStamp.version))
+    return dict(result.all())
+
+
+__all__ = ["read", "stamp"]
@@ -0,0 +1,146 @@
+"""Tests for the integer-cent analytics arrays and their cache."""
+
+from array import array
+from collections.abc import AsyncGenerator
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Field, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import cache
+from src.ext.db import build_engine
+from src.ext.settings import get_settings
+from src.resources._base import analytics, scoped, stamps
+from src.resources._base.models import RollupSpec, UserScopedTable
+
+ALICE = "01ALICE0000000000000000000"
+BOB = "01BOB000000000000000000000"
+
+
+class _TestIncome(UserScopedTable, table=True):
+    __tablename__ = "test_analytics_income"  # pyright: ignore[reportAssignmentType]
+    __rollup__ = RollupSpec(kind="income")
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+
+
+class _TestSpending(UserScopedTable, table=True):
+    __tablename__ = "test_analytics_spending"  # pyright: ignore[reportAssignmentType]
+    __rollup__ = RollupSpec(kind="spending", category_field="category_id")
+    __indexes__ = (("user_id", "date"),)
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+    category_id: str | None = None
+
+
+@pytest.fixture
+async def session() -> AsyncGenerator[AsyncSession]:
+    """In-memory DB with every table created and an empty analytics cache."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    analytics.clear()
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+    await engine.dispose()
+
+
+async def _seed(session: AsyncSession) -> None:
+    await scoped.add_many(
+        session,
+        ALICE,
+        [
+            _TestIncome(amount=Decimal("3000.00"), date=date(2026, 1, 5)),
+            _TestIncome(amount=Decimal("3000.00"), date=date(2026, 2, 5)),
+        ],
+    )
+    await scoped.add_many(
+        session,
+        ALICE,
+        [
+            _TestSpending(amount=Decimal(1000), date=date(2026, 1, 1), category_id="r"),
+            _TestSpending(amount=Decimal(1000), date=date(2026, 2, 1), category_id="r"),
+            _TestSpending(amount=Decimal("250.50"), date=date(2026, 2, 9)),
+            _TestSpending(amount=Decimal("99.99"), date=date(2026, 4, 1)),
+        ],
+    )
+    await scoped.add(
+        session, BOB, _TestSpending(amount=Decimal("5"), date=date(2026, 1, 2))
+    )
+
+
+def test_series_helpers() -> None:
+    """Month labels, rolling means, running totals and shares on plain ints."""
+    assert analytics.month_labels(date(2025, 11, 30), date(2026, 2, 1)) == (
+        "2025-11",
+        "2025-12",
+        "2026-01",
+        "2026-02",
+    )
+    with pytest.raises(ValueError):
+        analytics.month_labels(date(2026, 2, 1), date(2026, 1, 31))
+    assert analytics.rolling_average([100, 200, 300, 400], 2) == [100, 150, 250, 350]
+    assert analytics.rolling_average([100, 200], 3) == [100, 150]
+    assert analytics.cumulative([1, 2, 3], opening=10) == array("q", [11, 13, 16])
+    assert analytics.shares({"a": 300, "b": 100, "c": 0}) == [("a", 0.75), ("b", 0.25)]
+
+
+async def test_user_breakdown_groups_only_their_rows(session: AsyncSession) -> None:
+    """A user's range holds their cents per month and category, nothing else."""
+    await _seed(session)
+    result = await analytics.load(session, date(2026, 1, 1), date(2026, 3, 31), ALICE)
+    assert result.months == ("2026-01", "2026-02", "2026-03")
+    assert result.totals("income") == array("q", [300000, 300000, 0])
+    assert result.totals("spending") == array("q", [100000, 125050, 0])
+    assert result.category_totals("spending") == {"r": 200000, "": 25050}
+    assert result.net() == array("q", [200000, 174950, 0])
+    assert analytics.cumulative(result.net()) == array("q", [200000, 374950, 374950])
+
+
+async def test_household_breakdown_reads_monthly_rollup(session: AsyncSession) -> None:
+    """Without a user, totals come from MonthlyRollup and cover everyone."""
+    await _seed(session)
+    result = await analytics.load(session, date(2026, 1, 1), date(2026, 1, 31))
+    assert result.totals("spending") == array("q", [100500])
+
+
+async def test_breakdown_is_cached_until_a_write(session: AsyncSession) -> None:
+    """The same (user, range) is served from cache until its tables change."""
+    await _seed(session)
+    start, end = date(2026, 1, 1), date(2026, 2, 28)
+    first = await analytics.breakdown(session, start, end, ALICE)
+    assert await analytics.breakdown(session, start, end, ALICE) is first
+    assert analytics.stats == {"hits": 1, "misses": 1}
+
+    await scoped.add(
+        session, ALICE, _TestIncome(amount=Decimal("10"), date=date(2026, 2, 20))
+    )
+    fresh = await analytics.breakdown(session, start, end, ALICE)
+    assert fresh.totals("income") == array("q", [300000, 301000])
+    assert analytics.stats["misses"] == 2
+
+
+async def test_breakdown_sees_writes_of_other_workers(
+    session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A write that only moved cache_stamp (another worker's) makes entries stale."""
+    await _seed(session)
+    monkeypatch.setattr(get_settings(), "response_cache_stamp_seconds", 0.0)
+
+    async def read() -> dict[str, int]:
+        return await stamps.read(session)
+
+    cache.share_versions(read)
+    try:
+        start, end = date(2026, 1, 1), date(2026, 2, 28)
+        first = await analytics.breakdown(session, start, end, ALICE)
+        assert await analytics.breakdown(session, start, end, ALICE) is first
+        await stamps.stamp(session, "test_analytics_income")
+        await session.commit()
+        assert await analytics.breakdown(session, start, end, ALICE) is not first
+    finally:
+        cache.share_versions(None)
@@ -0,0 +1,146 @@
+"""Tests for the FTS5 index (fulltext.py) and the base repository's search()."""
+
+from collections.abc import AsyncGenerator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.ext.query_plan import forbid_full_scans
+from src.resources._base import fulltext
+from src.resources._base import repository as base_repo
+from src.resources._base.models import BaseTable, SearchSpec
+
+
+class _SearchRow(BaseTable, table=True):
+    __tablename__ = "test_search_row"  # pyright: ignore[reportAssignmentType]
+    __search__ = SearchSpec(fields=("description", "source"))
+
+    description: str = Field(default="", max_length=255)
+    source: str = Field(default="", max_length=64)
+
+
+@pytest.fixture
+async def session() -> AsyncGenerator[AsyncSession]:
+    """Async session with in-memory DB, all tables and _SearchRow's index."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        for statement in fulltext.index_statements(_SearchRow):
+            await conn.execute(text(statement))
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+    await engine.dispose()
+
+
+async def _descriptions(session: AsyncSession, query: str) -> list[str]:
+    hits, _ = await base_repo.search(session, _SearchRow, query, limit=100)
+    return [hit.entity.description for hit in hits]
+
+
+async def test_search_matches_prefixes_and_ranks(session: AsyncSession) -> None:
+    """Every word must occur as a prefix; denser matches rank first."""
+    await base_repo.add_many(
+        session,
+        [
+            _SearchRow(description="Padaria Pão Quente", source="nubank"),
+            _SearchRow(description="NETFLIX.COM assinatura mensal", source="inter"),
+            _SearchRow(description="Netflix netflix", source="itau"),
+            _SearchRow(description="Spotify", source="nubank"),
+        ],
+    )
+    assert await _descriptions(session, "netf") == [
+        "Netflix netflix",
+        "NETFLIX.COM assinatura mensal",
+    ]
+    assert await _descriptions(session, "netflix mens") == [
+        "NETFLIX.COM assinatura mensal"
+    ]
+    assert await _descriptions(session, "pao") == ["Padaria Pão Quente"]
+    nubank = await _descriptions(session, "nubank")
+    assert sorted(nubank) == ["Padaria Pão Quente", "Spotify"]
+    assert await _descriptions(session, '"* OR -') == []
+    assert await _descriptions(session, "amazon") == []
+
+
+async def test_snippets_escape_text_and_mark_terms(session: AsyncSession) -> None:
+    """The row's text is HTML-escaped; only the matched term is wrapped."""
+    await base_repo.add(session, _SearchRow(description="<b>Uber</b> trip"))
+    hits, _ = await base_repo.search(session, _SearchRow, "uber")
+    assert str(hits[0].snippet) == "&lt;b&gt;<mark>Uber</mark>&lt;/b&gt; trip"
+
+
+async def test_keyset_pages_cover_every_hit_once(session: AsyncSession) -> None:
+    """Following cursors returns each match exactly once, in rank order."""
+    rows = [
+        _SearchRow(description=" ".join(["ifood"] * (1 + i % 3) + [f"pedido {i}"]))
+        for i in range(23)
+    ]
+    await base_repo.add_many(session, rows)
+    seen: list[str] = []
+    cursor: str | None = None
+    pages = 0
+    while True:
+        hits, cursor = await base_repo.search(
+            session, _SearchRow, "ifood", after=cursor, limit=5
+        )
+        seen.extend(hit.entity.id for hit in hits)
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 5
+    assert sorted(seen) == sorted(row.id for row in rows)
+    everything, _ = await base_repo.search(session, _SearchRow, "ifood", limit=100)
+    assert seen == [hit.entity.id for hit in everything]
+
+
+async def test_triggers_follow_updates_and_deletes(session: AsyncSession) -> None:
+    """Writes through any path keep the index in step with the table."""
+    row = await base_repo.add(session, _SearchRow(description="Mercado Livre"))
+    row.description = "Amazon"
+    await base_repo.update(session, row)
+    assert await _descriptions(session, "mercado") == []
+    assert await _descriptions(session, "amazon") == ["Amazon"]
+    await base_repo.delete_by_id(session, _SearchRow, row.id)
+    assert await _descriptions(session, "amazon") == []
+
+
+async def test_search_filters_and_rejects_bad_cursors(session: AsyncSession) -> None:
+    """where narrows the hits; a cursor search() did not make is a ValueError."""
+    await base_repo.add_many(
+        session,
+        [
+            _SearchRow(description="Uber", source="nubank"),
+            _SearchRow(description="Uber", source="inter"),
+        ],
+    )
+    hits, _ = await base_repo.search(
+        session, _SearchRow, "uber", where=(col(_SearchRow.source) == "inter",)
+    )
+    assert [hit.entity.source for hit in hits] == ["inter"]
+    with pytest.raises(ValueError):
+        await base_repo.search(session, _SearchRow, "uber", after="not-a-cursor")
+
+
+async def test_search_reads_the_index_not_the_table(session: AsyncSession) -> None:
+    """Each page, first or later, finds its rows through FTS5 and the primary key."""
+    await base_repo.add_many(
+        session, [_SearchRow(description=f"Uber trip {i}") for i in range(3)]
+    )
+    engine = session.bind
+    assert isinstance(engine, AsyncEngine)
+    async with forbid_full_scans(engine) as explained:
+        _, cursor = await base_repo.search(session, _SearchRow, "uber", limit=2)
+        await base_repo.search(session, _SearchRow, "uber", after=cursor, limit=2)
+    assert len(explained) == 2
+
+
+def test_index_tables_are_recognised() -> None:
+    """Autogenerate skips the index and its shadow tables, not look-alikes."""
+    assert fulltext.is_index_table("import_row_fts")
+    assert fulltext.is_index_table("import_row_fts_docsize")
+    assert not fulltext.is_index_table("import_row")
+    assert not fulltext.is_index_table("fts_settings")
@@ -0,0 +1,189 @@
+"""Tests for the get_by_id identity cache (src.resources._base.identity)."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.ext.settings import get_settings
+from src.resources._base import identity, scoped
+from src.resources._base import repository as base_repo
+from src.resources._base.models import (
+    BaseTable,
+    IdentityCacheSpec,
+    UserScopedTable,
+)
+
+
+class _CachedRow(BaseTable, table=True):
+    __tablename__ = "test_cached_row"  # pyright: ignore[reportAssignmentType]
+    __identity_cache__ = IdentityCacheSpec(ttl=60.0, max_entries=2)
+
+    name: str = Field(max_length=255)
+
+
+class _ExpiringRow(BaseTable, table=True):
+    __tablename__ = "test_expiring_row"  # pyright: ignore[reportAssignmentType]
+    __identity_cache__ = IdentityCacheSpec(ttl=0.0)
+
+    name: str = Field(max_length=255)
+
+
+class _CachedScopedRow(UserScopedTable, table=True):
+    __tablename__ = "test_cached_scoped_row"  # pyright: ignore[reportAssignmentType]
+    __identity_cache__ = IdentityCacheSpec()
+
+    name: str = Field(max_length=255)
+
+
+@pytest.fixture
+async def engine() -> AsyncGenerator[AsyncEngine]:
+    identity.clear()
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+    identity.clear()
+
+
+@pytest.fixture
+def selects(engine: AsyncEngine) -> list[str]:
+    """SQL of every SELECT run on engine's connections from now on."""
+    seen: list[str] = []
+
+    def record(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        if statement.startswith("SELECT"):
+            seen.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    return seen
+
+
+async def _seed(engine: AsyncEngine, *names: str) -> list[str]:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        rows = await base_repo.add_many(session, [_CachedRow(name=n) for n in names])
+    return [row.id for row in rows]
+
+
+async def test_second_read_is_served_from_cache(
+    engine: AsyncEngine, selects: list[str]
+) -> None:
+    """A new session gets the row without a query, attached and updatable."""
+    (row_id,) = await _seed(engine, "first")
+    async with AsyncSession(engine) as session:
+        assert (await base_repo.get_by_id(session, _CachedRow, row_id)) is not None
+    queries = len(selects)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        cached = await base_repo.get_by_id(session, _CachedRow, row_id)
+        assert cached is not None and cached.name == "first"
+        assert len(selects) == queries
+        assert identity.stats["hits"] == 1
+        cached.name = "renamed"
+        await base_repo.update(session, cached)
+    async with AsyncSession(engine) as session:
+        fresh = await base_repo.get_by_id(session, _CachedRow, row_id)
+        assert fresh is not None and fresh.name == "renamed"
+
+
+async def test_cached_entries_survive_an_add_to_the_table(
+    engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Inserts leave the identity stamp alone, so no worker drops cached rows."""
+    monkeypatch.setattr(get_settings(), "identity_cache_stamp_seconds", 0.0)
+    (row_id,) = await _seed(engine, "kept")
+    async with AsyncSession(engine) as session:
+        await base_repo.get_by_id(session, _CachedRow, row_id)
+        await base_repo.add(session, _CachedRow(name="new"))
+        await base_repo.add_many(session, [_CachedRow(name="newer")])
+    async with AsyncSession(engine) as session:
+        assert await base_repo.get_by_id(session, _CachedRow, row_id) is not None
+    assert identity.stats["hits"] == 1
+    assert identity.stats["invalidations"] == 0
+
+
+async def test_delete_evicts_and_missing_ids_are_not_cached(
+    engine: AsyncEngine,
+) -> None:
+    """After delete_by_id the id reads as missing, and misses are never hits."""
+    (row_id,) = await _seed(engine, "gone")
+    async with AsyncSession(engine) as session:
+        await base_repo.get_by_id(session, _CachedRow, row_id)
+        await base_repo.delete_by_id(session, _CachedRow, row_id)
+    async with AsyncSession(engine) as session:
+        assert await base_repo.get_by_id(session, _CachedRow, row_id) is None
+        assert await base_repo.get_by_id(session, _CachedRow, row_id) is None
+    assert identity.stats["hits"] == 0
+
+
+async def test_entries_expire_and_lru_is_bounded(engine: AsyncEngine) -> None:
+    """Entries older than ttl are reloaded; past max_entries the oldest goes."""
+    ids = await _seed(engine, "a", "b", "c")
+    async with AsyncSession(engine) as session:
+        for row_id in ids:
+            await base_repo.get_by_id(session, _CachedRow, row_id)
+        short = await base_repo.add(session, _ExpiringRow(name="x"))
+    assert identity.stats["evictions"] == 1
+    for _ in range(3):
+        async with AsyncSession(engine) as session:
+            await base_repo.get_by_id(session, _ExpiringRow, short.id)
+    assert identity.stats["expired"] == 2
+
+
+async def test_write_from_another_worker_is_seen_after_stamp_check(
+    engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A write that only moved cache_stamp in the DB drops this worker's rows."""
+    monkeypatch.setattr(get_settings(), "identity_cache_stamp_seconds", 0.0)
+    (row_id,) = await _seed(engine, "before")
+    async with AsyncSession(engine) as session:
+        await base_repo.get_by_id(session, _CachedRow, row_id)
+        await session.exec(  # pyright: ignore[reportCallIssue]
+            text("UPDATE test_cached_row SET name = 'after' WHERE id = :id"),
+            params={"id": row_id},
+        )
+        await session.exec(  # pyright: ignore[reportCallIssue]
+            text(
+                "INSERT INTO cache_stamp (table_name, version)"
+                " VALUES ('test_cached_row:identity', 99)"
+                " ON CONFLICT (table_name) DO UPDATE SET version = 99"
+            )
+        )
+        await session.commit()
+    async with AsyncSession(engine) as session:
+        row = await base_repo.get_by_id(session, _CachedRow, row_id)
+        assert row is not None and row.name == "after"
+
+
+async def test_concurrent_misses_share_one_query(
+    engine: AsyncEngine, selects: list[str]
+) -> None:
+    """Five sessions asking for the same uncached id cause a single SELECT."""
+    (row_id,) = await _seed(engine, "shared")
+
+    async def read() -> _CachedRow | None:
+        async with AsyncSession(engine) as session:
+            return await base_repo.get_by_id(session, _CachedRow, row_id)
+
+    selects.clear()
+    results = await asyncio.gather(*(read() for _ in range(5)))
+    assert {row.name for row in results if row is not None} == {"shared"}
+    assert len([s for s in selects if "FROM test_cached_row" in s]) == 1
+    assert identity.stats["coalesced"] == 4
+
+
+async def test_scoped_get_checks_owner_of_cached_row(engine: AsyncEngine) -> None:
+    """Another user's id is None whether or not the row is cached."""
+    async with AsyncSession(engine) as session:
+        row = await scoped.add(session, "alice", _CachedScopedRow(name="mine"))
+    for user_id, found in (("bob", False), ("alice", True), ("bob", False)):
+        async with AsyncSession(engine) as session:
+            got = await scoped.get_by_id(session, _CachedScopedRow, user_id, row.id)
+            assert (got is not None) is found
+    assert (identity.stats["misses"], identity.stats["hits"]) == (1, 2)
@@ -0,0 +1,112 @@
+"""Tests for ULID generation, ULIDBinary and migrate_to_binary."""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlmodel import Field, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ulid import ULID
+
+from src.ext.db import build_engine
+from src.resources._base import ids
+from src.resources._base import repository as base_repo
+from src.resources._base.models import BinaryIdTable
+
+
+class _BinaryRow(BinaryIdTable, table=True):
+    __tablename__ = "test_binary_row"  # pyright: ignore[reportAssignmentType]
+    name: str = Field(max_length=255)
+
+
+@pytest.fixture
+async def session():
+    """Async session with in-memory DB and test table created."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+    await engine.dispose()
+
+
+def test_encode_and_decode_match_python_ulid() -> None:
+    """encode/decode/to_bytes agree with the ulid package."""
+    for _ in range(100):
+        value = ULID()
+        assert ids.encode(int(value)) == str(value)
+        assert ids.decode(str(value)) == int(value)
+        assert ids.to_bytes(str(value)) == value.bytes
+        assert ids.from_bytes(value.bytes) == str(value)
+
+
+def test_decode_rejects_invalid_strings() -> None:
+    """Wrong length or a value above 128 bits raises ValueError."""
+    with pytest.raises(ValueError):
+        ids.decode("01ARZ3NDEK")
+    with pytest.raises(ValueError):
+        ids.decode("8" + "0" * 25)
+
+
+def test_new_ulid_is_monotonic_within_a_millisecond() -> None:
+    """Thousands of ids in a tight loop are unique and strictly increasing."""
+    generated = [ids.new_ulid() for _ in range(5000)]
+    assert generated == sorted(generated)
+    assert len(set(generated)) == len(generated)
+
+
+def test_ulid_batch_is_consecutive_and_after_previous_ids() -> None:
+    """A batch continues the sequence and the next single id follows it."""
+    before = ids.new_ulid()
+    batch = ids.ulid_batch(1000)
+    after = ids.new_ulid()
+    assert len(batch) == 1000
+    assert before < batch[0]
+    assert batch == sorted(batch)
+    assert ids.decode(batch[-1]) - ids.decode(batch[0]) == 999
+    assert batch[-1] < after
+    assert ids.ulid_batch(0) == []
+
+
+async def test_binary_id_round_trips_as_string(session: AsyncSession) -> None:
+    """BinaryIdTable stores 16 bytes but loads, queries and pages by string."""
+    rows = await base_repo.add_many(
+        session, [_BinaryRow(name=str(i)) for i in range(5)], refresh=True
+    )
+    statement = text("SELECT id FROM test_binary_row")
+    raw = await session.exec(statement)  # type: ignore[call-overload]
+    assert {len(value) for (value,) in raw} == {16}
+
+    session.expunge_all()
+    found = await base_repo.get_by_id(session, _BinaryRow, rows[2].id)
+    assert found is not None
+    assert found.id == rows[2].id
+
+    page, cursor = await base_repo.list_page(session, _BinaryRow, limit=3)
+    assert [row.id for row in page] == sorted(row.id for row in rows)[:3]
+    rest, _ = await base_repo.list_page(session, _BinaryRow, after=cursor)
+    assert [row.name for row in rest] == ["3", "4"]
+
+    assert await base_repo.delete_many(session, _BinaryRow, [rows[0].id]) == 1
+
+
+def test_migrate_to_binary_converts_in_place_and_resumes(tmp_path) -> None:
+    """TEXT ids become 16-byte BLOBs in order; a second run changes nothing."""
+    path = tmp_path / "ids.db"
+    values = ids.ulid_batch(12)
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (id VARCHAR(26) PRIMARY KEY, parent VARCHAR)")
+        conn.executemany(
+            "INSERT INTO t VALUES (?, ?)", [(v, values[0]) for v in values]
+        )
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        changed = ids.migrate_to_binary(
+            connection, "t", ("id", "parent"), chunk_size=5
+        )
+        assert changed == 24
+        assert ids.migrate_to_binary(connection, "t", ("id", "parent")) == 0
+        stored = connection.execute(text("SELECT id, parent FROM t ORDER BY id")).all()
+    engine.dispose()
+    assert [ids.from_bytes(row[0]) for row in stored] == values
+    assert {row[1] for row in stored} == {ids.to_bytes(values[0])}
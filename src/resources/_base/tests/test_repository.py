@@ -4,8 +4,10 @@ import pytest
 from sqlmodel import Field, SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.ext import cache
 from src.ext.db import build_engine
 from src.resources._base import repository as base_repo
+from src.resources._base import stamps
 from src.resources._base.models import BaseTable
 
 
@@ -91,3 +93,87 @@ async def test_update_modifies_entity(session: AsyncSession) -> None:
     found = await base_repo.get_by_id(session, _TestRow, added.id)
     assert found is not None
     assert found.name == "updated"
+
+
+async def test_list_page_walks_rows_in_id_order(session: AsyncSession) -> None:
+    """list_page() returns keyset pages in id order and None cursor at the end."""
+    for i, name in enumerate(["a", "b", "c", "d", "e"]):
+        await base_repo.add(session, _TestRow(id=f"{i:026d}", name=name))
+
+    first, cursor = await base_repo.list_page(session, _TestRow, limit=2)
+    assert [r.name for r in first] == ["a", "b"]
+    assert cursor == first[-1].id
+
+    second, cursor = await base_repo.list_page(session, _TestRow, after=cursor, limit=2)
+    assert [r.name for r in second] == ["c", "d"]
+
+    last, cursor = await base_repo.list_page(session, _TestRow, after=cursor, limit=2)
+    assert [r.name for r in last] == ["e"]
+    assert cursor is None
+
+
+async def test_stream_all_yields_bounded_batches(session: AsyncSession) -> None:
+    """stream_all() yields every row in id order, in batches of batch_size."""
+    for i in range(5):
+        await base_repo.add(session, _TestRow(id=f"{i:026d}", name=f"row{i}"))
+
+    batches = [b async for b in base_repo.stream_all(session, _TestRow, batch_size=2)]
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [r.name for b in batches for r in b] == [f"row{i}" for i in range(5)]
+
+
+async def test_add_many_inserts_all_rows(session: AsyncSession) -> None:
+    """add_many() inserts every entity in one call and returns them with ids."""
+    rows = [_TestRow(name=f"bulk{i}") for i in range(3)]
+    added = await base_repo.add_many(session, rows)
+    assert [r.id for r in added] == [r.id for r in rows]
+
+    stored = await base_repo.list_all(session, _TestRow)
+    assert {r.name for r in stored} == {"bulk0", "bulk1", "bulk2"}
+
+
+async def test_upsert_many_inserts_new_and_updates_existing(
+    session: AsyncSession,
+) -> None:
+    """upsert_many() updates rows with a known id and inserts the rest."""
+    existing = await base_repo.add(session, _TestRow(name="old"))
+    changed = _TestRow(id=existing.id, name="new")
+    fresh = _TestRow(name="fresh")
+
+    result = await base_repo.upsert_many(session, [changed, fresh], refresh=True)
+    assert [r.name for r in result] == ["new", "fresh"]
+    assert result[0].created_at == existing.created_at
+
+    stored = await base_repo.list_all(session, _TestRow)
+    assert sorted(r.name for r in stored) == ["fresh", "new"]
+
+
+async def test_delete_many_returns_count(session: AsyncSession) -> None:
+    """delete_many() removes the given ids and reports how many were deleted."""
+    rows = await base_repo.add_many(session, [_TestRow(name=n) for n in "abc"])
+    ids = [rows[0].id, rows[1].id, "01ARZ3NDEKTSV4RRFFQ69G5FAV"]
+
+    deleted = await base_repo.delete_many(session, _TestRow, ids)
+    assert deleted == 2
+
+    remaining = await base_repo.list_all(session, _TestRow)
+    assert [r.name for r in remaining] == ["c"]
+
+
+async def test_writes_bump_response_cache_version(session: AsyncSession) -> None:
+    """Each committed write bumps the table's response cache version."""
+    tables = ("test_base_row",)
+    before = cache.versions(tables)
+    row = await base_repo.add(session, _TestRow(name="v"))
+    await base_repo.delete_by_id(session, _TestRow, row.id)
+    assert cache.versions(tables)[0] == before[0] + 2
+
+
+async def test_writes_move_the_shared_stamp(session: AsyncSession) -> None:
+    """Every write also moves the table's cache_stamp, seen by other workers."""
+    row = await base_repo.add(session, _TestRow(name="s"))
+    await base_repo.add_many(session, [_TestRow(name="t")])
+    row.name = "u"
+    await base_repo.update(session, row)
+    await base_repo.delete_many(session, _TestRow, [row.id])
+    assert (await stamps.read(session))["test_base_row"] == 4
@@ -0,0 +1,129 @@
+"""Tests for MonthlyRollup maintenance by the base repository write helpers."""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Field, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.resources._base import repository as base_repo
+from src.resources._base import rollup
+from src.resources._base.models import BaseTable, MonthlyRollup, RollupSpec
+
+
+# Concrete rollup source for tests only. Import registers it with SQLModel.metadata.
+class _TestMovement(BaseTable, table=True):
+    __tablename__ = "test_rollup_movement"  # pyright: ignore[reportAssignmentType]
+    __rollup__ = RollupSpec(kind="debt", category_field="category_id")
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+    category_id: str | None = None
+
+
+@pytest.fixture
+async def session():
+    """Async session with in-memory DB and all tables created."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+    await engine.dispose()
+
+
+async def _totals(session: AsyncSession) -> dict[tuple[str, str], tuple[int, int]]:
+    result = await session.exec(select(MonthlyRollup))
+    return {
+        (r.month, r.category_id): (r.total_cents, r.row_count) for r in result.all()
+    }
+
+
+async def test_write_helpers_keep_rollup_in_sync(session: AsyncSession) -> None:
+    """add, update and delete_by_id adjust the month/category totals."""
+    rent = await base_repo.add(
+        session,
+        _TestMovement(
+            amount=Decimal("1000.00"), date=date(2026, 1, 5), category_id="h"
+        ),
+    )
+    await base_repo.add(
+        session, _TestMovement(amount=Decimal("20.50"), date=date(2026, 1, 9))
+    )
+    assert await _totals(session) == {
+        ("2026-01", "h"): (100000, 1),
+        ("2026-01", ""): (2050, 1),
+    }
+
+    rent.amount = Decimal("1200.00")
+    rent.date = date(2026, 2, 5)
+    await base_repo.update(session, rent)
+    assert await _totals(session) == {
+        ("2026-02", "h"): (120000, 1),
+        ("2026-01", ""): (2050, 1),
+    }
+
+    await base_repo.delete_by_id(session, _TestMovement, rent.id)
+    assert await _totals(session) == {("2026-01", ""): (2050, 1)}
+
+
+async def test_batch_helpers_keep_rollup_in_sync(session: AsyncSession) -> None:
+    """add_many, upsert_many and delete_many fold their deltas into the rollup."""
+    rows = await base_repo.add_many(
+        session,
+        [
+            _TestMovement(amount=Decimal("10.00"), date=date(2026, 3, d))
+            for d in (1, 2, 3)
+        ],
+    )
+    assert await _totals(session) == {("2026-03", ""): (3000, 3)}
+
+    changed = _TestMovement(id=rows[0].id, amount=Decimal("5.00"), date=rows[0].date)
+    await base_repo.upsert_many(session, [changed])
+    assert await _totals(session) == {("2026-03", ""): (2500, 3)}
+
+    await base_repo.delete_many(session, _TestMovement, [r.id for r in rows])
+    assert await _totals(session) == {}
+
+
+async def test_rebuild_matches_incremental_totals(session: AsyncSession) -> None:
+    """rebuild() recomputes the same totals the write helpers maintained."""
+    await base_repo.add_many(
+        session,
+        [
+            _TestMovement(amount=Decimal("1.10"), date=date(2025, 12, 31)),
+            _TestMovement(amount=Decimal("2.20"), date=date(2026, 1, 1)),
+            _TestMovement(
+                amount=Decimal("3.30"), date=date(2026, 1, 2), category_id="f"
+            ),
+        ],
+    )
+    incremental = await _totals(session)
+
+    await rollup.rebuild(session)
+    assert await _totals(session) == incremental
+
+    months = await rollup.list_months(session, "2026-01", "2026-12", kind="debt")
+    assert [(m.month, m.total_cents) for m in months] == [
+        ("2026-01", 220),
+        ("2026-01", 330),
+    ]
+
+
+async def test_rebuild_and_updates_round_like_the_writes(session: AsyncSession) -> None:
+    """Half-cent amounts round half up on add, update and rebuild alike."""
+    rows = [
+        await base_repo.add(
+            session, _TestMovement(amount=Decimal(amount), date=date(2026, 1, 1))
+        )
+        for amount in ("1.005", "2.675", "0.125")
+    ]
+    assert await _totals(session) == {("2026-01", ""): (101 + 268 + 13, 3)}
+
+    rows[0].amount = Decimal("3.00")
+    await base_repo.update(session, rows[0])
+    incremental = await _totals(session)
+    assert incremental == {("2026-01", ""): (300 + 268 + 13, 3)}
+    await rollup.rebuild(session)
+    assert await _totals(session) == incremental
@@ -0,0 +1,115 @@
+"""Tests for the user-scoped repository and declared composite indexes."""
+
+from collections.abc import AsyncGenerator
+from datetime import date
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.ext.query_plan import forbid_full_scans
+from src.resources._base import scoped
+from src.resources._base.models import UserScopedTable
+
+ALICE = "01HZALICE0000000000000000A"
+BOB = "01HZBOB0000000000000000000"
+
+
+class _ScopedRow(UserScopedTable, table=True):
+    __tablename__ = "test_scoped_row"  # pyright: ignore[reportAssignmentType]
+    __indexes__ = (("user_id", "date"),)
+
+    name: str = Field(max_length=255)
+    date: date
+
+
+@pytest.fixture
+async def engine() -> AsyncGenerator[AsyncEngine]:
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session(engine: AsyncEngine) -> AsyncGenerator[AsyncSession]:
+    """Session with three rows for Alice and two for Bob."""
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        today = date(2026, 3, 1)
+        await scoped.add_many(
+            s, ALICE, [_ScopedRow(name=f"a{i}", date=today) for i in range(3)]
+        )
+        await scoped.add_many(
+            s, BOB, [_ScopedRow(name=f"b{i}", date=today) for i in range(2)]
+        )
+        yield s
+
+
+def test_declared_composite_indexes_are_created() -> None:
+    """UserScopedTable's (user_id, id) and the model's own (user_id, date)."""
+    table = _ScopedRow.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    indexes = {
+        index.name: [column.name for column in index.columns]
+        for index in table.indexes
+    }
+    assert indexes == {
+        "ix_test_scoped_row_user_id_id": ["user_id", "id"],
+        "ix_test_scoped_row_user_id_date": ["user_id", "date"],
+    }
+
+
+async def test_reads_only_see_own_rows(
+    engine: AsyncEngine, session: AsyncSession
+) -> None:
+    """Another user's row is invisible to every read, and no read scans the table."""
+    [bob_row, *_] = await scoped.list_all(session, _ScopedRow, BOB)
+    async with forbid_full_scans(engine) as explained:
+        assert await scoped.get_by_id(session, _ScopedRow, ALICE, bob_row.id) is None
+        rows = await scoped.list_all(session, _ScopedRow, ALICE)
+        page, cursor = await scoped.list_page(session, _ScopedRow, ALICE, limit=2)
+        rest, _ = await scoped.list_page(session, _ScopedRow, ALICE, after=cursor)
+        streamed = [
+            row
+            async for batch in scoped.stream_all(session, _ScopedRow, ALICE, 2)
+            for row in batch
+        ]
+    assert len(explained) == 5
+    assert [row.name for row in rows] == ["a0", "a1", "a2"]
+    assert [row.name for row in page + rest] == ["a0", "a1", "a2"]
+    assert [row.name for row in streamed] == ["a0", "a1", "a2"]
+
+
+async def test_writes_cannot_touch_other_users_rows(session: AsyncSession) -> None:
+    """update / upsert on a foreign row raise; deletes skip foreign ids."""
+    [bob_row, *_] = await scoped.list_all(session, _ScopedRow, BOB)
+    with pytest.raises(scoped.ScopeError):
+        await scoped.update(session, ALICE, bob_row)
+    with pytest.raises(scoped.ScopeError):
+        await scoped.upsert_many(session, ALICE, [bob_row])
+    bob_row.user_id = ALICE
+    with pytest.raises(scoped.ScopeError):
+        await scoped.update(session, ALICE, bob_row)
+    await session.refresh(bob_row)
+    assert bob_row.user_id == BOB
+
+    alice_ids = [row.id for row in await scoped.list_all(session, _ScopedRow, ALICE)]
+    assert await scoped.delete_by_id(session, _ScopedRow, ALICE, bob_row.id) is None
+    deleted = await scoped.delete_many(
+        session, _ScopedRow, ALICE, [*alice_ids[:2], bob_row.id]
+    )
+    assert deleted == 2
+    assert len(await scoped.list_all(session, _ScopedRow, BOB)) == 2
+
+
+async def test_own_rows_update_and_upsert(session: AsyncSession) -> None:
+    """The owner can update and upsert; new upserted rows get the owner's id."""
+    [row, *_] = await scoped.list_all(session, _ScopedRow, ALICE)
+    row.name = "renamed"
+    assert (await scoped.update(session, ALICE, row)).name == "renamed"
+    new = _ScopedRow(name="new", date=date(2026, 3, 2), user_id="")
+    await scoped.upsert_many(session, ALICE, [row, new])
+    names = {r.name for r in await scoped.list_all(session, _ScopedRow, ALICE)}
+    assert names == {"renamed", "a1", "a2", "new"}
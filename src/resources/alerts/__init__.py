@@ -0,0 +1 @@
+# Alerts: rules, set-based trigger scans, and deduplicated email deliveries.
@@ -0,0 +1,170 @@
+"""
+Alert evaluation: scan triggers, claim deliveries, send them through the SMTP pool.
+
+One pass runs a fixed number of set-based scans (one per due-date table plus one
+for budgets), claims every hit as a pending delivery in a single insert, then
+sends pending and retryable deliveries in pages of SEND_BATCH_SIZE, concurrently
+up to the pool's size. Claiming before sending means a crash mid-pass leaves
+pending rows that the next pass picks up. Delivery is at-least-once: a crash
+after an email went out but before its result was recorded sends it again.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from typing import Any
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import db
+from src.ext.mail import SMTPPool
+from src.resources._base.ids import ulid_batch
+from src.resources.alerts import repository
+from src.resources.alerts.models import AlertDelivery, DeliveryState
+
+# MonthlyRollup kind that budget limits are checked against.
+BUDGET_ROLLUP_KIND = "debt"
+MAX_ATTEMPTS = 3
+SEND_BATCH_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PassResult:
+    """Counts from one evaluation pass."""
+
+    claimed: int = 0
+    sent: int = 0
+    failed: int = 0
+
+
+def _cents(value: int) -> str:
+    return f"{value / 100:.2f}"
+
+
+def _due_delivery(row: Any, today: date) -> dict[str, Any]:
+    rule_id, email, reference, due, amount, description = row
+    days = (due - today).days
+    when = "today" if days == 0 else f"in {days} day{'s' if days != 1 else ''}"
+    return {
+        "rule_id": rule_id,
+        "email": email,
+        "reference": reference,
+        "period": due.isoformat(),
+        "subject": f"Debt due {when}: {description}"[:255],
+        "body": f"{description}\nAmount: {amount}\nDue date: {due.isoformat()}\n",
+    }
+
+
+def _budget_delivery(row: Any, month: str) -> dict[str, Any]:
+    rule_id, email, category_id, limit_cents, threshold_pct, total_cents = row
+    used = total_cents * 100 // limit_cents if limit_cents else 0
+    category = category_id or "Uncategorized"
+    return {
+        "rule_id": rule_id,
+        "email": email,
+        "reference": category_id,
+        "period": month,
+        "subject": f"Budget alert: {category} reached {threshold_pct}%"[:255],
+        "body": (
+            f"Category: {category}\nSpent in {month}: {_cents(total_cents)}\n"
+            f"Budget limit: {_cents(limit_cents)}\nUsed: {used}%\n"
+        ),
+    }
+
+
+async def claim_triggers(session: AsyncSession, today: date) -> int:
+    """Scan every trigger and claim the hits as pending deliveries. Return hits."""
+    deliveries: list[dict[str, Any]] = []
+    horizon = await repository.max_days_before(session)
+    if horizon is not None:
+        for model in repository.due_models():
+            rows = await repository.due_triggers(session, model, today, horizon)
+            deliveries.extend(_due_delivery(row, today) for row in rows)
+    month = f"{today.year:04d}-{today.month:02d}"
+    rows = await repository.budget_triggers(session, month, BUDGET_ROLLUP_KIND)
+    deliveries.extend(_budget_delivery(row, month) for row in rows)
+    now = datetime.now(UTC)
+    for delivery, delivery_id in zip(
+        deliveries, ulid_batch(len(deliveries)), strict=True
+    ):
+        delivery.update(id=delivery_id, created_at=now, updated_at=now)
+    await repository.claim(session, deliveries)
+    return len(deliveries)
+
+
+async def _attempt(pool: SMTPPool, delivery: AlertDelivery) -> dict[str, Any]:
+    message = pool.message(delivery.email, delivery.subject, delivery.body)
+    attempts = delivery.attempts + 1
+    now = datetime.now(UTC)
+    try:
+        await pool.send(message)
+    except Exception as exc:
+        logger.warning(
+            "Alert delivery %s to %s failed (attempt %d): %s",
+            delivery.id,
+            delivery.email,
+            attempts,
+            exc,
+        )
+        return {
+            "id": delivery.id,
+            "state": DeliveryState.FAILED,
+            "attempts": attempts,
+            "error": f"{type(exc).__name__}: {exc}"[:255],
+            "updated_at": now,
+        }
+    return {
+        "id": delivery.id,
+        "state": DeliveryState.SENT,
+        "attempts": attempts,
+        "sent_at": now,
+        "error": "",
+        "updated_at": now,
+    }
+
+
+async def send_pending(session: AsyncSession, pool: SMTPPool) -> tuple[int, int]:
+    """Send pending and retryable deliveries. Return (sent, failed)."""
+    sent = failed = 0
+    after: str | None = None
+    while page := await repository.sendable(
+        session, MAX_ATTEMPTS, after, SEND_BATCH_SIZE
+    ):
+        results = await asyncio.gather(*(_attempt(pool, d) for d in page))
+        await repository.record_attempts(session, list(results))
+        outcomes = [result["state"] == DeliveryState.SENT for result in results]
+        sent += sum(outcomes)
+        failed += len(outcomes) - sum(outcomes)
+        after = page[-1].id
+    return sent, failed
+
+
+async def evaluate(
+    session: AsyncSession, pool: SMTPPool, today: date | None = None
+) -> PassResult:
+    """One full pass: claim new triggers for today, then send what is pending."""
+    claimed = await claim_triggers(session, today or date.today())
+    sent, failed = await send_pending(session, pool)
+    if claimed or sent or failed:
+        logger.info("Alerts: %d claimed, %d sent, %d failed", claimed, sent, failed)
+    return PassResult(claimed=claimed, sent=sent, failed=failed)
+
+
+async def run_pass(pool: SMTPPool) -> None:
+    """Scheduler entry point: evaluate on a fresh session of the default engine."""
+    async with db.get_sessionmaker()() as session:
+        await evaluate(session, pool)
+
+
+__all__ = [
+    "BUDGET_ROLLUP_KIND",
+    "MAX_ATTEMPTS",
+    "PassResult",
+    "claim_triggers",
+    "evaluate",
+    "run_pass",
+    "send_pending",
+]
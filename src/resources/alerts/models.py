@@ -0,0 +1,66 @@
+"""
+Alert models: what to watch (AlertRule) and what was sent (AlertDelivery).
+
+A delivery is unique per (rule, reference, period): the reference is the debt id
+or category id, the period the due date or month. That constraint is what keeps
+an alert from being sent twice, however many passes or workers see the trigger.
+"""
+
+from datetime import datetime
+from enum import StrEnum
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field
+
+from src.resources._base.models import BaseTable, IdentityCacheSpec
+
+
+class AlertKind(StrEnum):
+    UPCOMING_DEBT = "upcoming_debt"
+    BUDGET_LIMIT = "budget_limit"
+
+
+class DeliveryState(StrEnum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class AlertRule(BaseTable, table=True):
+    """One alert setting.
+
+    Upcoming-debt rules use days_before. Budget rules use category_id ("" for
+    uncategorized), limit_cents and threshold_pct (e.g. 80 and 100).
+    """
+
+    __tablename__ = "alert_rule"  # pyright: ignore[reportAssignmentType]
+    __identity_cache__ = IdentityCacheSpec()
+
+    kind: AlertKind = Field(index=True)
+    email: str = Field(max_length=255)
+    enabled: bool = True
+    days_before: int | None = None
+    category_id: str | None = Field(default=None, max_length=26)
+    limit_cents: int | None = None
+    threshold_pct: int | None = None
+
+
+class AlertDelivery(BaseTable, table=True):
+    """One alert email: claimed as pending, then marked sent or failed."""
+
+    __tablename__ = "alert_delivery"  # pyright: ignore[reportAssignmentType]
+    __table_args__ = (UniqueConstraint("rule_id", "reference", "period"),)
+
+    rule_id: str = Field(foreign_key="alert_rule.id", max_length=26)
+    reference: str = Field(max_length=64)
+    period: str = Field(max_length=10)
+    state: DeliveryState = Field(default=DeliveryState.PENDING, index=True)
+    email: str = Field(max_length=255)
+    subject: str = Field(max_length=255)
+    body: str = ""
+    attempts: int = 0
+    sent_at: datetime | None = None
+    error: str = Field(default="", max_length=255)
+
+
+__all__ = ["AlertDelivery", "AlertKind", "AlertRule", "DeliveryState"]
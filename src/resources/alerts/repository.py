@@ -0,0 +1,184 @@
+"""
+Alert repository: set-based trigger scans, delivery claims and results.
+
+Each scan is one query joining every enabled rule against its source table, with
+already-claimed (rule, reference, period) triples excluded by NOT EXISTS; the
+query count per pass does not grow with the number of rules, debts or users.
+"""
+
+from collections.abc import Sequence
+from datetime import date, timedelta
+from typing import Any
+
+from sqlalchemy import Row, String, and_, cast, exists, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import col, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import cache
+from src.resources._base import stamps
+from src.resources._base.models import BaseTable, MonthlyRollup
+from src.resources.alerts.models import (
+    AlertDelivery,
+    AlertKind,
+    AlertRule,
+    DeliveryState,
+)
+
+
+def due_models() -> list[type[BaseTable]]:
+    """Every table model that declares a DueSpec."""
+    found: list[type[BaseTable]] = []
+    pending: list[type[BaseTable]] = [BaseTable]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if cls.__due__ is not None and hasattr(cls, "__table__"):
+            found.append(cls)
+    return found
+
+
+def _not_claimed(reference: Any, period: Any) -> Any:
+    return ~exists().where(
+        col(AlertDelivery.rule_id) == col(AlertRule.id),
+        col(AlertDelivery.reference) == reference,
+        col(AlertDelivery.period) == period,
+    )
+
+
+async def max_days_before(session: AsyncSession) -> int | None:
+    """Largest days_before among enabled upcoming-debt rules, or None if none."""
+    statement = select(func.max(AlertRule.days_before)).where(
+        col(AlertRule.kind) == AlertKind.UPCOMING_DEBT, col(AlertRule.enabled)
+    )
+    result = await session.exec(statement)
+    return result.one()
+
+
+async def due_triggers(
+    session: AsyncSession, model: type[BaseTable], today: date, horizon: int
+) -> Sequence[Row[Any]]:
+    """Unpaid rows of model due within days_before days of today, per rule.
+
+    A window rather than the exact day, so a debt is still found when no pass ran
+    on that day (downtime, a lease held past midnight); the claim per (rule,
+    reference, due date) keeps later passes from sending it again.
+    Rows: (rule_id, email, reference, due, amount, description). Only rows due
+    within horizon days are read, so the scan is bounded by the largest setting.
+    """
+    spec = model.__due__
+    assert spec is not None
+    table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    due = table.c[spec.due_field]
+    days_until = func.julianday(due) - func.julianday(today.isoformat())
+    statement = (
+        select(
+            col(AlertRule.id),
+            col(AlertRule.email),
+            table.c.id,
+            due,
+            table.c[spec.amount_field],
+            table.c[spec.description_field],
+        )
+        .join(table, days_until.between(0, col(AlertRule.days_before)))
+        .where(
+            col(AlertRule.kind) == AlertKind.UPCOMING_DEBT,
+            col(AlertRule.enabled),
+            due.between(today, today + timedelta(days=horizon)),
+            table.c[spec.paid_field].is_(False),
+            _not_claimed(table.c.id, cast(due, String)),
+        )
+    )
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    return result.all()
+
+
+async def budget_triggers(
+    session: AsyncSession, month: str, kind: str
+) -> Sequence[Row[Any]]:
+    """Budget rules whose category total for month reached their threshold.
+
+    Rows: (rule_id, email, category_id, limit_cents, threshold_pct, total_cents).
+    """
+    statement = (
+        select(
+            col(AlertRule.id),
+            col(AlertRule.email),
+            col(AlertRule.category_id),
+            col(AlertRule.limit_cents),
+            col(AlertRule.threshold_pct),
+            col(MonthlyRollup.total_cents),
+        )
+        .join(
+            MonthlyRollup,
+            and_(
+                col(MonthlyRollup.category_id) == col(AlertRule.category_id),
+                col(MonthlyRollup.month) == month,
+                col(MonthlyRollup.kind) == kind,
+            ),
+        )
+        .where(
+            col(AlertRule.kind) == AlertKind.BUDGET_LIMIT,
+            col(AlertRule.enabled),
+            col(MonthlyRollup.total_cents) * 100
+            >= col(AlertRule.limit_cents) * col(AlertRule.threshold_pct),
+            _not_claimed(col(AlertRule.category_id), month),
+        )
+    )
+    result = await session.exec(statement)
+    return result.all()
+
+
+async def claim(session: AsyncSession, deliveries: list[dict[str, Any]]) -> None:
+    """Insert pending delivery dicts; triples already claimed are skipped."""
+    if not deliveries:
+        return
+    statement = sqlite_insert(AlertDelivery).on_conflict_do_nothing()
+    await session.exec(statement, params=deliveries)  # type: ignore[call-overload]
+    await stamps.stamp(session, "alert_delivery")
+    await session.commit()
+    cache.bump("alert_delivery")
+
+
+async def sendable(
+    session: AsyncSession,
+    max_attempts: int,
+    after: str | None = None,
+    limit: int = 200,
+) -> list[AlertDelivery]:
+    """Pending or failed deliveries with attempts left, one keyset page by id."""
+    statement = (
+        select(AlertDelivery)
+        .where(
+            col(AlertDelivery.state).in_([DeliveryState.PENDING, DeliveryState.FAILED]),
+            col(AlertDelivery.attempts) < max_attempts,
+        )
+        .order_by(col(AlertDelivery.id))
+        .limit(limit)
+    )
+    if after is not None:
+        statement = statement.where(col(AlertDelivery.id) > after)
+    result = await session.exec(statement)
+    return list(result.all())
+
+
+async def record_attempts(session: AsyncSession, results: list[dict[str, Any]]) -> None:
+    """Write state, attempts, sent_at and error for each delivery id at once."""
+    if not results:
+        return
+    statement = update(AlertDelivery)
+    await session.exec(statement, params=results)  # type: ignore[call-overload]
+    await stamps.stamp(session, "alert_delivery")
+    await session.commit()
+    cache.bump("alert_delivery")
+
+
+__all__ = [
+    "budget_triggers",
+    "claim",
+    "due_models",
+    "due_triggers",
+    "max_days_before",
+    "record_attempts",
+    "sendable",
+]
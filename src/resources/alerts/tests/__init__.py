@@ -0,0 +1 @@
+# Alerts resource tests.
@@ -0,0 +1,206 @@
+"""Tests for alert evaluation against the local SMTP stand-in."""
+
+from collections.abc import AsyncGenerator
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.ext.mail import LocalSMTPServer, SMTPPool
+from src.resources._base.models import BaseTable, DueSpec, MonthlyRollup
+from src.resources.alerts import logic
+from src.resources.alerts.models import (
+    AlertDelivery,
+    AlertKind,
+    AlertRule,
+    DeliveryState,
+)
+
+TODAY = date(2026, 3, 10)
+
+
+# Stand-in for the Debt resource: any table declaring a DueSpec is scanned.
+class _TestDebt(BaseTable, table=True):
+    __tablename__ = "test_alert_debt"  # pyright: ignore[reportAssignmentType]
+    __due__ = DueSpec()
+
+    description: str = Field(max_length=255)
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    due_date: date
+    paid: bool = False
+
+
+@pytest.fixture
+async def engine() -> AsyncGenerator[AsyncEngine]:
+    """In-memory DB with every table created."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session(engine: AsyncEngine) -> AsyncGenerator[AsyncSession]:
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+
+
+@pytest.fixture
+async def smtp() -> AsyncGenerator[LocalSMTPServer]:
+    """Local SMTP stand-in that refuses mail to broken@example.com."""
+    async with LocalSMTPServer(reject=frozenset({"broken@example.com"})) as server:
+        yield server
+
+
+@pytest.fixture
+async def pool(smtp: LocalSMTPServer) -> AsyncGenerator[SMTPPool]:
+    pool = SMTPPool(smtp.host, smtp.port, "alerts@example.com", size=2)
+    yield pool
+    await pool.close()
+
+
+async def _deliveries(session: AsyncSession) -> list[AlertDelivery]:
+    result = await session.exec(select(AlertDelivery))
+    return list(result.all())
+
+
+async def test_upcoming_debt_is_sent_once(
+    session: AsyncSession, smtp: LocalSMTPServer, pool: SMTPPool
+) -> None:
+    """A debt due in days_before days is mailed once; paid or later ones are not."""
+    rule = AlertRule(kind=AlertKind.UPCOMING_DEBT, email="me@x.com", days_before=3)
+    session.add(rule)
+    session.add_all(
+        [
+            _TestDebt(
+                description="Rent",
+                amount=Decimal("1500.00"),
+                due_date=TODAY + timedelta(days=3),
+            ),
+            _TestDebt(
+                description="Paid already",
+                amount=Decimal("10.00"),
+                due_date=TODAY + timedelta(days=3),
+                paid=True,
+            ),
+            _TestDebt(
+                description="Later",
+                amount=Decimal("10.00"),
+                due_date=TODAY + timedelta(days=4),
+            ),
+        ]
+    )
+    await session.commit()
+
+    result = await logic.evaluate(session, pool, TODAY)
+    assert (result.claimed, result.sent, result.failed) == (1, 1, 0)
+    assert [m["Subject"] for m in smtp.messages] == ["Debt due in 3 days: Rent"]
+    assert "Amount: 1500.00" in smtp.messages[0].get_content()
+
+    again = await logic.evaluate(session, pool, TODAY)
+    assert (again.claimed, again.sent) == (0, 0)
+    assert len(smtp.messages) == 1
+
+
+async def test_upcoming_debt_missed_on_its_day_is_sent_later(
+    session: AsyncSession, smtp: LocalSMTPServer, pool: SMTPPool
+) -> None:
+    """No pass ran days_before days ahead: the next one still mails it, once."""
+    rule = AlertRule(kind=AlertKind.UPCOMING_DEBT, email="me@x.com", days_before=3)
+    due = TODAY + timedelta(days=1)
+    session.add(rule)
+    session.add(_TestDebt(description="Rent", amount=Decimal("9.00"), due_date=due))
+    await session.commit()
+
+    result = await logic.evaluate(session, pool, TODAY)
+    assert (result.claimed, result.sent) == (1, 1)
+    assert [m["Subject"] for m in smtp.messages] == ["Debt due in 1 day: Rent"]
+    later = await logic.evaluate(session, pool, due)
+    assert later.claimed == 0 and len(smtp.messages) == 1
+
+
+async def test_budget_threshold_crossing(
+    session: AsyncSession, smtp: LocalSMTPServer, pool: SMTPPool
+) -> None:
+    """Only thresholds the month's total reached fire, once per month."""
+    for pct in (80, 100):
+        session.add(
+            AlertRule(
+                kind=AlertKind.BUDGET_LIMIT,
+                email="me@x.com",
+                category_id="food",
+                limit_cents=100_000,
+                threshold_pct=pct,
+            )
+        )
+    session.add(
+        MonthlyRollup(
+            month="2026-03",
+            category_id="food",
+            kind=logic.BUDGET_ROLLUP_KIND,
+            total_cents=85_000,
+            row_count=4,
+        )
+    )
+    await session.commit()
+
+    result = await logic.evaluate(session, pool, TODAY)
+    assert (result.claimed, result.sent) == (1, 1)
+    assert smtp.messages[0]["Subject"] == "Budget alert: food reached 80%"
+    assert "Used: 85%" in smtp.messages[0].get_content()
+    assert (await logic.evaluate(session, pool, TODAY)).claimed == 0
+
+
+async def test_failed_delivery_is_logged_and_retried(
+    session: AsyncSession, pool: SMTPPool
+) -> None:
+    """A refused delivery is recorded as failed and retried up to MAX_ATTEMPTS."""
+    email = "broken@example.com"
+    session.add(AlertRule(kind=AlertKind.UPCOMING_DEBT, email=email, days_before=0))
+    session.add(_TestDebt(description="Card", amount=Decimal("1"), due_date=TODAY))
+    await session.commit()
+
+    for _ in range(logic.MAX_ATTEMPTS + 1):
+        await logic.evaluate(session, pool, TODAY)
+    [delivery] = await _deliveries(session)
+    assert delivery.state == DeliveryState.FAILED
+    assert delivery.attempts == logic.MAX_ATTEMPTS
+    assert "SMTPRecipientsRefused" in delivery.error
+
+
+async def test_query_count_does_not_grow_with_rules(
+    engine: AsyncEngine, session: AsyncSession
+) -> None:
+    """Claiming triggers costs the same queries for 1 rule as for 50."""
+    statements: list[str] = []
+
+    def _count(*args: Any) -> None:
+        statements.append(args[2])
+
+    async def claim_queries(rules: int, offset: int) -> int:
+        session.add_all(
+            AlertRule(kind=AlertKind.UPCOMING_DEBT, email=f"u{i}@x.com", days_before=1)
+            for i in range(offset, offset + rules)
+        )
+        session.add_all(
+            _TestDebt(description=str(i), amount=Decimal("1"), due_date=TODAY)
+            for i in range(rules)
+        )
+        await session.commit()
+        statements.clear()
+        event.listen(engine.sync_engine, "before_cursor_execute", _count)
+        await logic.claim_triggers(session, TODAY - timedelta(days=1))
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+        return len(statements)
+
+    few = await claim_queries(1, 0)
+    many = await claim_queries(50, 1)
+    assert few == many
+    assert len(await _deliveries(session)) == 51 * 51
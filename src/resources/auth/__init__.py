@@ -0,0 +1 @@
+# Auth: users, password login, and signed session cookies.
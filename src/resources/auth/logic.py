@@ -0,0 +1,173 @@
+"""
+Auth logic: accounts, login, and verifying the session cookie on each request.
+
+The cookie is `<session id>.<expiry>.<signature>`, an HMAC-SHA256 over the first
+two parts with auth_secret_key. authenticate() rejects a forged or expired token
+without touching the database. Otherwise it needs to know only whether the
+session was revoked, and reads that through get_by_id on the identity-cached
+AuthSession. Most requests are answered from process memory that way. revoke()
+updates the row through the base repository, which evicts it here and moves the
+table's cache_stamp, so every other worker drops its copy within
+identity_cache_stamp_seconds.
+
+Password hashing and checks go through src.ext.passwords and never run on the
+event loop. When its queue is full they raise HasherBusyError rather than wait.
+
+    python -m src.resources.auth.logic you@example.com
+
+creates (or resets the password of) an account, prompting for the password.
+"""
+
+import asyncio
+import base64
+import getpass
+import hashlib
+import hmac
+import logging
+import secrets
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.passwords import get_hasher
+from src.ext.settings import get_settings
+from src.resources._base import repository as base_repo
+from src.resources.auth import repository
+from src.resources.auth.models import AuthSession, User
+
+logger = logging.getLogger(__name__)
+
+_process_key: bytes | None = None
+
+
+def _key() -> bytes:
+    global _process_key
+    configured = get_settings().auth_secret_key
+    if configured:
+        return configured.encode()
+    if _process_key is None:
+        # python -m src.serve shares one key with all its workers; this fallback
+        # is for a single dev process.
+        logger.warning(
+            "AUTH_SECRET_KEY is not set; using a random key for this process only, "
+            "so its sessions end on restart and no other worker accepts them"
+        )
+        _process_key = secrets.token_bytes(32)
+    return _process_key
+
+
+def _signature(payload: str) -> str:
+    digest = hmac.new(_key(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def sign(session_id: str, expires: int) -> str:
+    """The cookie value for session_id, valid until expires (Unix seconds)."""
+    payload = f"{session_id}.{expires}"
+    return f"{payload}.{_signature(payload)}"
+
+
+def unsign(token: str) -> str | None:
+    """The session id in token if its signature holds and it has not expired."""
+    payload, _, signature = token.rpartition(".")
+    session_id, _, expires = payload.partition(".")
+    if not hmac.compare_digest(signature, _signature(payload)):
+        return None
+    if not expires.isdigit() or int(expires) <= time.time():
+        return None
+    return session_id
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().casefold()
+
+
+async def set_password(session: AsyncSession, email: str, password: str) -> User:
+    """Create the account for email, or replace its password if it exists."""
+    email = normalize_email(email)
+    password_hash = await get_hasher().hash(password)
+    user = await repository.get_user_by_email(session, email)
+    if user is None:
+        return await base_repo.add(
+            session, User(email=email, password_hash=password_hash)
+        )
+    user.password_hash = password_hash
+    return await base_repo.update(session, user)
+
+
+async def login(
+    session: AsyncSession, email: str, password: str
+) -> tuple[AuthSession, str] | None:
+    """A new session and its cookie value, or None if the credentials are wrong.
+
+    An unknown email costs the same hash check as a wrong password.
+    """
+    hasher = get_hasher()
+    user = await repository.get_user_by_email(session, normalize_email(email))
+    stored = None if user is None else user.password_hash
+    matched = await hasher.verify(password, stored)
+    if user is None or not matched:
+        return None
+    if hasher.needs_rehash(user.password_hash):
+        user.password_hash = await hasher.hash(password)
+        await base_repo.update(session, user)
+    lifetime = timedelta(days=get_settings().auth_session_days)
+    expires_at = datetime.now(UTC) + lifetime
+    auth = await base_repo.add(
+        session, AuthSession(user_id=user.id, expires_at=expires_at)
+    )
+    return auth, sign(auth.id, int(expires_at.timestamp()))
+
+
+async def authenticate(session: AsyncSession, token: str) -> AuthSession | None:
+    """The live session token was issued for, or None."""
+    session_id = unsign(token)
+    if session_id is None:
+        return None
+    auth = await base_repo.get_by_id(session, AuthSession, session_id)
+    if auth is None or auth.revoked_at is not None:
+        return None
+    return auth
+
+
+async def revoke(session: AsyncSession, auth: AuthSession) -> None:
+    """End auth on every worker (within identity_cache_stamp_seconds)."""
+    auth.revoked_at = datetime.now(UTC)
+    await base_repo.update(session, auth)
+
+
+async def logout(session: AsyncSession, token: str) -> bool:
+    """Revoke the session token was issued for. False if it was not live."""
+    auth = await authenticate(session, token)
+    if auth is None:
+        return False
+    await revoke(session, auth)
+    return True
+
+
+async def _main(email: str) -> None:
+    from src.ext import db, passwords
+
+    password = getpass.getpass(f"Password for {email}: ")
+    async with AsyncSession(db.get_engine()) as session:
+        await set_password(session, email, password)
+    passwords.close()
+    await db.dispose_engines()
+
+
+__all__ = [
+    "authenticate",
+    "login",
+    "logout",
+    "normalize_email",
+    "revoke",
+    "set_password",
+    "sign",
+    "unsign",
+]
+
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1]))
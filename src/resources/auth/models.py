@@ -0,0 +1,36 @@
+"""
+Auth models: the people who can log in (User) and their logins (AuthSession).
+
+An AuthSession is one signed-in browser. The cookie carries its id, signed, so
+the row is only read to learn whether it was revoked; it is identity-cached, so
+most requests skip even that read (see src.resources.auth.logic).
+"""
+
+from datetime import datetime
+
+from sqlmodel import Field
+
+from src.resources._base.models import BaseTable, IdentityCacheSpec
+
+
+class User(BaseTable, table=True):
+    """An account: a login email and its scrypt password hash."""
+
+    __tablename__ = "user_account"  # pyright: ignore[reportAssignmentType]
+
+    email: str = Field(max_length=255, unique=True)
+    password_hash: str = Field(max_length=255)
+
+
+class AuthSession(BaseTable, table=True):
+    """One login of a user, until it expires or is revoked (logout)."""
+
+    __tablename__ = "auth_session"  # pyright: ignore[reportAssignmentType]
+    __identity_cache__ = IdentityCacheSpec(ttl=60.0, max_entries=4096)
+
+    user_id: str = Field(foreign_key="user_account.id", index=True, max_length=26)
+    expires_at: datetime
+    revoked_at: datetime | None = None
+
+
+__all__ = ["AuthSession", "User"]
@@ -0,0 +1,21 @@
+"""
+Auth repository: user lookup by login email.
+
+Users and sessions are otherwise read and written through the base helpers
+(src.resources._base.repository); get_by_id on AuthSession is identity-cached.
+"""
+
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.resources.auth.models import User
+
+
+async def get_user_by_email(session: AsyncSession, email: str) -> User | None:
+    """The user whose login is email (already normalized), or None."""
+    statement = select(User).where(col(User.email) == email)
+    result = await session.exec(statement)
+    return result.first()
+
+
+__all__ = ["get_user_by_email"]
@@ -0,0 +1,103 @@
+"""Auth routes: login form, login, logout, and the current-session dependencies."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import get_read_session, get_session
+from src.ext.passwords import HasherBusyError
+from src.ext.settings import get_settings
+from src.ext.templates import templates
+from src.resources.auth import logic
+from src.resources.auth.models import AuthSession
+
+router = APIRouter(prefix='/auth', tags=['Auth'])
+
+COOKIE_NAME = 'session'
+
+
+async def current_session(
+    request: Request, session: Annotated[AsyncSession, Depends(get_read_session)]
+) -> AuthSession | None:
+    """The request's live login, or None; usually answered without a query.
+
+    Leaves the user's id in request.state.user_id, which keys the response cache.
+    """
+    token = request.cookies.get(COOKIE_NAME)
+    if not token:
+        return None
+    auth = await logic.authenticate(session, token)
+    if auth is not None:
+        request.state.user_id = auth.user_id
+    return auth
+
+
+async def require_session(
+    auth: Annotated[AuthSession | None, Depends(current_session)],
+) -> AuthSession:
+    """Like current_session, but a request without a live login is a 401."""
+    if auth is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return auth
+
+
+def _login_page(request: Request, error: str = '', status_code: int = 200) -> Response:
+    return templates.TemplateResponse(
+        request=request,
+        name='auth/login.html',
+        context={'error': error, 'active_page': 'login'},
+        status_code=status_code,
+    )
+
+
+@router.get('/login', response_class=HTMLResponse)
+async def login_page(request: Request) -> Response:
+    return _login_page(request)
+
+
+@router.post('/login', response_class=HTMLResponse)
+async def login(
+    request: Request,
+    email: Annotated[str, Form()],
+    password: Annotated[str, Form()],
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> Response:
+    try:
+        result = await logic.login(session, email, password)
+    except HasherBusyError as exc:
+        # A burst of logins is turned away rather than queued behind the hasher.
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many logins right now, try again in a moment.',
+            headers={'Retry-After': '1'},
+        ) from exc
+    if result is None:
+        return _login_page(
+            request, 'Wrong email or password.', status.HTTP_401_UNAUTHORIZED
+        )
+    _, token = result
+    settings = get_settings()
+    response = RedirectResponse('/', status_code=status.HTTP_303_SEE_OTHER)
+    response.set_cookie(
+        COOKIE_NAME,
+        token,
+        max_age=settings.auth_session_days * 24 * 60 * 60,
+        httponly=True,
+        secure=settings.auth_cookie_secure,
+        samesite='lax',
+    )
+    return response
+
+
+@router.post('/logout')
+async def logout(
+    request: Request, session: Annotated[AsyncSession, Depends(get_session)]
+) -> Response:
+    token = request.cookies.get(COOKIE_NAME)
+    if token:
+        await logic.logout(session, token)
+    response = RedirectResponse('/auth/login', status_code=status.HTTP_303_SEE_OTHER)
+    response.delete_cookie(COOKIE_NAME)
+    return response
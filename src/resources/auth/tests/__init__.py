@@ -0,0 +1 @@
+# Auth resource tests.
@@ -0,0 +1,80 @@
+"""Tests for auth logic: login, signed tokens, cached checks and revocation."""
+
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import passwords
+from src.ext.db import build_engine
+from src.ext.settings import get_settings
+from src.resources._base import identity
+from src.resources.auth import logic
+
+
+@pytest.fixture
+async def session(monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[AsyncSession]:
+    """Async session with in-memory DB and all tables; cheap hashes, fixed key."""
+    monkeypatch.setattr(get_settings(), "auth_scrypt_n", 2**10)
+    monkeypatch.setattr(get_settings(), "auth_secret_key", "test-key")
+    passwords.close()
+    identity.clear()
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+    await engine.dispose()
+    passwords.close()
+    identity.clear()
+
+
+async def test_login_checks_the_password(session: AsyncSession) -> None:
+    """Only the right password for a known email starts a session."""
+    await logic.set_password(session, " Ana@Example.com ", "s3cret")
+    assert await logic.login(session, "ana@example.com", "wrong") is None
+    assert await logic.login(session, "bob@example.com", "s3cret") is None
+    result = await logic.login(session, "ANA@example.com", "s3cret")
+    assert result is not None
+    auth, token = result
+    assert logic.unsign(token) == auth.id
+
+
+async def test_forged_and_expired_tokens_are_rejected(session: AsyncSession) -> None:
+    """A token must carry our signature and a future expiry."""
+    future = int(time.time()) + 60
+    token = logic.sign("01HSESSION0000000000000000", future)
+    assert logic.unsign(token) == "01HSESSION0000000000000000"
+    assert logic.unsign(token[:-1] + ("A" if token[-1] != "A" else "B")) is None
+    assert logic.unsign(token.replace(str(future), str(future + 1))) is None
+    assert logic.unsign(logic.sign("01HSESSION0000000000000000", 1)) is None
+    assert logic.unsign("garbage") is None
+
+
+async def test_checks_are_cached_until_logout(session: AsyncSession) -> None:
+    """Repeat checks skip the database; logout ends the session at once."""
+    await logic.set_password(session, "ana@example.com", "s3cret")
+    result = await logic.login(session, "ana@example.com", "s3cret")
+    assert result is not None
+    _, token = result
+    selects: list[str] = []
+
+    def record(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        if statement.startswith("SELECT"):
+            selects.append(statement)
+
+    engine = session.bind.sync_engine  # pyright: ignore[reportAttributeAccessIssue]
+    event.listen(engine, "before_cursor_execute", record)
+    assert await logic.authenticate(session, token) is not None
+    queries = len(selects)
+    for _ in range(3):
+        assert await logic.authenticate(session, token) is not None
+    assert len(selects) == queries
+
+    assert await logic.logout(session, token)
+    assert await logic.authenticate(session, token) is None
+    assert not await logic.logout(session, token)
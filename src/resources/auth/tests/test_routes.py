@@ -0,0 +1,106 @@
+"""Tests for auth routes: login form, session cookie, logout."""
+
+from collections.abc import AsyncGenerator, Generator
+from typing import Annotated
+
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import passwords
+from src.ext.db import build_engine, get_read_session, get_session
+from src.ext.settings import get_settings
+from src.main import app
+from src.resources._base import identity
+from src.resources.auth import logic
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import current_session, require_session
+
+
+@app.get('/_test_whoami')
+async def _whoami(
+    auth: Annotated[AuthSession | None, Depends(current_session)],
+) -> str:
+    return auth.user_id if auth is not None else ''
+
+
+@app.get('/_test_private')
+async def _private(auth: Annotated[AuthSession, Depends(require_session)]) -> str:
+    return auth.user_id
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> Generator[TestClient]:
+    """Client on a fresh in-memory DB holding one account, over plain http."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, 'auth_scrypt_n', 2**10)
+    monkeypatch.setattr(settings, 'auth_secret_key', 'test-key')
+    monkeypatch.setattr(settings, 'auth_cookie_secure', False)
+    passwords.close()
+    identity.clear()
+    engine = build_engine('sqlite+aiosqlite:///:memory:')
+    ready = False
+
+    async def _session() -> AsyncGenerator[AsyncSession]:
+        nonlocal ready
+        async with AsyncSession(engine, expire_on_commit=False) as s:
+            if not ready:
+                async with engine.begin() as conn:
+                    await conn.run_sync(SQLModel.metadata.create_all)
+                await logic.set_password(s, 'ana@example.com', 's3cret')
+                ready = True
+            yield s
+
+    app.dependency_overrides[get_session] = _session
+    app.dependency_overrides[get_read_session] = _session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    passwords.close()
+    identity.clear()
+
+
+def test_login_sets_a_session_cookie_until_logout(client: TestClient) -> None:
+    """Wrong credentials get the form back; right ones a cookie that logs in."""
+    assert 'Log in' in client.get('/auth/login').text
+    wrong = client.post(
+        '/auth/login', data={'email': 'ana@example.com', 'password': 'nope'}
+    )
+    assert wrong.status_code == 401
+    assert 'Wrong email or password' in wrong.text
+    assert client.get('/_test_whoami').json() == ''
+
+    response = client.post(
+        '/auth/login',
+        data={'email': 'ana@example.com', 'password': 's3cret'},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    assert 'httponly' in response.headers['set-cookie'].lower()
+    user_id = client.get('/_test_whoami').json()
+    assert len(user_id) == 26
+    assert client.get('/_test_private').json() == user_id
+
+    token = client.cookies['session']
+    logout = client.post('/auth/logout', follow_redirects=False)
+    assert logout.headers['location'] == '/auth/login'
+    client.cookies.set('session', token)
+    assert client.get('/_test_whoami').json() == ''
+    assert client.get('/_test_private').status_code == 401
+
+
+def test_busy_hasher_is_a_503_with_retry_after(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A login the hasher cannot take now is turned away, not queued."""
+
+    async def busy(*_args: object) -> None:
+        raise passwords.HasherBusyError('busy')
+
+    monkeypatch.setattr(logic, 'login', busy)
+    response = client.post(
+        '/auth/login', data={'email': 'ana@example.com', 'password': 's3cret'}
+    )
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'
@@ -0,0 +1 @@
+# Categories: per-user auto-categorization rules and their compiled matcher.
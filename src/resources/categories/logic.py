@@ -0,0 +1,249 @@
+"""
+Auto-categorization: all of a user's rules compiled into one Matcher.
+
+Each condition kind is one lookup per row (a trie regex for the text patterns, a
+bisect for amounts) answering with a bitmask of the rules it allows; the lowest
+bit of their AND picks the category. Matching ignores case and accents.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.resources.categories import repository
+from src.resources.categories.models import CategoryRule, MatchKind
+from src.resources.imports.models import Direction, Movement
+
+MATCHER_CACHE_SIZE = 256
+_NEVER = re.compile(r"(?!)")
+# Combining diacritics, which NFKD splits off accented letters.
+_MARKS = re.compile("[\u0300-\u036f]+")
+
+
+def fold(text: str) -> str:
+    """text without case or accents, as rules and descriptions are compared."""
+    folded = text.casefold()
+    # Most bank descriptions are plain ASCII and need no decomposition.
+    if folded.isascii():
+        return folded
+    return _MARKS.sub("", unicodedata.normalize("NFKD", folded))
+
+
+def _trie(patterns: Iterable[str]) -> str:
+    """A regex matching the longest of patterns that starts where it is tried.
+
+    Nested by shared prefix, so at each position the engine follows one branch
+    per character instead of trying every pattern in turn.
+    """
+    root: dict[str, dict] = {}
+    for pattern in patterns:
+        node = root
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, dict]) -> str:
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Optional when a pattern ends here: greedy, so longer ones win.
+        return f"(?:{body})?" if "" in node else body
+
+    return build(root)
+
+
+def _closure(masks: dict[str, int], related: str) -> dict[str, int]:
+    """Each pattern's mask OR the masks of the patterns it implies.
+
+    related is "in" (contained in it) or "prefix" (a prefix of it).
+    """
+    closed: dict[str, int] = {}
+    for pattern in masks:
+        mask = 0
+        for other, other_mask in masks.items():
+            implied = (
+                other in pattern if related == "in" else pattern.startswith(other)
+            )
+            if implied:
+                mask |= other_mask
+        closed[pattern] = mask
+    return closed
+
+
+class Matcher:
+    """A user's rules compiled for classify(); build with compile_rules()."""
+
+    __slots__ = (
+        "_amount_bounds",
+        "_amount_masks",
+        "_bank_masks",
+        "_categories",
+        "_contains",
+        "_contains_masks",
+        "_direction_masks",
+        "_no_bank_mask",
+        "_prefix",
+        "_prefix_masks",
+        "_text_mask",
+    )
+
+    def __init__(self, rules: Sequence[CategoryRule]) -> None:
+        self._categories = [rule.category_id for rule in rules]
+        contains: dict[str, int] = {}
+        prefixes: dict[str, int] = {}
+        text_mask = 0
+        banks: dict[str, int] = {}
+        no_bank = 0
+        directions = dict.fromkeys(Direction, 0)
+        for index, rule in enumerate(rules):
+            bit = 1 << index
+            pattern = fold(rule.pattern.strip())
+            if not pattern:
+                text_mask |= bit
+            elif rule.match == MatchKind.PREFIX:
+                prefixes[pattern] = prefixes.get(pattern, 0) | bit
+            else:
+                contains[pattern] = contains.get(pattern, 0) | bit
+            if rule.bank is None:
+                no_bank |= bit
+            else:
+                banks[rule.bank] = banks.get(rule.bank, 0) | bit
+            for direction in directions:
+                if rule.direction in (None, direction):
+                    directions[direction] |= bit
+        self._text_mask = text_mask
+        self._contains_masks = _closure(contains, "in")
+        self._prefix_masks = _closure(prefixes, "prefix")
+        self._contains = (
+            re.compile(f"(?=({_trie(contains)}))") if contains else _NEVER
+        )
+        self._prefix = re.compile(_trie(prefixes)) if prefixes else _NEVER
+        self._no_bank_mask = no_bank
+        self._bank_masks = {bank: mask | no_bank for bank, mask in banks.items()}
+        self._direction_masks = directions
+        self._amount_bounds, self._amount_masks = _segments(rules)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def classify(
+        self, description: str, amount_cents: int, direction: Direction, bank: str
+    ) -> str | None:
+        """The category_id of the first rule matching the movement, or None."""
+        mask = (
+            self._amount_masks[bisect_right(self._amount_bounds, amount_cents)]
+            & self._direction_masks[direction]
+            & self._bank_masks.get(bank, self._no_bank_mask)
+        )
+        if not mask:
+            return None
+        text = fold(description)
+        allowed = self._text_mask
+        for found in self._contains.findall(text):
+            allowed |= self._contains_masks[found]
+        prefix = self._prefix.match(text)
+        if prefix is not None:
+            allowed |= self._prefix_masks[prefix.group()]
+        mask &= allowed
+        if not mask:
+            return None
+        return self._categories[(mask & -mask).bit_length() - 1]
+
+    def classify_many(self, movements: Iterable[Movement]) -> list[str | None]:
+        """classify() for each movement, in order."""
+        classify = self.classify
+        return [
+            classify(m.description, m.amount_cents, m.direction, m.bank)
+            for m in movements
+        ]
+
+
+def _segments(rules: Sequence[CategoryRule]) -> tuple[list[int], list[int]]:
+    """Sorted bounds and the mask of rules allowing amounts in each segment.
+
+    Segment i holds the amounts a with bounds[i-1] <= a < bounds[i].
+    """
+    bounds = sorted(
+        {rule.min_cents for rule in rules if rule.min_cents is not None}
+        | {rule.max_cents + 1 for rule in rules if rule.max_cents is not None}
+    )
+    starts = [bounds[0] - 1 if bounds else 0, *bounds]
+    masks = []
+    for start in starts:
+        mask = 0
+        for index, rule in enumerate(rules):
+            low_ok = rule.min_cents is None or rule.min_cents <= start
+            high_ok = rule.max_cents is None or start <= rule.max_cents
+            if low_ok and high_ok:
+                mask |= 1 << index
+        masks.append(mask)
+    return bounds, masks
+
+
+def compile_rules(rules: Sequence[CategoryRule]) -> Matcher:
+    """A Matcher for rules, which must already be in priority order."""
+    return Matcher(rules)
+
+
+type _RuleKey = tuple[object, ...]
+_matchers: OrderedDict[str, tuple[tuple[_RuleKey, ...], Matcher]] = OrderedDict()
+stats = {"compiles": 0, "hits": 0}
+
+
+def _key(rule: CategoryRule) -> _RuleKey:
+    return (
+        rule.id,
+        rule.category_id,
+        rule.priority,
+        rule.pattern,
+        rule.match,
+        rule.min_cents,
+        rule.max_cents,
+        rule.direction,
+        rule.bank,
+    )
+
+
+async def matcher_for(session: AsyncSession, user_id: str) -> Matcher:
+    """The user's compiled rules, recompiled only if they changed since last time."""
+    rules = await repository.list_rules(session, user_id)
+    key = tuple(_key(rule) for rule in rules)
+    cached = _matchers.get(user_id)
+    if cached is not None and cached[0] == key:
+        _matchers.move_to_end(user_id)
+        stats["hits"] += 1
+        return cached[1]
+    matcher = compile_rules(rules)
+    stats["compiles"] += 1
+    _matchers[user_id] = (key, matcher)
+    _matchers.move_to_end(user_id)
+    while len(_matchers) > MATCHER_CACHE_SIZE:
+        _matchers.popitem(last=False)
+    return matcher
+
+
+def clear() -> None:
+    """Drop every compiled matcher and reset counters (tests and admin use)."""
+    _matchers.clear()
+    for name in stats:
+        stats[name] = 0
+
+
+__all__ = [
+    "MATCHER_CACHE_SIZE",
+    "Matcher",
+    "clear",
+    "compile_rules",
+    "fold",
+    "matcher_for",
+    "stats",
+]
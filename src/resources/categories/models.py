@@ -0,0 +1,39 @@
+"""
+Category models: the rules that assign a category to an imported movement.
+
+A rule sets any of: a text pattern (contained in, or starting, the description),
+an amount range in cents, a direction, and a bank (the account or card the line
+came from, i.e. its payment method). Every condition it sets must hold; a rule
+that sets none matches everything, which makes a catch-all. Rules are tried in
+ascending priority, ties by id.
+"""
+
+from enum import StrEnum
+
+from sqlmodel import Field
+
+from src.resources._base.models import UserScopedTable
+from src.resources.imports.models import Direction
+
+
+class MatchKind(StrEnum):
+    CONTAINS = "contains"
+    PREFIX = "prefix"
+
+
+class CategoryRule(UserScopedTable, table=True):
+    """One auto-categorization rule of a user; see the module docstring."""
+
+    __tablename__ = "category_rule"  # pyright: ignore[reportAssignmentType]
+
+    category_id: str = Field(max_length=26)
+    priority: int = 100
+    pattern: str = Field(default="", max_length=128)
+    match: MatchKind = MatchKind.CONTAINS
+    min_cents: int | None = None
+    max_cents: int | None = None
+    direction: Direction | None = None
+    bank: str | None = Field(default=None, max_length=32)
+
+
+__all__ = ["CategoryRule", "MatchKind"]
@@ -0,0 +1,24 @@
+"""
+Category repository: a user's rules in the order the matcher tries them.
+
+Rule CRUD goes through the scoped base helpers (src.resources._base.scoped).
+"""
+
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.resources.categories.models import CategoryRule
+
+
+async def list_rules(session: AsyncSession, user_id: str) -> list[CategoryRule]:
+    """Every rule of the user, by ascending priority, ties by id."""
+    statement = (
+        select(CategoryRule)
+        .where(col(CategoryRule.user_id) == user_id)
+        .order_by(col(CategoryRule.priority), col(CategoryRule.id))
+    )
+    result = await session.exec(statement)
+    return list(result.all())
+
+
+__all__ = ["list_rules"]
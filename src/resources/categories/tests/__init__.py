@@ -0,0 +1 @@
+# Categories resource tests.
@@ -0,0 +1,158 @@
+"""Tests for the categorization engine: compiled matching and per-user caching."""
+
+import io
+from collections.abc import AsyncGenerator
+
+import pytest
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.resources._base import scoped
+from src.resources.categories import logic
+from src.resources.categories.models import CategoryRule, MatchKind
+from src.resources.imports import logic as imports_logic
+from src.resources.imports import repository as imports_repo
+from src.resources.imports.models import Direction, RowState
+
+ALICE = "01HALICE0000000000000000AA"
+BOB = "01HBOB000000000000000000BB"
+NUBANK_CSV = (
+    "Data,Valor,Identificador,Descrição\n"
+    "01/03/2026,5000.00,a1,Salário ACME\n"
+    "02/03/2026,-39.90,a2,Netflix.com\n"
+    "03/03/2026,-12.00,a3,Padaria\n"
+)
+
+
+@pytest.fixture
+async def session() -> AsyncGenerator[AsyncSession]:
+    """Async session with in-memory DB and all tables created."""
+    logic.clear()
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+    await engine.dispose()
+
+
+def _rule(category: str, pattern: str = "", **fields: object) -> CategoryRule:
+    return CategoryRule(user_id=ALICE, category_id=category, pattern=pattern, **fields)
+
+
+def _classify(
+    matcher: logic.Matcher,
+    description: str,
+    amount_cents: int = 1000,
+    direction: Direction = Direction.DEBIT,
+    bank: str = "nubank",
+) -> str | None:
+    return matcher.classify(description, amount_cents, direction, bank)
+
+
+def test_first_rule_in_priority_order_wins() -> None:
+    """Overlapping patterns, contained or not, resolve to the earliest rule."""
+    matcher = logic.compile_rules(
+        [
+            _rule("streaming", "netflix"),
+            _rule("online", "netflix.com"),
+            _rule("food", "flix.co"),
+            _rule("uber", "uber"),
+            _rule("eats", "uber eats"),
+        ]
+    )
+    assert _classify(matcher, "NETFLIX.COM assinatura") == "streaming"
+    assert _classify(matcher, "pag*netflix") == "streaming"
+    assert _classify(matcher, "xflix.co") == "food"
+    assert _classify(matcher, "UBER EATS pedido") == "uber"
+    assert _classify(matcher, "mercado") is None
+    reordered = logic.compile_rules([_rule("eats", "uber eats"), _rule("uber", "uber")])
+    assert _classify(reordered, "UBER EATS pedido") == "eats"
+    assert _classify(reordered, "uber trip") == "uber"
+
+
+def test_prefix_rules_anchor_at_the_start() -> None:
+    """A PREFIX rule matches only a description starting with its pattern."""
+    matcher = logic.compile_rules(
+        [
+            _rule("pix-in", "pix recebido", match=MatchKind.PREFIX),
+            _rule("pix", "pix", match=MatchKind.PREFIX),
+        ]
+    )
+    assert _classify(matcher, "PIX recebido de Ana") == "pix-in"
+    assert _classify(matcher, "Pix enviado") == "pix"
+    assert _classify(matcher, "estorno pix") is None
+
+
+def test_amount_direction_and_bank_conditions() -> None:
+    """Every condition a rule sets must hold; unset ones match anything."""
+    matcher = logic.compile_rules(
+        [
+            _rule("big", "mercado", min_cents=50_000),
+            _rule("card", "mercado", bank="itau"),
+            _rule("refund", "mercado", direction=Direction.CREDIT),
+            _rule("small", "", max_cents=999),
+            _rule("other"),
+        ]
+    )
+    assert _classify(matcher, "Mercado", amount_cents=80_000) == "big"
+    assert _classify(matcher, "Mercado", bank="itau") == "card"
+    assert _classify(matcher, "Mercado", direction=Direction.CREDIT) == "refund"
+    assert _classify(matcher, "Padaria", amount_cents=999) == "small"
+    assert _classify(matcher, "Padaria", amount_cents=1000) == "other"
+
+
+def test_matching_ignores_case_and_accents() -> None:
+    """Rules and descriptions are folded the same way before matching."""
+    matcher = logic.compile_rules(
+        [_rule("bakery", "Pão de Açúcar"), _rule("pharmacy", "farmacia")]
+    )
+    assert _classify(matcher, "PAO DE ACUCAR 123") == "bakery"
+    assert _classify(matcher, "Farmácia São João") == "pharmacy"
+    assert len(logic.compile_rules([])) == 0
+    assert _classify(logic.compile_rules([]), "anything") is None
+
+
+async def test_matcher_recompiles_only_when_rules_change(
+    session: AsyncSession,
+) -> None:
+    """Unchanged rules reuse the compiled matcher; an edit or a new rule does not."""
+    rule = await scoped.add(session, ALICE, _rule("transport", "uber"))
+    first = await logic.matcher_for(session, ALICE)
+    assert await logic.matcher_for(session, ALICE) is first
+    assert logic.stats == {"compiles": 1, "hits": 1}
+
+    rule.pattern = "99 taxi"
+    await scoped.update(session, ALICE, rule)
+    edited = await logic.matcher_for(session, ALICE)
+    assert edited is not first
+    assert _classify(edited, "99 TAXI") == "transport"
+    assert _classify(edited, "uber") is None
+
+    await scoped.add(session, BOB, CategoryRule(category_id="bob", pattern="uber"))
+    assert await logic.matcher_for(session, ALICE) is edited
+    assert len(await logic.matcher_for(session, BOB)) == 1
+    assert logic.stats == {"compiles": 3, "hits": 2}
+
+
+async def test_import_stages_rows_with_their_category(session: AsyncSession) -> None:
+    """stage_import() categorizes each row by the importing user's rules."""
+    await scoped.add_many(
+        session,
+        ALICE,
+        [
+            _rule("income", direction=Direction.CREDIT),
+            _rule("streaming", "netflix"),
+        ],
+    )
+    batch = await imports_logic.stage_import(
+        session, io.BytesIO(NUBANK_CSV.encode()), user_id=ALICE
+    )
+    rows = await imports_repo.list_rows(session, batch.id, RowState.NEW)
+    categories = {row.description: row.category_id for row in rows}
+    assert categories == {
+        "Salário ACME": "income",
+        "Netflix.com": "streaming",
+        "Padaria": None,
+    }
@@ -0,0 +1 @@
+# Export: stream any BaseTable table as CSV or NDJSON.
@@ -0,0 +1,157 @@
+"""
+Export logic: the exportable tables as CSV or NDJSON, streamed chunk by chunk.
+
+Only the models listed in EXPORTABLE_MODELS can be exported. Account, session
+and alert tables (password hashes, session ids, email addresses) never are. Rows
+of a UserScopedTable are limited to the requesting user's.
+
+Rows come from base_repo.stream_rows (a streaming cursor, one batch of plain
+tuples at a time) and each batch is encoded into a single bytes chunk: csv.writer
+into a reused buffer, or orjson per row for NDJSON. With gzip, chunks go through
+one zlib stream that is sync-flushed after every batch, so compressed bytes also
+leave as soon as each batch is read. Memory stays at one batch whatever the size
+of the table, and the CSV header is sent before the first query runs.
+"""
+
+import csv
+import io
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Sequence
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+import orjson
+from sqlalchemy import ColumnElement
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.resources._base import repository as base_repo
+from src.resources._base.models import BaseTable, UserScopedTable
+from src.resources.categories.models import CategoryRule
+from src.resources.imports.models import ImportBatch, ImportRow
+
+EXPORT_BATCH_SIZE = 1000
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+# Add a model here to make it exportable; new tables are not, until reviewed.
+EXPORTABLE_MODELS: tuple[type[BaseTable], ...] = (ImportBatch, ImportRow, CategoryRule)
+
+
+def exportable_models() -> dict[str, type[BaseTable]]:
+    """The EXPORTABLE_MODELS, by table name."""
+    return {
+        model.__table__.name: model  # pyright: ignore[reportAttributeAccessIssue]
+        for model in EXPORTABLE_MODELS
+    }
+
+
+def _default(value: Any) -> Any:
+    # orjson handles str/int/float/bool/None/datetime/date/Enum itself.
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"cannot export {type(value).__name__}")
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def _csv_rows(batch: Sequence[Sequence[Any]]) -> Iterable[Sequence[Any]]:
+    # csv.writer already writes str/int/Decimal/date as wanted; only the columns
+    # that are NULL or need another form in the first row go through _csv_value.
+    convert = [
+        i
+        for i, value in enumerate(batch[0])
+        if value is None or isinstance(value, datetime | Enum | bytes)
+    ]
+    if not convert:
+        return batch
+    rows = []
+    for row in batch:
+        values = list(row)
+        for i in convert:
+            values[i] = _csv_value(values[i])
+        rows.append(values)
+    return rows
+
+
+async def csv_chunks(
+    columns: Sequence[str], batches: AsyncIterable[Sequence[Sequence[Any]]]
+) -> AsyncIterator[bytes]:
+    """Header line, then one CSV chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        if batch:
+            writer.writerows(_csv_rows(batch))
+        yield buffer.getvalue().encode()
+
+
+async def ndjson_chunks(
+    columns: Sequence[str], batches: AsyncIterable[Sequence[Sequence[Any]]]
+) -> AsyncIterator[bytes]:
+    """One JSON object per row and line, one chunk per batch of rows."""
+    dumps = orjson.dumps
+    option = orjson.OPT_APPEND_NEWLINE
+    async for batch in batches:
+        yield b"".join(
+            dumps(dict(zip(columns, row, strict=True)), default=_default, option=option)
+            for row in batch
+        )
+
+
+async def gzipped(chunks: AsyncIterable[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compress chunks as one gzip stream, flushing after each so bytes keep flowing."""
+    compressor = zlib.compressobj(level, wbits=31)
+    async for chunk in chunks:
+        out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def export_stream(
+    session: AsyncSession,
+    model: type[BaseTable],
+    fmt: str,
+    user_id: str,
+    gzip: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Bytes of model's table in fmt ("csv" or "ndjson"), ordered by id.
+
+    For a UserScopedTable, only the rows owned by user_id.
+    """
+    table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    columns = [column.name for column in table.c]
+    where: list[ColumnElement[bool]] = []
+    if issubclass(model, UserScopedTable):
+        where.append(table.c.user_id == user_id)
+    batches = base_repo.stream_rows(session, model, batch_size, where=where)
+    encode = csv_chunks if fmt == "csv" else ndjson_chunks
+    chunks = encode(columns, batches)
+    return gzipped(chunks) if gzip else chunks
+
+
+__all__ = [
+    "EXPORTABLE_MODELS",
+    "EXPORT_BATCH_SIZE",
+    "MEDIA_TYPES",
+    "csv_chunks",
+    "export_stream",
+    "exportable_models",
+    "gzipped",
+    "ndjson_chunks",
+]
@@ -0,0 +1,35 @@
+"""Export routes: stream an exportable table as CSV or NDJSON, optionally gzipped."""
+
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import get_read_session
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import require_session
+from src.resources.exports import logic
+
+router = APIRouter(prefix='/export', tags=['Export'])
+
+
+@router.get('/{table}.{fmt}')
+async def export(
+    table: str,
+    fmt: Literal['csv', 'ndjson'],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    auth: Annotated[AuthSession, Depends(require_session)],
+    gzip: bool = False,
+) -> StreamingResponse:
+    model = logic.exportable_models().get(table)
+    if model is None:
+        raise HTTPException(status_code=404)
+    filename = f'{table}.{fmt}.gz' if gzip else f'{table}.{fmt}'
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    media_type = 'application/gzip' if gzip else logic.MEDIA_TYPES[fmt]
+    return StreamingResponse(
+        logic.export_stream(session, model, fmt, auth.user_id, gzip=gzip),
+        media_type=media_type,
+        headers=headers,
+    )
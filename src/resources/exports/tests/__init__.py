@@ -0,0 +1 @@
+# Exports resource tests.
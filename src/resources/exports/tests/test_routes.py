@@ -0,0 +1,152 @@
+"""Tests for the streaming export routes."""
+
+import gzip
+import json
+from collections.abc import AsyncGenerator, Generator
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from enum import StrEnum
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Field, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine, get_read_session
+from src.main import app
+from src.resources._base.models import BaseTable
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import require_session
+from src.resources.categories.models import CategoryRule
+from src.resources.exports import logic
+
+ALICE = '01HALICE0000000000000000AA'
+BOB = '01HBOB000000000000000000BB'
+
+
+class _Color(StrEnum):
+    RED = 'red'
+
+
+class _TestExportItem(BaseTable, table=True):
+    __tablename__ = 'test_export_item'  # pyright: ignore[reportAssignmentType]
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    day: date
+    color: _Color = _Color.RED
+    note: str | None = None
+
+
+def _items() -> list[_TestExportItem]:
+    return [
+        _TestExportItem(
+            id=f'{i:026d}',
+            amount=Decimal(f'{i}.50'),
+            day=date(2026, 1, i + 1),
+            note='a,b',
+        )
+        for i in range(5)
+    ]
+
+
+def _rules() -> list[CategoryRule]:
+    return [
+        CategoryRule(user_id=ALICE, category_id='mine', pattern='netflix'),
+        CategoryRule(user_id=BOB, category_id='theirs', pattern='uber'),
+    ]
+
+
+async def _alice() -> AuthSession:
+    return AuthSession(user_id=ALICE, expires_at=datetime.now(UTC))
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> Generator[TestClient]:
+    """Client logged in as Alice; the DB holds five export items and two rules."""
+    monkeypatch.setattr(
+        logic, 'EXPORTABLE_MODELS', (*logic.EXPORTABLE_MODELS, _TestExportItem)
+    )
+    engine = build_engine('sqlite+aiosqlite:///:memory:')
+    seeded: list[bool] = []
+
+    async def _session() -> AsyncGenerator[AsyncSession]:
+        async with AsyncSession(engine, expire_on_commit=False) as s:
+            if not seeded:
+                async with engine.begin() as conn:
+                    await conn.run_sync(SQLModel.metadata.create_all)
+                s.add_all([*_items(), *_rules()])
+                await s.commit()
+                seeded.append(True)
+            yield s
+
+    app.dependency_overrides[get_read_session] = _session
+    app.dependency_overrides[require_session] = _alice
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_csv_export_streams_every_row(client: TestClient) -> None:
+    """CSV has a header, one quoted-as-needed line per row, in id order."""
+    response = client.get('/export/test_export_item.csv')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert 'test_export_item.csv' in response.headers['content-disposition']
+    lines = response.text.splitlines()
+    assert lines[0].startswith('id,created_at,updated_at,amount,day,color,note')
+    assert len(lines) == 6
+    assert lines[1].endswith(',0.50,2026-01-01,red,"a,b"')
+
+
+def test_ndjson_export_is_one_object_per_line(client: TestClient) -> None:
+    """NDJSON lines parse to the row's columns; Decimals keep their digits."""
+    response = client.get('/export/test_export_item.ndjson')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['amount'] for row in rows] == ['0.50', '1.50', '2.50', '3.50', '4.50']
+    assert rows[4]['day'] == '2026-01-05'
+    assert rows[0]['color'] == 'red'
+
+
+def test_gzip_export_matches_plain(client: TestClient) -> None:
+    """?gzip=true sends a .gz file that decompresses to the plain export."""
+    plain = client.get('/export/test_export_item.csv').content
+    response = client.get('/export/test_export_item.csv?gzip=true')
+    assert response.headers['content-type'] == 'application/gzip'
+    assert gzip.decompress(response.content) == plain
+
+
+def test_unknown_table_or_format(client: TestClient) -> None:
+    """Tables that are not exportable are 404; other formats fail validation."""
+    assert client.get('/export/nope.csv').status_code == 404
+    assert client.get('/export/user_account.csv').status_code == 404
+    assert client.get('/export/auth_session.ndjson').status_code == 404
+    assert client.get('/export/alert_rule.csv').status_code == 404
+    assert client.get('/export/test_export_item.xml').status_code == 422
+
+
+def test_user_scoped_tables_export_only_own_rows(client: TestClient) -> None:
+    """category_rule exports hold the caller's rules, not other users'."""
+    response = client.get('/export/category_rule.ndjson')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    owned = [(row['user_id'], row['category_id']) for row in rows]
+    assert owned == [(ALICE, 'mine')]
+
+
+def test_export_needs_a_login(client: TestClient) -> None:
+    """Without a live session cookie every export is refused."""
+    del app.dependency_overrides[require_session]
+    assert client.get('/export/import_row.csv').status_code == 401
+
+
+async def test_chunks_follow_batches() -> None:
+    """The header goes out alone, then exactly one chunk per batch."""
+
+    async def batches() -> AsyncGenerator[list[tuple[int]]]:
+        for start in range(0, 5, 2):
+            yield [(i,) for i in range(start, min(start + 2, 5))]
+
+    chunks = [chunk async for chunk in logic.csv_chunks(['n'], batches())]
+    assert chunks == [b'n\r\n', b'0\r\n1\r\n', b'2\r\n3\r\n', b'4\r\n']
+    gzipped = logic.gzipped(logic.csv_chunks(['n'], batches()))
+    compressed = [chunk async for chunk in gzipped]
+    assert len(compressed) == 5
+    assert gzip.decompress(b''.join(compressed)) == b''.join(chunks)
@@ -0,0 +1 @@
+# Bank CSV import: upload, parse, stage the diff, apply.
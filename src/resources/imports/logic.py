@@ -0,0 +1,308 @@
+"""
+Import logic: bank detection, per-bank parsers, and the streaming staging pipeline.
+
+The upload is read line by line from its spooled temp file, never as one string.
+Rows flow through parse -> normalize/hash -> bulk bank_ref lookup -> categorize ->
+staging insert in chunks of CHUNK_SIZE, so memory stays flat however long the
+statement is. A line that cannot be parsed stops the import with InvalidRowError
+naming it, and the rows staged so far are deleted with their batch.
+"""
+
+import codecs
+import csv
+import hashlib
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Any, BinaryIO
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.resources._base import repository as base_repo
+from src.resources._base.ids import ulid_batch
+from src.resources.categories import logic as categories
+from src.resources.imports import repository
+from src.resources.imports.models import (
+    Direction,
+    ImportBatch,
+    Movement,
+    RowState,
+)
+
+CHUNK_SIZE = 1000
+
+
+class UnknownBankFormatError(ValueError):
+    """The CSV header matches none of the supported bank formats."""
+
+
+class InvalidRowError(ValueError):
+    """A CSV line has a date, amount or column count its bank format cannot read."""
+
+
+@dataclass(frozen=True)
+class BankFormat:
+    """Column layout and conventions of one bank's CSV export."""
+
+    bank: str
+    header: tuple[str, ...]
+    date_column: str
+    description_column: str
+    amount_column: str
+    date_format: str
+    decimal_comma: bool
+    # Card statements list purchases as positive amounts.
+    positive_is_debit: bool = False
+
+
+BANK_FORMATS = (
+    BankFormat(
+        bank="nubank",
+        header=("data", "valor", "identificador", "descrição"),
+        date_column="data",
+        description_column="descrição",
+        amount_column="valor",
+        date_format="%d/%m/%Y",
+        decimal_comma=False,
+    ),
+    BankFormat(
+        bank="nubank",
+        header=("date", "title", "amount"),
+        date_column="date",
+        description_column="title",
+        amount_column="amount",
+        date_format="%Y-%m-%d",
+        decimal_comma=False,
+        positive_is_debit=True,
+    ),
+    BankFormat(
+        bank="inter",
+        header=("data lançamento", "descrição", "valor", "saldo"),
+        date_column="data lançamento",
+        description_column="descrição",
+        amount_column="valor",
+        date_format="%d/%m/%Y",
+        decimal_comma=True,
+    ),
+    BankFormat(
+        bank="itau",
+        header=("data", "lançamento", "valor"),
+        date_column="data",
+        description_column="lançamento",
+        amount_column="valor",
+        date_format="%d/%m/%Y",
+        decimal_comma=True,
+    ),
+)
+
+
+def _split_header(line: str) -> tuple[str, tuple[str, ...]]:
+    delimiter = ";" if line.count(";") > line.count(",") else ","
+    names = tuple(name.strip().casefold() for name in line.strip().split(delimiter))
+    return delimiter, names
+
+
+def detect_format(header_line: str) -> tuple[BankFormat, str]:
+    """The BankFormat whose header matches, and the delimiter in use."""
+    delimiter, names = _split_header(header_line)
+    for bank_format in BANK_FORMATS:
+        if names == bank_format.header:
+            return bank_format, delimiter
+    raise UnknownBankFormatError(f"Unrecognised bank CSV header: {header_line!r}")
+
+
+def bank_ref(day: date, amount_cents: int, direction: Direction, text: str) -> str:
+    """Stable dedup key: sha256 of date + signed amount + normalized description."""
+    signed = amount_cents if direction == Direction.CREDIT else -amount_cents
+    normalized = " ".join(text.casefold().split())
+    key = f"{day.isoformat()}|{signed}|{normalized}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _amount(raw: str, decimal_comma: bool) -> Decimal:
+    text = raw.strip().replace("R$", "").replace(" ", "")
+    if decimal_comma:
+        text = text.replace(".", "").replace(",", ".")
+    return Decimal(text)
+
+
+def _movement(
+    row: list[str], bank_format: BankFormat, date_at: int, text_at: int, amount_at: int
+) -> Movement:
+    day = datetime.strptime(row[date_at].strip(), bank_format.date_format).date()
+    amount = _amount(row[amount_at], bank_format.decimal_comma)
+    if bank_format.positive_is_debit:
+        amount = -amount
+    direction = Direction.CREDIT if amount > 0 else Direction.DEBIT
+    cents = int((abs(amount) * 100).to_integral_value())
+    text = row[text_at].strip()
+    # Values are already typed and bounded; skip pydantic validation.
+    return Movement.model_construct(
+        bank_ref=bank_ref(day, cents, direction, text),
+        date=day,
+        amount_cents=cents,
+        direction=direction,
+        description=text[:255],
+        bank=bank_format.bank,
+    )
+
+
+def parse_rows(
+    rows: Iterable[list[str]], bank_format: BankFormat
+) -> Iterator[Movement]:
+    """Pure parser: CSV data rows (header already consumed) to Movements.
+
+    InvalidRowError if a row cannot be read; lines are counted from the header.
+    """
+    positions = {name: i for i, name in enumerate(bank_format.header)}
+    date_at = positions[bank_format.date_column]
+    text_at = positions[bank_format.description_column]
+    amount_at = positions[bank_format.amount_column]
+    for line, row in enumerate(rows, start=2):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        try:
+            yield _movement(row, bank_format, date_at, text_at, amount_at)
+        except (ValueError, IndexError, InvalidOperation) as exc:
+            raise InvalidRowError(f"Line {line} could not be read: {row!r}") from exc
+
+
+def open_csv(file: BinaryIO) -> tuple[BankFormat, Iterator[Movement]]:
+    """Detect the bank from the first line and return a lazy Movement iterator.
+
+    UTF-8 is tried first; exports that are not valid UTF-8 (Itaú) are read as
+    Latin-1. The file is decoded incrementally, one line at a time.
+    """
+    file.seek(0)
+    head = file.readline()
+    try:
+        header_line = head.decode("utf-8-sig")
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        header_line = head.decode("latin-1")
+        encoding = "latin-1"
+    bank_format, delimiter = detect_format(header_line)
+    lines = codecs.getreader(encoding)(file)
+    rows = csv.reader(lines, delimiter=delimiter)
+    return bank_format, parse_rows(rows, bank_format)
+
+
+def _take(movements: Iterator[Movement], size: int) -> list[Movement]:
+    return list(islice(movements, size))
+
+
+def _staged(
+    movement: Movement,
+    row_id: str,
+    batch_id: str,
+    matched: set[str],
+    category_id: str | None,
+) -> dict[str, Any]:
+    now = datetime.now(UTC)
+    state = RowState.MATCHED if movement.bank_ref in matched else RowState.NEW
+    return {
+        **movement.__dict__,
+        "id": row_id,
+        "created_at": now,
+        "updated_at": now,
+        "batch_id": batch_id,
+        "state": state,
+        "category_id": category_id,
+    }
+
+
+async def stage_import(
+    session: AsyncSession,
+    file: BinaryIO,
+    filename: str = "",
+    user_id: str | None = None,
+) -> ImportBatch:
+    """Parse file in chunks, diff each chunk by bank_ref, and stage the rows.
+
+    Each chunk costs one lookup query per IN_CHUNK_SIZE refs and one executemany of
+    plain dicts; parsing runs in the threadpool since it reads the spooled file
+    synchronously. With a user_id, each chunk is also categorized by that user's
+    compiled rules (in the threadpool too); without one rows stay uncategorized.
+    If staging fails (InvalidRowError for an unreadable line), the batch and the
+    rows already staged are deleted before the error propagates.
+    """
+    started = time.perf_counter()
+    matcher = None
+    if user_id is not None:
+        matcher = await categories.matcher_for(session, user_id)
+    bank_format, movements = await run_in_threadpool(open_csv, file)
+    batch = await base_repo.add(
+        session, ImportBatch(bank=bank_format.bank, filename=filename[:255])
+    )
+    batch_id = batch.id  # read before a rollback expires batch
+    try:
+        await _stage_chunks(session, batch, movements, matcher)
+    except Exception:
+        await session.rollback()
+        await repository.discard_batch(session, batch_id)
+        raise
+    batch.rows_new = batch.rows_total - batch.rows_matched
+    batch.elapsed_ms = int((time.perf_counter() - started) * 1000)
+    return await base_repo.update(session, batch)
+
+
+async def _stage_chunks(
+    session: AsyncSession,
+    batch: ImportBatch,
+    movements: Iterator[Movement],
+    matcher: categories.Matcher | None,
+) -> None:
+    while chunk := await run_in_threadpool(_take, movements, CHUNK_SIZE):
+        refs = [movement.bank_ref for movement in chunk]
+        matched = await repository.applied_refs(session, refs)
+        row_ids = ulid_batch(len(chunk))
+        if matcher is not None and len(matcher):
+            category_ids = await run_in_threadpool(matcher.classify_many, chunk)
+        else:
+            category_ids = [None] * len(chunk)
+        rows = [
+            _staged(movement, row_id, batch.id, matched, category_id)
+            for movement, row_id, category_id in zip(
+                chunk, row_ids, category_ids, strict=True
+            )
+        ]
+        await repository.stage_rows(session, rows)
+        batch.rows_total += len(rows)
+        batch.rows_matched += sum(row["state"] == RowState.MATCHED for row in rows)
+
+
+async def apply_import(
+    session: AsyncSession,
+    batch_id: str,
+    row_ids: Sequence[str] = (),
+    all_rows: bool = False,
+    exclude_ids: Sequence[str] = (),
+) -> tuple[ImportBatch, int] | None:
+    """Apply rows of a staged batch. Returns (batch, applied), or None if missing.
+
+    row_ids picks the rows to apply; all_rows applies every new row but exclude_ids.
+    """
+    batch = await base_repo.get_by_id(session, ImportBatch, batch_id)
+    if batch is None:
+        return None
+    applied = await repository.apply_batch(
+        session, batch, row_ids, all_rows, exclude_ids
+    )
+    return batch, applied
+
+
+__all__ = [
+    "BANK_FORMATS",
+    "InvalidRowError",
+    "UnknownBankFormatError",
+    "apply_import",
+    "bank_ref",
+    "detect_format",
+    "open_csv",
+    "parse_rows",
+    "stage_import",
+]
@@ -0,0 +1,72 @@
+"""
+Import models: a batch per uploaded file and one staged row per parsed Movement.
+
+Movement is the normalized, bank-independent form of a CSV line. Staged rows are
+diffed by bank_ref (sha256 of date + amount + description) against rows already
+applied, so re-importing the same file stages every row as matched.
+"""
+
+from datetime import date
+from enum import StrEnum
+
+from sqlmodel import Field, SQLModel
+
+from src.resources._base.models import BaseTable, SearchSpec
+
+
+class Direction(StrEnum):
+    CREDIT = "credit"
+    DEBIT = "debit"
+
+
+class RowState(StrEnum):
+    NEW = "new"
+    MATCHED = "matched"
+    APPLIED = "applied"
+
+
+class Movement(SQLModel):
+    """One normalized bank line. amount_cents is always positive."""
+
+    bank_ref: str = Field(max_length=64)
+    date: date
+    amount_cents: int
+    direction: Direction
+    description: str = Field(default="", max_length=255)
+    bank: str = Field(max_length=32)
+
+
+class ImportBatch(BaseTable, table=True):
+    """One uploaded file: detected bank, diff counts and parse throughput."""
+
+    __tablename__ = "import_batch"  # pyright: ignore[reportAssignmentType]
+
+    bank: str = Field(max_length=32)
+    filename: str = Field(default="", max_length=255)
+    applied: bool = False
+    rows_total: int = 0
+    rows_new: int = 0
+    rows_matched: int = 0
+    elapsed_ms: int = 0
+
+    @property
+    def rows_per_sec(self) -> int:
+        if self.elapsed_ms <= 0:
+            return self.rows_total
+        return self.rows_total * 1000 // self.elapsed_ms
+
+
+class ImportRow(Movement, BaseTable, table=True):
+    """A staged Movement of one batch; state is new, matched or applied."""
+
+    __tablename__ = "import_row"  # pyright: ignore[reportAssignmentType]
+    __search__ = SearchSpec(fields=("description", "bank"))
+
+    batch_id: str = Field(foreign_key="import_batch.id", index=True, max_length=26)
+    bank_ref: str = Field(index=True, max_length=64)
+    state: RowState = RowState.NEW
+    # Set at staging by the user's category rules (src.resources.categories).
+    category_id: str | None = Field(default=None, max_length=26)
+
+
+__all__ = ["Direction", "ImportBatch", "ImportRow", "Movement", "RowState"]
@@ -0,0 +1,146 @@
+"""
+Import repository: bank_ref lookups, batch row pages, apply, discard.
+
+Async functions taking AsyncSession; staging writes go through the base helpers.
+"""
+
+from collections.abc import AsyncGenerator, Sequence
+from typing import Any
+
+from sqlalchemy.orm import aliased
+from sqlmodel import col, delete, exists, insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import cache
+from src.resources._base import stamps
+from src.resources._base.repository import IN_CHUNK_SIZE
+from src.resources.imports.models import ImportBatch, ImportRow, RowState
+
+
+async def applied_refs(session: AsyncSession, refs: Sequence[str]) -> set[str]:
+    """The subset of refs already applied by an earlier import.
+
+    Looks refs up in IN_CHUNK_SIZE chunks through the ix_import_row_bank_ref index.
+    """
+    found: set[str] = set()
+    for start in range(0, len(refs), IN_CHUNK_SIZE):
+        chunk = refs[start : start + IN_CHUNK_SIZE]
+        statement = select(ImportRow.bank_ref).where(
+            col(ImportRow.bank_ref).in_(chunk),
+            col(ImportRow.state) == RowState.APPLIED,
+        )
+        result = await session.exec(statement)
+        found.update(result.all())
+    return found
+
+
+async def stage_rows(session: AsyncSession, rows: list[dict[str, Any]]) -> None:
+    """Insert staged row dicts with one executemany and commit.
+
+    Skips ORM instance construction, which dominates the cost of a large import.
+    """
+    await session.exec(insert(ImportRow), params=rows)
+    await stamps.stamp(session, "import_row")
+    await session.commit()
+    cache.bump("import_row")
+
+
+async def list_rows(
+    session: AsyncSession,
+    batch_id: str,
+    state: RowState,
+    after: str | None = None,
+    limit: int = 50,
+) -> list[ImportRow]:
+    """One keyset page of a batch's rows in the given state, ordered by id."""
+    statement = (
+        select(ImportRow)
+        .where(col(ImportRow.batch_id) == batch_id, col(ImportRow.state) == state)
+        .order_by(col(ImportRow.id))
+        .limit(limit)
+    )
+    if after is not None:
+        statement = statement.where(col(ImportRow.id) > after)
+    result = await session.exec(statement)
+    return list(result.all())
+
+
+async def iter_rows(
+    session: AsyncSession, batch_id: str, state: RowState, page_size: int = 500
+) -> AsyncGenerator[ImportRow]:
+    """Yield every row of a batch in the given state, one keyset page at a time."""
+    after: str | None = None
+    while page := await list_rows(session, batch_id, state, after, page_size):
+        for row in page:
+            yield row
+        after = page[-1].id
+
+
+async def apply_batch(
+    session: AsyncSession,
+    batch: ImportBatch,
+    row_ids: Sequence[str] = (),
+    all_rows: bool = False,
+    exclude_ids: Sequence[str] = (),
+) -> int:
+    """Mark new rows of the batch applied and return how many were.
+
+    Applies row_ids, or with all_rows every new row but exclude_ids; with neither,
+    nothing. A new row whose bank_ref another batch applied since staging is
+    marked matched instead, in the same transaction, so two overlapping imports
+    never both apply a line. Everything commits at once, so a failed apply leaves
+    the batch untouched.
+    """
+    new = (col(ImportRow.batch_id) == batch.id, col(ImportRow.state) == RowState.NEW)
+    applied = aliased(ImportRow)
+    applied_elsewhere = exists().where(
+        applied.bank_ref == ImportRow.bank_ref,
+        applied.state == RowState.APPLIED,
+        applied.batch_id != batch.id,
+    )
+    result = await session.exec(
+        update(ImportRow)
+        .where(*new, applied_elsewhere)
+        .values(state=RowState.MATCHED)
+    )
+    batch.rows_matched += result.rowcount
+    batch.rows_new -= result.rowcount
+    statement = update(ImportRow).where(*new).values(state=RowState.APPLIED)
+    count = 0
+    if all_rows:
+        # Bounded by the form's field limit, well below SQLite's variable limit.
+        if exclude_ids:
+            statement = statement.where(col(ImportRow.id).not_in(exclude_ids))
+        result = await session.exec(statement)
+        count = result.rowcount
+    else:
+        for start in range(0, len(row_ids), IN_CHUNK_SIZE):
+            chunk = row_ids[start : start + IN_CHUNK_SIZE]
+            chunk_statement = statement.where(col(ImportRow.id).in_(chunk))
+            result = await session.exec(chunk_statement)
+            count += result.rowcount
+    batch.applied = True
+    session.add(batch)
+    await stamps.stamp(session, "import_row", "import_batch")
+    await session.commit()
+    cache.bump("import_row", "import_batch")
+    return count
+
+
+async def discard_batch(session: AsyncSession, batch_id: str) -> None:
+    """Delete a batch and every row staged for it, in one commit."""
+    await session.exec(delete(ImportRow).where(col(ImportRow.batch_id) == batch_id))
+    await session.exec(delete(ImportBatch).where(col(ImportBatch.id) == batch_id))
+    await stamps.stamp(session, "import_row", "import_batch")
+    await session.commit()
+    cache.bump("import_row", "import_batch")
+
+
+__all__ = [
+    "applied_refs",
+    "apply_batch",
+    "discard_batch",
+    "iter_rows",
+    "list_rows",
+    "stage_rows",
+]
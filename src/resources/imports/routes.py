@@ -0,0 +1,93 @@
+"""Import routes: upload page, staged diff panel, apply."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, UploadFile, status
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import get_session
+from src.ext.templates import stream_template, templates
+from src.resources._base import repository as base_repo
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import require_session
+from src.resources.imports import logic, repository
+from src.resources.imports.models import ImportBatch, RowState
+
+# Import batches hold a user's statement lines: every route needs a login.
+router = APIRouter(
+    prefix='/imports', tags=['Imports'], dependencies=[Depends(require_session)]
+)
+
+
+@router.get('/', response_class=HTMLResponse)
+async def upload_page(request: Request) -> HTMLResponse:
+    return templates.TemplateResponse(
+        request=request, name='imports/upload.html', context={'active_page': 'imports'}
+    )
+
+
+@router.post('/', response_class=HTMLResponse, status_code=status.HTTP_201_CREATED)
+async def upload(
+    request: Request,
+    file: UploadFile,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    auth: Annotated[AuthSession, Depends(require_session)],
+) -> StreamingResponse:
+    # Uploads are categorized by the uploader's rules.
+    try:
+        batch = await logic.stage_import(
+            session, file.file, file.filename or '', user_id=auth.user_id
+        )
+    except (logic.UnknownBankFormatError, logic.InvalidRowError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _diff_response(request, session, batch, status.HTTP_201_CREATED)
+
+
+@router.get('/{batch_id}', response_class=HTMLResponse)
+async def diff(
+    request: Request,
+    batch_id: str,
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> StreamingResponse:
+    batch = await base_repo.get_by_id(session, ImportBatch, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404)
+    return _diff_response(request, session, batch, status.HTTP_200_OK)
+
+
+@router.post('/{batch_id}/apply', response_class=HTMLResponse)
+async def apply(
+    request: Request,
+    batch_id: str,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    apply_all: Annotated[bool, Form()] = False,
+    row_ids: Annotated[list[str] | None, Form()] = None,
+    exclude_ids: Annotated[list[str] | None, Form()] = None,
+) -> HTMLResponse:
+    # The diff form posts apply_all plus the rows unticked, not one field per row:
+    # a large statement would pass Starlette's 1000-field limit otherwise.
+    result = await logic.apply_import(
+        session, batch_id, row_ids or (), apply_all, exclude_ids or ()
+    )
+    if result is None:
+        raise HTTPException(status_code=404)
+    batch, applied = result
+    return templates.TemplateResponse(
+        request=request,
+        name='imports/summary.html',
+        context={'batch': batch, 'applied': applied, 'active_page': 'imports'},
+    )
+
+
+def _diff_response(
+    request: Request, session: AsyncSession, batch: ImportBatch, status_code: int
+) -> StreamingResponse:
+    # Streams every new row; a 100k-line statement never becomes one big string.
+    new_rows = repository.iter_rows(session, batch.id, RowState.NEW)
+    return stream_template(
+        request,
+        'imports/diff.html',
+        {'batch': batch, 'new_rows': new_rows, 'active_page': 'imports'},
+        status_code=status_code,
+    )
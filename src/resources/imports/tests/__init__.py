@@ -0,0 +1 @@
+# Imports resource tests.
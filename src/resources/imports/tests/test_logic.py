@@ -0,0 +1,113 @@
+"""Tests for import logic: bank parsers and the staging pipeline."""
+
+import csv
+import io
+import tracemalloc
+from datetime import date
+
+import pytest
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.resources._base import repository as base_repo
+from src.resources.imports import logic, repository
+from src.resources.imports.models import Direction, ImportBatch, RowState
+
+NUBANK_CSV = (
+    "Data,Valor,Identificador,Descrição\n"
+    "01/03/2026,5000.00,a1,Salário\n"
+    "02/03/2026,-39.90,a2,Netflix\n"
+)
+ITAU_CSV = "data;lançamento;valor\n05/03/2026;PADARIA   CENTRAL;-1.234,56\n"
+
+
+@pytest.fixture
+async def session():
+    """Async session with in-memory DB and all tables created."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as s:
+        yield s
+    await engine.dispose()
+
+
+def test_nubank_rows_become_signed_movements() -> None:
+    """Positive Nubank amounts are credits, negative ones debits."""
+    bank_format, movements = logic.open_csv(io.BytesIO(NUBANK_CSV.encode()))
+    salary, netflix = list(movements)
+    assert bank_format.bank == "nubank"
+    assert (salary.direction, salary.amount_cents) == (Direction.CREDIT, 500000)
+    assert (netflix.direction, netflix.amount_cents) == (Direction.DEBIT, 3990)
+    assert netflix.date == date(2026, 3, 2)
+
+
+def test_itau_latin1_and_decimal_comma() -> None:
+    """Itaú exports are Latin-1 with `1.234,56` amounts; refs ignore spacing/case."""
+    bank_format, movements = logic.open_csv(io.BytesIO(ITAU_CSV.encode("latin-1")))
+    (movement,) = list(movements)
+    assert bank_format.bank == "itau"
+    assert movement.amount_cents == 123456
+    assert movement.bank_ref == logic.bank_ref(
+        date(2026, 3, 5), 123456, Direction.DEBIT, "padaria central"
+    )
+
+
+def test_unknown_header_is_rejected() -> None:
+    """A CSV from an unsupported bank raises before anything is staged."""
+    with pytest.raises(logic.UnknownBankFormatError):
+        logic.open_csv(io.BytesIO(b"foo,bar\n1,2\n"))
+
+
+async def test_reimport_after_apply_is_all_matched(session: AsyncSession) -> None:
+    """Re-importing an applied file stages every row as matched."""
+    first = await logic.stage_import(session, io.BytesIO(NUBANK_CSV.encode()))
+    assert (first.rows_new, first.rows_matched) == (2, 0)
+    result = await logic.apply_import(session, first.id, all_rows=True)
+    assert result is not None and result[1] == 2
+
+    second = await logic.stage_import(session, io.BytesIO(NUBANK_CSV.encode()))
+    assert (second.rows_new, second.rows_matched) == (0, 2)
+    assert await repository.list_rows(session, second.id, RowState.NEW) == []
+
+
+async def test_unreadable_line_discards_the_batch(session: AsyncSession) -> None:
+    """A bad line names its number, and nothing of the import is left staged."""
+    bad = NUBANK_CSV + "03/03/2026,12,a3\n" + "04/13/2026,-1.00,a4,Mercado\n"
+    with pytest.raises(logic.InvalidRowError, match="Line 4"):
+        await logic.stage_import(session, io.BytesIO(bad.encode()))
+    assert await base_repo.list_all(session, ImportBatch) == []
+
+
+async def test_overlapping_imports_apply_each_line_once(session: AsyncSession) -> None:
+    """A row applied by another batch after staging is matched, not applied again."""
+    first = await logic.stage_import(session, io.BytesIO(NUBANK_CSV.encode()))
+    second = await logic.stage_import(session, io.BytesIO(NUBANK_CSV.encode()))
+    assert second.rows_new == 2
+    assert await logic.apply_import(session, first.id, all_rows=True) == (first, 2)
+    result = await logic.apply_import(session, second.id, all_rows=True)
+    assert result is not None
+    batch, applied = result
+    assert (applied, batch.rows_new, batch.rows_matched) == (0, 0, 2)
+    assert await logic.apply_import(session, first.id) == (first, 0)
+
+
+async def test_large_statement_stages_with_flat_memory(session: AsyncSession) -> None:
+    """10k lines stage in chunks; peak Python memory stays far below the file."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Data", "Valor", "Identificador", "Descrição"])
+    for i in range(10_000):
+        writer.writerow([f"{i % 28 + 1:02d}/03/2026", f"-{i}.25", i, f"shop {i}"])
+    upload = io.BytesIO(buffer.getvalue().encode())
+    del buffer
+
+    tracemalloc.start()
+    batch = await logic.stage_import(session, upload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert batch.rows_total == batch.rows_new == 10_000
+    assert batch.rows_per_sec > 0
+    assert peak < 16 * 1024 * 1024
@@ -0,0 +1,137 @@
+"""Tests for import routes: upload, diff panel, apply."""
+
+import re
+from collections.abc import AsyncGenerator, Generator
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine, get_read_session, get_session
+from src.main import app
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import current_session
+from src.resources.imports import logic
+
+CSV = "Data,Valor,Identificador,Descrição\n02/03/2026,-39.90,a2,Netflix\n".encode()
+ALICE = '01HALICE0000000000000000AA'
+TWO_ROWS = (
+    "Data,Valor,Identificador,Descrição\n"
+    "02/03/2026,-39.90,a2,Netflix\n"
+    "03/03/2026,-12.00,a3,Padaria\n"
+).encode()
+
+
+async def _alice() -> AuthSession:
+    return AuthSession(user_id=ALICE, expires_at=datetime.now(UTC))
+
+
+@pytest.fixture
+def client() -> Generator[TestClient]:
+    """Client logged in as Alice on a fresh in-memory DB with all tables."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+
+    async def _session() -> AsyncGenerator[AsyncSession]:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as s:
+            yield s
+
+    app.dependency_overrides[get_session] = _session
+    app.dependency_overrides[get_read_session] = _session
+    app.dependency_overrides[current_session] = _alice
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_upload_then_apply(client: TestClient) -> None:
+    """Uploading stages the diff; applying reports the rows created."""
+    response = client.post('/imports/', files={'file': ('nu.csv', CSV, 'text/csv')})
+    assert response.status_code == 201
+    assert '1 new' in response.text
+    assert 'Netflix' in response.text
+
+    assert 'name="apply_all" value="true"' in response.text
+    apply_url = re.search(r'/imports/\w{26}/apply', response.text)
+    assert apply_url is not None
+    applied = client.post(apply_url.group(), data={'apply_all': 'true'})
+    assert applied.status_code == 200
+    assert '1 created' in applied.text
+
+
+def test_apply_skips_excluded_rows_and_needs_a_choice(client: TestClient) -> None:
+    """Only rows posted as skipped are left out; an empty post applies nothing."""
+    files = {'file': ('nu.csv', TWO_ROWS, 'text/csv')}
+    response = client.post('/imports/', files=files)
+    apply_url = re.search(r'/imports/\w{26}/apply', response.text)
+    assert apply_url is not None
+    row_ids = re.findall(r'name="exclude_ids" value="(\w{26})"', response.text)
+    assert len(row_ids) == 2
+
+    assert '0 created' in client.post(apply_url.group()).text
+    data = {'apply_all': 'true', 'exclude_ids': row_ids[1]}
+    assert '1 created' in client.post(apply_url.group(), data=data).text
+
+
+def test_htmx_upload_and_apply_send_only_the_panel(client: TestClient) -> None:
+    """Swaps into #import-panel get that section alone, not the whole page."""
+    hx = {'HX-Request': 'true', 'HX-Target': 'import-panel'}
+    files = {'file': ('nu.csv', CSV, 'text/csv')}
+    response = client.post('/imports/', files=files, headers=hx)
+    assert response.status_code == 201
+    assert response.text.startswith('<title>Import review — FinAdv</title>')
+    assert '<section id="import-panel"' in response.text
+    assert '<nav' not in response.text
+
+    apply_url = re.search(r'/imports/\w{26}/apply', response.text)
+    assert apply_url is not None
+    applied = client.post(apply_url.group(), data={'apply_all': 'true'}, headers=hx)
+    assert '1 created' in applied.text
+    assert '<nav' not in applied.text
+
+
+def test_upload_is_categorized_for_the_logged_in_user(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The uploader's user_id reaches stage_import, so their rules apply."""
+    user_ids: list[str | None] = []
+    stage_import = logic.stage_import
+
+    async def spy(*args: Any, **kwargs: Any) -> Any:
+        user_ids.append(kwargs.get('user_id'))
+        return await stage_import(*args, **kwargs)
+
+    monkeypatch.setattr(logic, 'stage_import', spy)
+    files = {'file': ('nu.csv', CSV, 'text/csv')}
+    assert client.post('/imports/', files=files).status_code == 201
+    assert user_ids == [ALICE]
+
+
+def test_import_routes_need_a_login(client: TestClient) -> None:
+    """Without a session cookie every import route is a 401."""
+    del app.dependency_overrides[current_session]
+    files = {'file': ('nu.csv', CSV, 'text/csv')}
+    batch = '01HBATCH000000000000000000'
+    assert client.get('/imports/').status_code == 401
+    assert client.post('/imports/', files=files).status_code == 401
+    assert client.get(f'/imports/{batch}').status_code == 401
+    data = {'apply_all': 'true'}
+    assert client.post(f'/imports/{batch}/apply', data=data).status_code == 401
+
+
+def test_upload_unknown_format_is_400(client: TestClient) -> None:
+    """An unrecognised CSV header is rejected with a 400 page."""
+    files = {'file': ('x.csv', b'a,b\n', 'text/csv')}
+    response = client.post('/imports/', files=files)
+    assert response.status_code == 400
+
+
+def test_upload_with_an_unreadable_line_is_400(client: TestClient) -> None:
+    """A bad amount or date is a 400 naming the line, not a server error."""
+    bad = CSV + b'03/03/2026,abc,a3,Padaria\n'
+    response = client.post('/imports/', files={'file': ('nu.csv', bad, 'text/csv')})
+    assert response.status_code == 400
+    assert 'Line 3' in response.text
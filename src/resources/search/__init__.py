@@ -0,0 +1 @@
+# Search: search-as-you-type over imported transactions (FTS5).
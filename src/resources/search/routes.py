@@ -0,0 +1,54 @@
+"""Search routes: search-as-you-type over applied import rows."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response
+from sqlmodel import col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.cache import cached_page
+from src.ext.db import get_read_session
+from src.ext.htmx import hx_target
+from src.ext.templates import templates
+from src.resources._base import repository as base_repo
+from src.resources.auth.routes import require_session
+from src.resources.imports.models import ImportRow, RowState
+
+# Search returns applied import rows, which are behind a login like /export.
+router = APIRouter(
+    prefix='/search', tags=['Search'], dependencies=[Depends(require_session)]
+)
+
+PAGE_SIZE = 20
+
+
+@router.get('/', response_class=HTMLResponse)
+@cached_page('import_row')
+async def search(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    q: str = '',
+    after: str | None = None,
+) -> Response:
+    # The input sends a request per pause in typing; a repeated query (backspace,
+    # retyping) is answered from the response cache until import_row changes.
+    applied = col(ImportRow.state) == RowState.APPLIED
+    try:
+        hits, cursor = await base_repo.search(
+            session, ImportRow, q, after, PAGE_SIZE, where=(applied,)
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail='Invalid cursor.') from exc
+    # Boosted navigation (target #content) gets the page's content block.
+    if hx_target(request) in (None, 'content'):
+        name = 'search/page.html'
+    elif after is None:
+        name = 'search/results.html'
+    else:
+        name = 'search/hits.html'
+    return templates.TemplateResponse(
+        request=request,
+        name=name,
+        context={'q': q, 'hits': hits, 'cursor': cursor, 'active_page': 'search'},
+    )
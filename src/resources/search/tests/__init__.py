@@ -0,0 +1 @@
+# Search resource tests.
@@ -0,0 +1,122 @@
+"""Tests for search routes: full page, HTMX partials, paging."""
+
+import re
+from collections.abc import AsyncGenerator, Generator
+from datetime import UTC, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import cache
+from src.ext.db import build_engine, get_read_session, get_session
+from src.main import app
+from src.resources._base import fulltext
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import current_session
+from src.resources.imports.models import ImportRow
+
+CSV = (
+    "Data,Valor,Identificador,Descrição\n"
+    + "".join(f"0{d}/03/2026,-39.90,n{d},Netflix <{d}>\n" for d in range(1, 4))
+    + "04/03/2026,-12.00,s1,Spotify\n"
+).encode()
+ALICE = '01HALICE0000000000000000AA'
+
+
+async def _alice() -> AuthSession:
+    return AuthSession(user_id=ALICE, expires_at=datetime.now(UTC))
+
+
+@pytest.fixture
+def client() -> Generator[TestClient]:
+    """Client logged in as Alice on a fresh DB with all tables and the index."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    created = False
+
+    async def _session() -> AsyncGenerator[AsyncSession]:
+        nonlocal created
+        if not created:
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all)
+                for statement in fulltext.index_statements(ImportRow):
+                    await conn.execute(text(statement))
+            created = True
+        async with AsyncSession(engine, expire_on_commit=False) as s:
+            yield s
+
+    cache.clear()
+    app.dependency_overrides[get_session] = _session
+    app.dependency_overrides[get_read_session] = _session
+    app.dependency_overrides[current_session] = _alice
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    cache.clear()
+
+
+def _import(client: TestClient, apply: bool = True) -> None:
+    staged = client.post('/imports/', files={'file': ('nu.csv', CSV, 'text/csv')})
+    assert staged.status_code == 201
+    apply_url = re.search(r'/imports/\w{26}/apply', staged.text)
+    assert apply_url is not None
+    if apply:
+        applied = client.post(apply_url.group(), data={'apply_all': 'true'})
+        assert applied.status_code == 200
+
+
+def test_search_page_and_partial(client: TestClient) -> None:
+    """The full page embeds the results; HX requests get only the fragment."""
+    _import(client)
+    page = client.get('/search/', params={'q': 'netf'})
+    assert page.status_code == 200
+    assert 'id="search-q"' in page.text
+    assert page.text.count('<mark>Netflix</mark>') == 3
+    assert '&lt;1&gt;' in page.text
+
+    hx = {'HX-Request': 'true'}
+    partial = client.get('/search/', params={'q': 'spot'}, headers=hx)
+    assert partial.status_code == 200
+    assert '<html' not in partial.text
+    assert '<mark>Spotify</mark>' in partial.text
+
+    empty = client.get('/search/', params={'q': 'amazon'}, headers=hx)
+    assert 'No transactions match' in empty.text
+
+    boosted = {**hx, 'HX-Target': 'content'}
+    navigation = client.get('/search/', params={'q': 'spot'}, headers=boosted)
+    assert 'id="search-q"' in navigation.text and '<html' not in navigation.text
+
+
+def test_search_pages_with_more_button(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Each page links the next through its cursor until the hits run out."""
+    monkeypatch.setattr('src.resources.search.routes.PAGE_SIZE', 2)
+    _import(client)
+    hx = {'HX-Request': 'true'}
+    first = client.get('/search/', params={'q': 'netflix'}, headers=hx)
+    assert first.text.count('<mark>') == 2
+    more = re.search(r'hx-get="(/search/\?[^"]+)"', first.text)
+    assert more is not None
+    second = client.get(more.group(1).replace('&amp;', '&'), headers=hx)
+    assert second.status_code == 200
+    assert second.text.count('<mark>') == 1
+    assert '<ul' not in second.text and 'hx-get' not in second.text
+
+
+def test_search_skips_unapplied_rows_and_bad_cursors(client: TestClient) -> None:
+    """Staged rows are not transactions yet; a forged cursor is a 400."""
+    _import(client, apply=False)
+    hx = {'HX-Request': 'true'}
+    response = client.get('/search/', params={'q': 'netflix'}, headers=hx)
+    assert 'No transactions match' in response.text
+    bad = client.get('/search/', params={'q': 'netflix', 'after': 'x'})
+    assert bad.status_code == 400
+
+
+def test_search_needs_a_login(client: TestClient) -> None:
+    """Without a session cookie search is a 401, like /export."""
+    del app.dependency_overrides[current_session]
+    assert client.get('/search/', params={'q': 'netflix'}).status_code == 401
@@ -0,0 +1,108 @@
+"""
+Production entrypoint: migrate once, check the app imports, then run N workers.
+
+    python -m src.serve
+
+The parent process runs `alembic upgrade head` a single time, imports src.main so
+a broken build fails before any worker starts, and disposes of every pooled
+connection it opened. Without a configured AUTH_SECRET_KEY it generates one and
+passes it down in the environment, so every worker signs and accepts the same
+session cookies until the next restart. uvicorn then spawns server_workers fresh
+processes (uvloop event loop, httptools parser); nothing but the listening socket
+is shared. On SIGTERM each worker stops accepting connections, finishes in-flight
+requests for up to server_graceful_timeout_seconds, runs the lifespan shutdown and
+exits.
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+from pathlib import Path
+from typing import Any
+
+import uvicorn
+from alembic.config import Config
+
+from alembic import command
+from src.ext.settings import Settings, get_settings
+
+ROOT = Path(__file__).resolve().parent.parent
+
+logger = logging.getLogger(__name__)
+
+
+def migrate() -> None:
+    """alembic upgrade head against settings' database_url."""
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(config, "head")
+
+
+def preload() -> None:
+    """Import the app once in the parent, then close the connections it pooled."""
+    import src.main  # noqa: F401
+    from src.ext import db
+
+    asyncio.run(db.dispose_engines())
+
+
+def share_secret_key(settings: Settings) -> None:
+    """Put one generated AUTH_SECRET_KEY in the environment the workers inherit.
+
+    Does nothing when a key is configured. Otherwise each worker would pick its own
+    random key and reject the cookies the others signed.
+    """
+    if settings.auth_secret_key:
+        return
+    logger.warning(
+        "AUTH_SECRET_KEY is not set; generated one for this server's workers, "
+        "sessions end when it restarts"
+    )
+    os.environ["AUTH_SECRET_KEY"] = secrets.token_urlsafe(32)
+
+
+def uvicorn_options(settings: Settings) -> dict[str, Any]:
+    """Keyword arguments for uvicorn.run from the server_* settings."""
+    workers = settings.server_workers or os.cpu_count() or 1
+    return {
+        "host": settings.server_host,
+        "port": settings.server_port,
+        "workers": workers,
+        "loop": "uvloop",
+        "http": "httptools",
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.server_forwarded_allow_ips,
+        "timeout_graceful_shutdown": settings.server_graceful_timeout_seconds,
+        "access_log": False,
+    }
+
+
+def main() -> None:
+    settings = get_settings()
+    if settings.server_migrate:
+        migrate()
+    preload()
+    share_secret_key(settings)
+    options = uvicorn_options(settings)
+    logger.info(
+        "Starting %d workers on %s:%d",
+        options["workers"],
+        options["host"],
+        options["port"],
+    )
+    uvicorn.run("src.main:app", **options)
+
+
+__all__ = [
+    "main",
+    "migrate",
+    "preload",
+    "share_secret_key",
+    "uvicorn_options",
+]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
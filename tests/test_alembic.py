@@ -12,8 +12,13 @@ import sys
 from pathlib import Path
 
 import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
 
 ROOT = Path(__file__).resolve().parent.parent
+_CONFIG = Config(str(ROOT / "alembic.ini"))
+_CONFIG.set_main_option("script_location", str(ROOT / "alembic"))
+HEAD = ScriptDirectory.from_config(_CONFIG).get_current_head()
 
 
 def _alembic(*args: str, url: str) -> subprocess.CompletedProcess[str]:
@@ -38,7 +43,7 @@ def test_upgrade_head_creates_alembic_version(migrated_db_path: str) -> None:
     rows = cur.fetchall()
     conn.close()
     assert len(rows) == 1
-    assert rows[0][0] == "001"
+    assert rows[0][0] == HEAD
 
 
 def test_upgrade_head_idempotent(migrated_db_path: str) -> None:
@@ -74,4 +79,4 @@ def test_downgrade_base_then_upgrade_head(tmp_path: Path) -> None:
     cur = conn.execute("SELECT version_num FROM alembic_version")
     rows = cur.fetchall()
     conn.close()
-    assert len(rows) == 1 and rows[0][0] == "001"
+    assert len(rows) == 1 and rows[0][0] == HEAD
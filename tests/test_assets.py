@@ -0,0 +1,90 @@
+"""Tests for the static asset pipeline (src.ext.assets)."""
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from src.ext import assets
+from src.ext.settings import get_settings
+
+CSS = b"body { color: red; }\n" * 40
+
+
+@pytest.fixture
+def built(tmp_path: Path) -> tuple[Path, dict[str, str]]:
+    """A source dir with one large and one tiny file, built into tmp/dist."""
+    source = tmp_path / "static"
+    source.mkdir()
+    (source / "output.css").write_bytes(CSS)
+    (source / "tiny.js").write_bytes(b"1")
+    out = source / "dist"
+    return out, assets.build(source, out)
+
+
+def test_build_fingerprints_and_precompresses(
+    built: tuple[Path, dict[str, str]],
+) -> None:
+    """Hashed copies, a .gz for files worth compressing, and a manifest."""
+    out, manifest = built
+    hashed = manifest["output.css"]
+    assert hashed == f"output.{assets.fingerprint(CSS)}.css"
+    assert (out / hashed).read_bytes() == CSS
+    assert gzip.decompress((out / f"{hashed}.gz").read_bytes()) == CSS
+    assert not (out / f"{manifest['tiny.js']}.gz").exists()
+    assert json.loads((out / "manifest.json").read_text()) == manifest
+
+
+def test_rebuild_drops_stale_outputs(built: tuple[Path, dict[str, str]]) -> None:
+    """Changed content gets a new name and the old files are removed."""
+    out, manifest = built
+    (out.parent / "output.css").write_bytes(CSS + b"a {}\n")
+    rebuilt = assets.build(out.parent, out)
+    assert rebuilt["output.css"] != manifest["output.css"]
+    assert not (out / manifest["output.css"]).exists()
+    assert not (out / f"{manifest['output.css']}.gz").exists()
+
+
+def test_asset_url_is_hashed_in_production(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Production links to /assets/<hashed>; development to the plain file."""
+    monkeypatch.setattr(assets, "load_manifest", lambda: {"output.css": "o.1.css"})
+    assert assets.asset_url("output.css") == "/static/output.css"
+    monkeypatch.setattr(get_settings(), "templates_production", True)
+    assert assets.asset_url("output.css") == "/assets/o.1.css"
+    assert assets.asset_url("missing.css") == "/static/missing.css"
+
+
+def test_handler_serves_precompressed_immutable(
+    built: tuple[Path, dict[str, str]],
+) -> None:
+    """The accepted variant is sent as-is, with a year of immutable caching."""
+    out, manifest = built
+    static = assets.PrecompressedStaticFiles(directory=str(out))
+    client = TestClient(Starlette(routes=[Mount("/assets", app=static)]))
+    url = f"/assets/{manifest['output.css']}"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "text/css; charset=utf-8"
+    assert response.headers["cache-control"] == assets.IMMUTABLE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == CSS  # httpx decodes the gzip body
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["cache-control"] == assets.IMMUTABLE
+
+
+def test_handler_without_build_is_404(tmp_path: Path) -> None:
+    """Before the first build every asset path is a plain 404, not an error."""
+    static = assets.PrecompressedStaticFiles(
+        directory=str(tmp_path / "missing"), check_dir=False
+    )
+    client = TestClient(Starlette(routes=[Mount("/assets", app=static)]))
+    response = client.get("/assets/output.css")
+    assert response.status_code == 404
+    assert "cache-control" not in response.headers
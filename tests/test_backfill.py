@@ -0,0 +1,168 @@
+"""Tests for online backfills and table rebuilds (src.ext.backfill)."""
+
+import sqlite3
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import Connection, create_engine
+from sqlmodel import SQLModel
+
+from src.ext import backfill as bf
+
+ROWS = 45
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    """A file database with an item table of ROWS rows and the checkpoint table."""
+    path = tmp_path / "online.db"
+    raw = sqlite3.connect(path)
+    raw.execute(
+        "CREATE TABLE item (id TEXT PRIMARY KEY, amount INTEGER, doubled INTEGER)"
+    )
+    raw.executemany(
+        "INSERT INTO item (id, amount) VALUES (?, ?)",
+        [(f"{i:04d}", i) for i in range(ROWS)],
+    )
+    raw.commit()
+    raw.close()
+    return path
+
+
+@pytest.fixture
+def connection(db_path: Path) -> Iterator[Connection]:
+    engine = create_engine(f"sqlite:///{db_path}", isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        SQLModel.metadata.tables["backfill_checkpoint"].create(conn)
+        yield conn
+    engine.dispose()
+
+
+def _doubled(connection: Connection) -> list[int | None]:
+    query = "SELECT doubled FROM item ORDER BY id"
+    return [row[0] for row in connection.exec_driver_sql(query)]
+
+
+def test_backfill_requires_autocommit(db_path: Path) -> None:
+    """Inside an outer transaction the per-chunk commits could not happen."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn, pytest.raises(ValueError):
+        bf.backfill(conn, "job", "item", "doubled = amount * 2")
+    engine.dispose()
+
+
+def test_backfill_resumes_from_checkpoint(connection: Connection) -> None:
+    """A stopped run leaves whole chunks done; the next one picks up after them."""
+    double = "doubled = amount * 2"
+    first = bf.backfill(
+        connection, "job", "item", double, chunk_size=10, pause=0, max_chunks=2
+    )
+    assert (first.rows_done, first.chunks, first.finished) == (20, 2, False)
+    assert first.last_key == "0019"
+    assert _doubled(connection)[19:21] == [38, None]
+
+    rest = bf.backfill(connection, "job", "item", double, chunk_size=10, pause=0)
+    assert (rest.rows_done, rest.chunks, rest.finished) == (ROWS, 3, True)
+    assert _doubled(connection) == [i * 2 for i in range(ROWS)]
+
+    again = bf.backfill(connection, "job", "item", "doubled = 0", pause=0)
+    assert (again.chunks, again.finished) == (0, True)
+    assert _doubled(connection)[1] == 2
+
+
+def test_backfill_filters_and_binds_params(connection: Connection) -> None:
+    """Only rows matching where are updated; params bind in both clauses."""
+    progress = bf.backfill(
+        connection,
+        "job",
+        "item",
+        "doubled = :value",
+        where="amount >= :low",
+        params={"value": -1, "low": 40},
+        pause=0,
+    )
+    assert progress.rows_done == 5
+    assert _doubled(connection)[39:] == [None] + [-1] * 5
+
+
+def test_writers_proceed_between_chunks(connection: Connection, db_path: Path) -> None:
+    """Another connection can commit while the backfill is still running."""
+    started = threading.Event()
+    result: list[bf.Progress] = []
+
+    def run() -> None:
+        started.set()
+        progress = bf.backfill(
+            connection, "slow", "item", "doubled = amount", chunk_size=1, pause=0.02
+        )
+        result.append(progress)
+
+    worker = threading.Thread(target=run)
+    worker.start()
+    started.wait()
+    writer = sqlite3.connect(db_path, timeout=0.5)
+    writer.execute("INSERT INTO item (id, amount) VALUES ('zzzz', 1)")
+    writer.commit()
+    writer.close()
+    assert worker.is_alive()
+    worker.join()
+    assert result[0].finished
+
+
+def _new_item() -> sa.Table:
+    return sa.Table(
+        "item",
+        sa.MetaData(),
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("cents", sa.Integer(), nullable=False),
+        sa.Index("ix_item_cents", "cents"),
+    )
+
+
+def test_rebuild_table_mirrors_writes_during_copy(connection: Connection) -> None:
+    """Rows changed mid-copy land in the new table, which then replaces the old."""
+    table = _new_item()
+    columns = {"cents": "amount * 100"}
+    first = bf.rebuild_table(
+        connection, "rebuild", table, columns, chunk_size=10, pause=0, max_chunks=1
+    )
+    assert not first.finished
+    connection.exec_driver_sql("UPDATE item SET amount = 1000 WHERE id = '0001'")
+    connection.exec_driver_sql("UPDATE item SET amount = 7 WHERE id = '0030'")
+    connection.exec_driver_sql("DELETE FROM item WHERE id = '0002'")
+    connection.exec_driver_sql("INSERT INTO item (id, amount) VALUES ('9999', 5)")
+
+    done = bf.rebuild_table(
+        connection, "rebuild", table, columns, chunk_size=10, pause=0
+    )
+    assert done.finished
+    rows = dict(connection.exec_driver_sql("SELECT id, cents FROM item").all())
+    assert len(rows) == ROWS
+    assert (rows["0001"], rows["0030"], rows["9999"]) == (100000, 700, 500)
+    assert "0002" not in rows
+    info = connection.exec_driver_sql("PRAGMA table_info(item)").all()
+    assert [row[1] for row in info] == ["id", "amount", "cents"]
+    schema = connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE tbl_name = 'item' AND sql IS NOT NULL"
+    ).all()
+    assert sorted(name for (name,) in schema) == ["item", "ix_item_cents"]
+
+    again = bf.rebuild_table(connection, "rebuild", table, columns, pause=0)
+    assert (again.chunks, again.finished) == (0, True)
+
+
+def test_rebuild_table_keeps_old_table_on_fk_error(connection: Connection) -> None:
+    """A rebuilt table whose rows break a new foreign key is not swapped in."""
+    connection.exec_driver_sql("CREATE TABLE owner (id TEXT PRIMARY KEY)")
+    table = _new_item()
+    table.append_column(sa.Column("owner_id", sa.String(), sa.ForeignKey("owner.id")))
+    sa.Table("owner", table.metadata, sa.Column("id", sa.String(), primary_key=True))
+    columns = {"cents": "amount", "owner_id": "'nobody'"}
+    with pytest.raises(bf.RebuildError):
+        bf.rebuild_table(connection, "fk", table, columns, pause=0)
+    info = connection.exec_driver_sql("PRAGMA table_info(item)").all()
+    assert "owner_id" not in [row[1] for row in info]
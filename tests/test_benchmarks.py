@@ -0,0 +1,32 @@
+"""Tests for the benchmark suite's data generator and baseline comparison."""
+
+from sqlalchemy import func, select
+
+from benchmarks.datagen import BenchRow, generate
+from benchmarks.run import compare
+from src.ext.db import build_engine
+
+
+async def test_generate_creates_requested_rows() -> None:
+    """generate() fills bench_row with exactly the requested number of rows."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    sample = await generate(engine, 250)
+    async with engine.connect() as conn:
+        statement = select(func.count()).select_from(BenchRow)
+        count = (await conn.execute(statement)).scalar()
+    await engine.dispose()
+    assert count == 250
+    assert sample == sorted(sample)
+
+
+def test_compare_flags_only_regressions_over_threshold() -> None:
+    """A benchmark is flagged only when its median grew more than the threshold."""
+    baseline = {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}
+    current = {
+        "a": {"median_ms": 11.0},
+        "b": {"median_ms": 13.0},
+        "c": {"median_ms": 1.0},
+    }
+    regressions = compare(current, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
@@ -0,0 +1,130 @@
+"""Tests for the response cache (src.ext.cache) and its ETag support."""
+
+from collections.abc import Generator
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from fastapi import Depends, Request, Response
+from fastapi.testclient import TestClient
+
+from src.ext import cache
+from src.ext.settings import get_settings
+from src.main import app
+from src.resources.auth import logic as auth_logic
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import current_session
+
+
+@app.get('/_test_cached_rows')
+@cache.cached_page('test_rows')
+async def _cached_rows(request: Request) -> Response:
+    return Response(content=str(cache.versions(('test_rows',))))
+
+
+@app.get('/_test_cached_user', dependencies=[Depends(current_session)])
+@cache.cached_page()
+async def _cached_user(request: Request) -> Response:
+    return Response(content=getattr(request.state, 'user_id', 'anon'))
+
+
+@pytest.fixture
+def client() -> Generator[TestClient]:
+    cache.clear()
+    yield TestClient(app)
+    cache.share_versions(None)
+
+
+def test_repeat_request_is_a_cache_hit_with_same_etag(client: TestClient) -> None:
+    """Second GET / is served from cache with the same strong ETag."""
+    first = client.get('/')
+    second = client.get('/')
+    assert first.status_code == second.status_code == 200
+    assert first.headers['etag'] == second.headers['etag']
+    assert first.text == second.text
+    assert cache.stats['misses'] == 1
+    assert cache.stats['hits'] == 1
+
+
+def test_if_none_match_returns_304(client: TestClient) -> None:
+    """A matching If-None-Match gets 304 with no body."""
+    etag = client.get('/').headers['etag']
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+def test_theme_cookie_is_part_of_the_key(client: TestClient) -> None:
+    """Light and dark pages are cached separately."""
+    light = client.get('/')
+    client.cookies.set('theme', 'dark')
+    dark = client.get('/')
+    assert light.headers['etag'] != dark.headers['etag']
+    assert cache.stats['misses'] == 2
+
+
+def test_each_login_gets_its_own_entries(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Two session cookies (and none) never share a cached page."""
+
+    async def authenticate(_session: Any, token: str) -> AuthSession:
+        return AuthSession(user_id=token, expires_at=datetime.now(UTC))
+
+    monkeypatch.setattr(auth_logic, 'authenticate', authenticate)
+    bodies = []
+    for cookie in ('alice', 'bob', None):
+        client.cookies.clear()
+        if cookie is not None:
+            client.cookies.set('session', cookie)
+        bodies += [client.get('/_test_cached_user').text for _ in range(2)]
+    assert bodies == ['alice', 'alice', 'bob', 'bob', 'anon', 'anon']
+    assert cache.stats['misses'] == 3
+    assert cache.stats['hits'] == 3
+
+
+def test_bump_invalidates_dependent_entries(client: TestClient) -> None:
+    """Entries rendered from a table are re-rendered after its version is bumped."""
+    first = client.get('/_test_cached_rows')
+    client.get('/_test_cached_rows')
+    cache.bump('test_rows')
+    third = client.get('/_test_cached_rows')
+    assert cache.stats['misses'] == 2
+    assert first.text != third.text
+
+
+def test_lru_evicts_oldest_entry(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """With room for one entry, caching a second key evicts the first."""
+    monkeypatch.setattr(get_settings(), 'response_cache_max_entries', 1)
+    client.get('/')
+    client.get('/?month=2026-01')
+    client.get('/')
+    assert cache.stats['evictions'] == 2
+    assert cache.stats['misses'] == 3
+
+
+def test_other_workers_writes_arrive_through_the_shared_stamps(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Another worker's write makes entries stale; an own write renders only once."""
+    monkeypatch.setattr(get_settings(), 'response_cache_stamp_seconds', 0.0)
+    shared = {'test_rows': 7}
+
+    async def read() -> dict[str, int]:
+        return dict(shared)
+
+    cache.share_versions(read)
+    first = client.get('/_test_cached_rows')
+    assert client.get('/_test_cached_rows').text == first.text
+    shared['test_rows'] += 1  # another worker wrote
+    second = client.get('/_test_cached_rows')
+    assert second.text != first.text
+
+    cache.bump('test_rows')  # a write here, which moved the stamp as well
+    shared['test_rows'] += 1
+    third = client.get('/_test_cached_rows')
+    assert third.text != second.text
+    assert client.get('/_test_cached_rows').text == third.text
+    assert cache.stats['misses'] == 3
@@ -0,0 +1,94 @@
+"""Tests for HTML/JSON response compression (src.ext.compression)."""
+
+import gzip
+import zlib
+from collections.abc import Iterator
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.ext import compression
+
+PAGE = "<p>netflix 39,90</p>\n" * 200
+
+
+async def _page(request: Request) -> Response:
+    return HTMLResponse(PAGE, headers={"ETag": '"abc"'})
+
+
+async def _tiny(request: Request) -> Response:
+    return JSONResponse({"ok": True})
+
+
+async def _download(request: Request) -> Response:
+    return Response(gzip.compress(PAGE.encode()), media_type="application/gzip")
+
+
+async def _precompressed(request: Request) -> Response:
+    body = gzip.compress(PAGE.encode())
+    return HTMLResponse(body, headers={"Content-Encoding": "gzip"})
+
+
+async def _stream(request: Request) -> Response:
+    def chunks() -> Iterator[str]:
+        for _ in range(20):
+            yield PAGE
+
+    return StreamingResponse(chunks(), media_type="text/html")
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = Starlette(
+        routes=[
+            Route("/page", _page),
+            Route("/tiny", _tiny),
+            Route("/download", _download),
+            Route("/precompressed", _precompressed),
+            Route("/stream", _stream),
+        ]
+    )
+    app.add_middleware(compression.CompressionMiddleware)
+    return TestClient(app, headers={"Accept-Encoding": "gzip"})
+
+
+def test_html_over_threshold_is_gzipped_with_weak_etag(client: TestClient) -> None:
+    """Large HTML goes out gzipped, a fraction of its size, with a weak ETag."""
+    response = client.get("/page")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"] == 'W/"abc"'
+    assert int(response.headers["content-length"]) < len(PAGE) / 10
+    assert response.text == PAGE
+
+
+def test_small_excluded_and_encoded_bodies_pass_through(client: TestClient) -> None:
+    """Tiny JSON, gzip downloads and precompressed bodies are not touched."""
+    assert "content-encoding" not in client.get("/tiny").headers
+    download = client.get("/download")
+    assert "content-encoding" not in download.headers
+    assert gzip.decompress(download.content) == PAGE.encode()
+    precompressed = client.get("/precompressed")
+    assert precompressed.text == PAGE
+    identity = client.get("/page", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in identity.headers
+
+
+def test_streamed_html_is_compressed_chunk_by_chunk(client: TestClient) -> None:
+    """Each streamed chunk is flushed; the whole decodes to the original body."""
+    with client.stream("GET", "/stream") as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert zlib.decompress(raw, 31) == PAGE.encode() * 20
+
+
+def test_choose_encoding_respects_q_zero() -> None:
+    """An encoding listed with q=0 is refused, not accepted."""
+    assert compression.choose_encoding("gzip, deflate") == "gzip"
+    assert compression.choose_encoding("gzip;q=0") is None
+    assert compression.choose_encoding("") is None
@@ -5,9 +5,11 @@ Tests for the async database adapter (src.ext.db).
 import pytest
 
 from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.ext.db import engine, get_session
+from src.ext import db
+from src.ext.db import build_engine, build_read_engine, get_session
 
 
 @pytest.mark.asyncio
@@ -34,8 +36,59 @@ async def test_session_executes_sql() -> None:
 @pytest.mark.asyncio
 async def test_engine_connect() -> None:
     """Engine can establish a connection (smoke test)."""
-    async with engine.begin() as conn:
+    async with db.get_engine().begin() as conn:
         result = await conn.run_sync(
             lambda sync_conn: sync_conn.execute(text("SELECT 1")).scalar()
         )
     assert result == 1
+
+
+@pytest.mark.asyncio
+async def test_file_engine_applies_tuning_profile(tmp_path) -> None:
+    """New SQLite connections run in WAL mode with foreign keys enforced."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"
+    file_engine = build_engine(url)
+    try:
+        async with file_engine.connect() as conn:
+            journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            fks = (await conn.execute(text("PRAGMA foreign_keys"))).scalar()
+    finally:
+        await file_engine.dispose()
+    assert journal == "wal"
+    assert fks == 1
+
+
+@pytest.mark.asyncio
+async def test_read_engine_rejects_writes(tmp_path) -> None:
+    """The read-only pool can read a file DB but refuses to write to it."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'ro.db'}"
+    write_engine = build_engine(url)
+    read_only = build_read_engine(url)
+    assert read_only is not None
+    try:
+        async with write_engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        async with read_only.connect() as conn:
+            count = (await conn.execute(text("SELECT count(*) FROM t"))).scalar()
+            assert count == 0
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (1)"))
+    finally:
+        await read_only.dispose()
+        await write_engine.dispose()
+
+
+def test_read_engine_is_none_for_memory_db() -> None:
+    """In-memory SQLite has no shared file, so no separate read pool is built."""
+    assert build_read_engine("sqlite+aiosqlite:///:memory:") is None
+
+
+@pytest.mark.asyncio
+async def test_default_engine_is_built_lazily_and_disposed() -> None:
+    """get_engine builds one engine on demand; dispose_engines drops it."""
+    await db.dispose_engines()
+    first = db.get_engine()
+    assert db.get_engine() is first
+    assert db.get_sessionmaker().kw["bind"] is first
+    await db.dispose_engines()
+    assert db.get_engine() is not first
@@ -0,0 +1,47 @@
+"""
+Tests for the SMTP connection pool (src.ext.mail) against the local stand-in.
+"""
+
+import asyncio
+import smtplib
+
+import pytest
+
+from src.ext.mail import LocalSMTPServer, SMTPPool
+
+
+async def test_pool_delivers_and_reuses_connections() -> None:
+    """Sequential sends share one connection; the stand-in keeps each message."""
+    async with LocalSMTPServer() as server:
+        pool = SMTPPool(server.host, server.port, "app@example.com", size=2)
+        for i in range(3):
+            await pool.send(pool.message("me@example.com", f"Hello {i}", "Body"))
+        await pool.close()
+    assert [m["Subject"] for m in server.messages] == ["Hello 0", "Hello 1", "Hello 2"]
+    assert server.messages[0]["From"] == "app@example.com"
+    assert server.messages[0].get_content().strip() == "Body"
+    assert server.connections == 1
+
+
+async def test_pool_bounds_concurrent_connections() -> None:
+    """Many concurrent sends never open more than size connections."""
+    async with LocalSMTPServer() as server:
+        pool = SMTPPool(server.host, server.port, "app@example.com", size=3)
+        messages = [pool.message("me@example.com", str(i), "x") for i in range(30)]
+        await asyncio.gather(*(pool.send(message) for message in messages))
+        await pool.close()
+    assert len(server.messages) == 30
+    assert server.max_active <= 3
+    assert server.connections <= 3
+
+
+async def test_refused_recipient_raises_and_pool_recovers() -> None:
+    """A refused send raises; the next send opens a fresh connection and succeeds."""
+    reject = frozenset({"nobody@example.com"})
+    async with LocalSMTPServer(reject=reject) as server:
+        pool = SMTPPool(server.host, server.port, "app@example.com", size=1)
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            await pool.send(pool.message("nobody@example.com", "x", "x"))
+        await pool.send(pool.message("me@example.com", "ok", "x"))
+        await pool.close()
+    assert [m["Subject"] for m in server.messages] == ["ok"]
@@ -24,11 +24,12 @@ def test_home_returns_200_and_html(client: TestClient) -> None:
 
 
 def test_toggle_theme_light_to_dark(client: TestClient) -> None:
-    """POST /theme/toggle with no cookie sets theme=dark and HX-Refresh."""
+    """POST /theme/toggle with no cookie sets theme=dark and swaps it in place."""
     response = client.post("/theme/toggle")
     assert response.status_code == 204
     assert "theme=dark" in response.headers.get("set-cookie", "")
-    assert response.headers.get("hx-refresh") == "true"
+    assert "hx-refresh" not in response.headers
+    assert response.headers["hx-trigger"] == '{"theme-changed": "dark"}'
 
 
 def test_toggle_theme_dark_to_light(client: TestClient) -> None:
@@ -0,0 +1,143 @@
+"""Tests for request timing (src.ext.metrics): Server-Timing, /metrics, slow SQL."""
+
+import asyncio
+import gc
+import logging
+import os
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.ext import cache, db, metrics
+from src.ext.db import build_engine
+from src.ext.settings import get_settings
+from src.main import app
+
+
+@pytest.fixture
+def client() -> TestClient:
+    cache.clear()
+    metrics.reset()
+    return TestClient(app)
+
+
+def test_server_timing_reports_each_phase(client: TestClient) -> None:
+    """Responses carry db, render and total durations; rendering took time."""
+    response = client.get('/')
+    header = response.headers['server-timing']
+    phases = dict(part.strip().split(';dur=') for part in header.split(','))
+    assert set(phases) == {'db', 'render', 'total'}
+    assert float(phases['render']) > 0
+
+
+def test_metrics_exposes_per_route_histograms(client: TestClient) -> None:
+    """/metrics lists a histogram series for the route that was requested."""
+    client.get('/')
+    body = client.get('/metrics').text
+    labels = f'method="GET",route="/",phase="total",pid="{os.getpid()}"'
+    assert f'http_request_phase_seconds_count{{{labels}}} 1' in body
+    assert f'http_request_phase_seconds_bucket{{{labels},le="+Inf"}} 1' in body
+
+
+async def test_slow_queries_are_logged(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """With slow_query_ms=0 every statement is logged as slow."""
+    monkeypatch.setattr(get_settings(), 'slow_query_ms', 0)
+    engine = build_engine('sqlite+aiosqlite:///:memory:')
+    with caplog.at_level(logging.WARNING, logger='src.ext.metrics'):
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 42'))
+    await engine.dispose()
+    assert any('SELECT 42' in r.getMessage() for r in caplog.records)
+
+
+def _count(metric: str, pool: str) -> float:
+    return metrics.pool_snapshot().get(pool, {}).get(metric, 0.0)
+
+
+async def test_pool_reports_in_use_wait_and_checkout(tmp_path: Path) -> None:
+    """An exhausted pool shows a waiter; wait and checkout times are recorded."""
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path}/pool.db', pool_size=1, max_overflow=0
+    )
+    metrics.instrument_pool(engine, 'test')
+    held = await engine.connect()
+    assert _count('pool_connections_in_use', 'test') == 1
+
+    async def connect() -> AsyncConnection:
+        return await engine.connect()
+
+    waiter = asyncio.create_task(connect())
+    await asyncio.sleep(0.05)
+    assert _count('pool_waiting', 'test') == 1
+    await held.close()
+    second = await waiter
+    await second.close()
+    await engine.dispose()
+
+    assert _count('pool_connections_in_use', 'test') == 0
+    assert _count('pool_waiting', 'test') == 0
+    assert _count('pool_checkout_seconds_count', 'test') == 2
+    assert _count('pool_wait_seconds_sum', 'test') >= 0.05
+
+
+async def test_session_held_too_long_is_logged_with_its_opener(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Closing a session open past session_warn_seconds logs where it was opened."""
+    monkeypatch.setattr(get_settings(), 'session_warn_seconds', 0.0)
+    engine = build_engine('sqlite+aiosqlite:///:memory:')
+    factory = async_sessionmaker(
+        engine, class_=metrics.TrackedSession, info={'pool': 'slow'}
+    )
+    with caplog.at_level(logging.WARNING, logger='src.ext.metrics'):
+        async with factory() as session:
+            await session.exec(text('SELECT 1'))  # pyright: ignore[reportCallIssue]
+    await engine.dispose()
+    assert _count('sessions_open', 'slow') == 0
+    assert _count('sessions_held_too_long_total', 'slow') == 1
+    message = caplog.records[-1].getMessage()
+    assert 'closed after' in message
+    assert 'test_session_held_too_long_is_logged_with_its_opener' in message
+
+
+def test_unclosed_session_is_reported_as_leaked(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """A session dropped without close() is counted and logged when collected."""
+    monkeypatch.setattr(get_settings(), 'session_warn_seconds', 60.0)
+    session = metrics.TrackedSession(info={'pool': 'leaky'})
+    assert _count('sessions_open', 'leaky') == 1
+    with caplog.at_level(logging.WARNING, logger='src.ext.metrics'):
+        del session
+        gc.collect()
+    assert _count('sessions_open', 'leaky') == 0
+    messages = [r.getMessage() for r in caplog.records if r.name == metrics.__name__]
+    assert 'without close()' in messages[-1]
+
+
+async def test_get_session_is_tracked() -> None:
+    """Sessions from get_session count as open until the dependency finishes."""
+    before = _count('session_seconds_count', 'write')
+    async for session in db.get_session():
+        assert isinstance(session, metrics.TrackedSession)
+        assert _count('sessions_open', 'write') >= 1
+    assert _count('session_seconds_count', 'write') == before + 1
+
+
+def test_pool_metrics_are_exposed(client: TestClient) -> None:
+    """Pool series are in /metrics; /metrics/pools has them as JSON."""
+    body = client.get('/metrics').text
+    for metric, (kind, _help) in metrics.POOL_METRICS.items():
+        assert f'# TYPE db_{metric} {kind}' in body
+    response = client.get('/metrics/pools')
+    assert response.status_code == 200
+    assert isinstance(response.json(), dict)
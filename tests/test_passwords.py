@@ -0,0 +1,61 @@
+"""Tests for off-loop password hashing with backpressure (src.ext.passwords)."""
+
+import asyncio
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from src.ext import passwords
+
+
+@pytest.fixture
+def hasher() -> Iterator[passwords.PasswordHasher]:
+    hasher = passwords.PasswordHasher(workers=2, max_pending=4, n=2**10)
+    yield hasher
+    hasher.close()
+
+
+async def test_hash_verifies_and_records_its_cost(
+    hasher: passwords.PasswordHasher,
+) -> None:
+    """A hash verifies its password only; a cheaper-cost hash needs a rehash."""
+    encoded = await hasher.hash("correct horse")
+    assert encoded.startswith("scrypt$1024$8$1$")
+    assert await hasher.verify("correct horse", encoded)
+    assert not await hasher.verify("wrong", encoded)
+    assert not await hasher.verify("correct horse", None)
+    assert not await hasher.verify("x", "not-a-hash")
+    assert not hasher.needs_rehash(encoded)
+    assert hasher.needs_rehash(passwords.hash_sync("correct horse", 2**9))
+    assert hasher.pending == 0
+
+
+async def test_full_queue_is_refused_not_queued(
+    hasher: passwords.PasswordHasher,
+) -> None:
+    """Past max_pending, hash() fails at once instead of adding to the wait."""
+    running = [asyncio.create_task(hasher.hash("pw")) for _ in range(4)]
+    await asyncio.sleep(0)
+    assert hasher.pending == 4
+    with pytest.raises(passwords.HasherBusyError):
+        await hasher.hash("pw")
+    await asyncio.gather(*running)
+    assert hasher.pending == 0
+
+
+async def test_login_burst_does_not_stall_the_event_loop() -> None:
+    """While a burst of full-cost hashes runs, the loop keeps ticking."""
+    hasher = passwords.PasswordHasher(workers=2, max_pending=8, n=2**14)
+    started = time.perf_counter()
+    passwords.hash_sync("pw", 2**14)
+    one_hash = time.perf_counter() - started
+    burst = asyncio.gather(*(hasher.hash("pw") for _ in range(8)))
+    worst = 0.0
+    while not burst.done():
+        tick = time.perf_counter()
+        await asyncio.sleep(0)
+        worst = max(worst, time.perf_counter() - tick)
+    await burst
+    hasher.close()
+    assert worst < one_hash / 2
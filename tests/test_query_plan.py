@@ -0,0 +1,43 @@
+"""
+Tests for the EXPLAIN QUERY PLAN guard (src.ext.query_plan).
+"""
+
+import pytest
+from sqlalchemy import text
+
+from src.ext.db import build_engine
+from src.ext.query_plan import FullScanError, forbid_full_scans, full_scans
+
+
+def test_full_scans_counts_every_scan_but_not_searches() -> None:
+    """Index walks and `SCAN TABLE` are full scans; SEARCH and FTS lookups are not."""
+    plan = [
+        (2, 0, 0, "SEARCH income USING INDEX ix_income_user_id_date (user_id=?)"),
+        (3, 0, 0, "SCAN debt USING INDEX sqlite_autoindex_debt_1"),
+        (4, 0, 0, "SCAN category"),
+        (5, 0, 0, "SCAN TABLE alert_rule"),
+        (6, 0, 0, "SCAN rule USING COVERING INDEX ix_rule_pattern"),
+        (7, 0, 0, "SCAN CONSTANT ROW"),
+        (8, 0, 0, "USE TEMP B-TREE FOR ORDER BY"),
+        (9, 0, 0, "SCAN income_fts VIRTUAL TABLE INDEX 0:M1"),
+    ]
+    assert full_scans(plan) == ["debt", "category", "alert_rule", "rule"]
+
+
+async def test_guard_raises_on_full_scan_and_honours_allow() -> None:
+    """An unindexed filter fails the block unless its table is allowed."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)"))
+    query = text("SELECT id FROM t WHERE name = :name")
+    with pytest.raises(FullScanError, match="full scan of t"):
+        async with forbid_full_scans(engine), engine.connect() as conn:
+            await conn.execute(query, {"name": "x"})
+    async with (
+        forbid_full_scans(engine, allow=["t"]) as explained,
+        engine.connect() as conn,
+    ):
+        await conn.execute(query, {"name": "x"})
+        await conn.execute(text("SELECT id FROM t WHERE id = 1"))
+    assert len(explained) == 2
+    await engine.dispose()
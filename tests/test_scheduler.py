@@ -0,0 +1,131 @@
+"""
+Tests for the leased job scheduler (src.ext.scheduler).
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext.db import build_engine
+from src.ext.scheduler import Job, ScheduledJob, Scheduler
+
+
+@pytest.fixture
+async def engine(tmp_path: Path) -> AsyncGenerator[AsyncEngine]:
+    """File-backed engine (shared by several schedulers) with scheduled_job."""
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path}/jobs.db")
+    table = ScheduledJob.__table__  # pyright: ignore[reportAttributeAccessIssue]
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all, tables=[table])
+    yield engine
+    await engine.dispose()
+
+
+async def _noop() -> None:
+    return None
+
+
+async def _state(engine: AsyncEngine, name: str) -> ScheduledJob:
+    async with AsyncSession(engine) as session:
+        statement = select(ScheduledJob).where(ScheduledJob.name == name)
+        result = await session.exec(statement)
+        return result.one()
+
+
+async def _make_due(engine: AsyncEngine, name: str) -> None:
+    async with engine.begin() as conn:
+        statement = (
+            update(ScheduledJob)
+            .where(ScheduledJob.name == name)  # type: ignore[arg-type]
+            .values(next_run_at=0.0)
+        )
+        await conn.execute(statement)
+
+
+async def test_due_job_runs_once_across_workers(engine: AsyncEngine) -> None:
+    """Two schedulers on one database: only one of them wins the run."""
+    calls: list[str] = []
+
+    async def job() -> None:
+        calls.append("run")
+
+    first, second = Scheduler(engine), Scheduler(engine)
+    for scheduler in (first, second):
+        scheduler.add(Job("count", job, interval=60, jitter=0.0))
+        await scheduler.register()
+    await _make_due(engine, "count")
+
+    ran = await first.run_pending() + await second.run_pending()
+    assert ran == ["count"]
+    assert calls == ["run"]
+    state = await _state(engine, "count")
+    assert state.run_count == 1
+    assert state.lease_owner is None
+    assert 59 <= state.next_run_at - time.time() <= 61
+
+
+async def test_jitter_spreads_next_run(engine: AsyncEngine) -> None:
+    """next_delay stays within interval +/- jitter and is not constant."""
+    job = Job("spread", _noop, interval=100, jitter=0.2)
+    delays = {job.next_delay() for _ in range(50)}
+    assert all(80 <= delay <= 120 for delay in delays)
+    assert len(delays) > 1
+
+
+async def test_failed_job_records_error_and_releases_lease(
+    engine: AsyncEngine,
+) -> None:
+    """An exception is logged into last_error; the job is scheduled again."""
+
+    async def boom() -> None:
+        raise RuntimeError("smtp down")
+
+    scheduler = Scheduler(engine)
+    scheduler.add(Job("boom", boom, interval=60, jitter=0.0))
+    await scheduler.register()
+    await _make_due(engine, "boom")
+    assert await scheduler.run_pending() == ["boom"]
+    state = await _state(engine, "boom")
+    assert state.last_error == "RuntimeError: smtp down"
+    assert state.lease_owner is None
+    assert await scheduler.run_pending() == []
+
+
+async def test_expired_lease_is_taken_over(engine: AsyncEngine) -> None:
+    """A lease left by a dead worker blocks others only until it expires."""
+    scheduler = Scheduler(engine)
+    scheduler.add(Job("stale", _noop, interval=60, jitter=0.0))
+    await scheduler.register()
+    async with engine.begin() as conn:
+        held = update(ScheduledJob).values(
+            next_run_at=0.0, lease_owner="dead", lease_until=time.time() + 60
+        )
+        await conn.execute(held)
+    assert await scheduler.run_pending() == []
+    async with engine.begin() as conn:
+        await conn.execute(update(ScheduledJob).values(lease_until=0.0))
+    assert await scheduler.run_pending() == ["stale"]
+
+
+async def test_start_and_stop(engine: AsyncEngine) -> None:
+    """The background loop registers jobs, runs due ones, and stops cleanly."""
+    calls: list[str] = []
+
+    async def job() -> None:
+        calls.append("run")
+
+    scheduler = Scheduler(engine, tick=0.01)
+    scheduler.add(Job("loop", job, interval=60, jitter=0.0))
+    scheduler.start()
+    for _ in range(200):
+        if calls:
+            break
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+    assert calls == ["run"]
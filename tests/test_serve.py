@@ -0,0 +1,87 @@
+"""
+Tests for the production entrypoint (src.serve).
+"""
+
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from src.ext.settings import Settings
+from src.serve import share_secret_key, uvicorn_options
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_uvicorn_options_from_settings() -> None:
+    """Workers default to the CPU count; uvloop, httptools and the grace period."""
+    options = uvicorn_options(Settings(server_port=9000))
+    assert options["workers"] == (os.cpu_count() or 1)
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+    assert options["port"] == 9000
+    assert options["timeout_graceful_shutdown"] == 25
+    assert uvicorn_options(Settings(server_workers=3))["workers"] == 3
+
+
+def test_share_secret_key_only_when_unset(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Workers inherit one generated key; a configured key is left alone."""
+    # setenv first so the key share_secret_key writes is removed afterwards.
+    monkeypatch.setenv("AUTH_SECRET_KEY", "")
+    monkeypatch.delenv("AUTH_SECRET_KEY")
+    share_secret_key(Settings(auth_secret_key="configured"))
+    assert "AUTH_SECRET_KEY" not in os.environ
+    share_secret_key(Settings(auth_secret_key=""))
+    generated = os.environ["AUTH_SECRET_KEY"]
+    assert len(generated) >= 32
+    assert Settings().auth_secret_key == generated
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_serve_migrates_runs_workers_and_stops_on_sigterm(tmp_path: Path) -> None:
+    """Two workers answer on a migrated DB and all exit promptly on SIGTERM."""
+    port = _free_port()
+    db_file = tmp_path / "serve.db"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{db_file}",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": "2",
+        "SERVER_GRACEFUL_TIMEOUT_SECONDS": "5",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.serve"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        status = None
+        deadline = time.monotonic() + 30
+        while status is None and time.monotonic() < deadline:
+            try:
+                status = httpx.get(f"http://127.0.0.1:{port}/").status_code
+            except httpx.TransportError:
+                time.sleep(0.2)
+        assert status == 200
+        with sqlite3.connect(db_file) as conn:
+            version = conn.execute("SELECT version_num FROM alembic_version").fetchone()
+        assert version is not None
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
@@ -0,0 +1,59 @@
+"""
+Import-time budget: cold startup of src.main and of the Alembic env.
+
+Each check runs a fresh interpreter with -X importtime and sums the cumulative
+time of the top-level imports. Importing must not open a database either: the
+aiosqlite driver is only loaded when the first engine connects.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds, generous enough for a slow CI runner; a regression that builds an
+# engine or pulls the web stack into Alembic at import blows well past them.
+MAIN_BUDGET_SECONDS = 2.5
+ALEMBIC_BUDGET_SECONDS = 1.5
+
+
+def _import_profile(args: list[str], env: dict[str, str]) -> tuple[float, set[str]]:
+    """Run python -X importtime args; return (total seconds, modules imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    total_us = 0
+    modules: set[str] = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):  # one space: imported at top level
+            total_us += int(cumulative)
+    return total_us / 1_000_000, modules
+
+
+def test_main_import_is_within_budget() -> None:
+    """import src.main stays fast and does not load the DB driver."""
+    seconds, modules = _import_profile(["-c", "import src.main"], {})
+    assert "src.main" in modules
+    assert "aiosqlite" not in modules
+    assert seconds < MAIN_BUDGET_SECONDS, f"{seconds:.2f}s"
+
+
+def test_alembic_env_import_is_within_budget(tmp_path: Path) -> None:
+    """alembic upgrade loads models only: no web framework, no async engine."""
+    env = {"DATABASE_URL": f"sqlite:///{tmp_path / 'budget.db'}"}
+    seconds, modules = _import_profile(["-m", "alembic", "upgrade", "head"], env)
+    assert "src.resources._base.models" in modules
+    assert modules.isdisjoint({"aiosqlite", "fastapi", "src.ext.db"})
+    assert seconds < ALEMBIC_BUDGET_SECONDS, f"{seconds:.2f}s"
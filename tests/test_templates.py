@@ -0,0 +1,76 @@
+"""Tests for the shared template layer (src.ext.templates)."""
+
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.ext import templates as templates_module
+from src.ext.settings import get_settings
+from src.main import app
+from src.resources.auth.models import AuthSession
+from src.resources.auth.routes import current_session
+
+
+@app.get('/_test_stream')
+async def _stream(request: Request) -> StreamingResponse:
+    return templates_module.stream_template(
+        request, 'index.html', {'active_page': 'overview'}
+    )
+
+
+def test_production_environment_uses_bytecode_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Production mode disables auto_reload and writes compiled bytecode to disk."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, 'templates_production', True)
+    monkeypatch.setattr(settings, 'templates_bytecode_dir', str(tmp_path))
+    env = templates_module.build_environment(
+        bytecode_cache=templates_module._bytecode_cache()
+    )
+    assert env.auto_reload is False
+    env.get_template('layout.html')
+    assert any(tmp_path.iterdir())
+
+
+def test_precompile_loads_every_template() -> None:
+    """precompile() compiles all base and resource templates."""
+    count = templates_module.precompile()
+    assert count == len(templates_module.templates.env.list_templates())
+    assert count >= 3
+
+
+def test_stream_template_streams_full_page() -> None:
+    """stream_template() renders the same layout as a regular response."""
+    response = TestClient(app).get('/_test_stream')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/html')
+    assert 'FinAdv' in response.text
+
+
+def test_htmx_navigation_gets_only_the_content_block(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A boosted request for #content skips the layout but keeps the <title>."""
+
+    async def logged_in() -> AuthSession:
+        expires_at = datetime.now(UTC)
+        return AuthSession(user_id='01HALICE0000000000000000AA', expires_at=expires_at)
+
+    monkeypatch.setitem(app.dependency_overrides, current_session, logged_in)
+    client = TestClient(app)
+    full = client.get('/_test_stream')
+    headers = {'HX-Request': 'true', 'HX-Target': 'content'}
+    for path in ('/', '/_test_stream', '/imports/'):
+        fragment = client.get(path, headers=headers)
+        assert fragment.status_code == 200
+        assert '<html' not in fragment.text and '<nav' not in fragment.text
+        assert fragment.text.startswith('<title>')
+    assert len(fragment.text) < len(full.text) / 4
+    assert 'Import bank CSV' in fragment.text
+    restore = {**headers, 'HX-History-Restore-Request': 'true'}
+    assert '<html' in client.get('/imports/', headers=restore).text
@@ -0,0 +1,185 @@
+"""Tests for the group-commit write queue (src.ext.writer)."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ext import writer
+from src.ext.db import build_engine
+from src.resources._base import identity
+from src.resources._base import repository as base_repo
+from src.resources._base.models import (
+    BaseTable,
+    IdentityCacheSpec,
+    MonthlyRollup,
+    RollupSpec,
+)
+
+
+class _QueuedMovement(BaseTable, table=True):
+    __tablename__ = "test_queued_movement"  # pyright: ignore[reportAssignmentType]
+    __rollup__ = RollupSpec(kind="debt")
+    __identity_cache__ = IdentityCacheSpec()
+
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    date: date
+
+
+@pytest.fixture
+async def engine(tmp_path: Path) -> AsyncGenerator[AsyncEngine]:
+    identity.clear()
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'queue.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(text("CREATE TABLE note (body TEXT NOT NULL)"))
+    yield engine
+    await engine.dispose()
+    identity.clear()
+
+
+@pytest.fixture
+async def queue(engine: AsyncEngine) -> AsyncGenerator[writer.WriteQueue]:
+    queue = writer.WriteQueue(engine, max_delay=0.01)
+    await queue.start()
+    writer.install(queue)
+    yield queue
+    await queue.stop()
+
+
+def _insert_note(body: str | None) -> writer.Operation[str | None]:
+    async def operation(session: AsyncSession) -> str | None:
+        await session.exec(  # pyright: ignore[reportCallIssue]
+            text("INSERT INTO note (body) VALUES (:body)"), params={"body": body}
+        )
+        return body
+
+    return operation
+
+
+async def _notes(engine: AsyncEngine) -> list[str]:
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT body FROM note ORDER BY body"))
+        return [row[0] for row in result]
+
+
+async def test_concurrent_writes_share_commits(
+    engine: AsyncEngine, queue: writer.WriteQueue
+) -> None:
+    """Twenty concurrent submits commit in fewer transactions than writes."""
+    bodies = [f"n{i:02d}" for i in range(20)]
+    results = await asyncio.gather(*(queue.submit(_insert_note(b)) for b in bodies))
+    assert results == bodies
+    assert await _notes(engine) == bodies
+    assert queue.stats["writes"] == 20
+    assert queue.stats["batches"] < 20
+
+
+async def test_failing_operation_does_not_undo_others(
+    engine: AsyncEngine, queue: writer.WriteQueue
+) -> None:
+    """The NOT NULL violation fails only its caller; the rest of the batch commits."""
+    committed: list[str] = []
+
+    def tracked(body: str | None) -> writer.Operation[str | None]:
+        insert = _insert_note(body)
+
+        async def operation(session: AsyncSession) -> str | None:
+            result = await insert(session)
+            writer.after_commit(session, lambda: committed.append(str(body)))
+            return result
+
+        return operation
+
+    results = await asyncio.gather(
+        queue.submit(tracked("a")),
+        queue.submit(tracked(None)),
+        queue.submit(tracked("b")),
+        return_exceptions=True,
+    )
+    assert results[0] == "a" and results[2] == "b"
+    assert isinstance(results[1], Exception)
+    assert await _notes(engine) == ["a", "b"]
+    assert sorted(committed) == ["a", "b"]
+    assert queue.stats["failed"] == 1
+
+
+async def test_repository_writes_go_through_queue(
+    engine: AsyncEngine, queue: writer.WriteQueue
+) -> None:
+    """add/update/delete_by_id commit via the queue and keep rollups and cache."""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        row = await base_repo.add(
+            session, _QueuedMovement(amount=Decimal("10.00"), date=date(2026, 3, 1))
+        )
+        assert row in session and row not in session.dirty
+        assert await base_repo.get_by_id(session, _QueuedMovement, row.id) is row
+        row.amount = Decimal("12.50")
+        await base_repo.update(session, row)
+    async with AsyncSession(engine) as session:
+        fresh = await base_repo.get_by_id(session, _QueuedMovement, row.id)
+        assert fresh is not None and fresh.amount == Decimal("12.50")
+        totals = (await session.exec(select(MonthlyRollup))).all()
+        assert [(t.month, t.total_cents) for t in totals] == [("2026-03", 1250)]
+        deleted = await base_repo.delete_by_id(session, _QueuedMovement, row.id)
+        assert deleted is not None and deleted not in session
+    async with AsyncSession(engine) as session:
+        assert await base_repo.get_by_id(session, _QueuedMovement, row.id) is None
+        totals = (await session.exec(select(MonthlyRollup))).all()
+        assert [t.row_count for t in totals] in ([], [0])
+    assert queue.stats["writes"] == 3
+
+
+async def test_stop_drains_the_queue_under_backpressure(
+    engine: AsyncEngine,
+) -> None:
+    """With one pending slot submitters wait; stop() still runs every write."""
+    queue = writer.WriteQueue(engine, max_batch=2, max_pending=1)
+    await queue.start()
+    writer.install(queue)
+    bodies = [f"n{i}" for i in range(6)]
+    tasks = [asyncio.create_task(queue.submit(_insert_note(b))) for b in bodies]
+    await asyncio.sleep(0)
+    await queue.stop()
+    assert [await task for task in tasks] == bodies
+    assert await _notes(engine) == bodies
+    assert writer.current() is None
+    with pytest.raises(RuntimeError):
+        await queue.submit(_insert_note("late"))
+
+
+async def test_cancelled_writer_fails_the_batch_in_flight(
+    engine: AsyncEngine,
+) -> None:
+    """Cancelling the writer mid-batch fails its callers instead of hanging them."""
+    queue = writer.WriteQueue(engine)
+    await queue.start()
+    started = asyncio.Event()
+
+    async def stuck(session: AsyncSession) -> None:
+        started.set()
+        await asyncio.Event().wait()
+
+    submitted = asyncio.create_task(queue.submit(stuck))
+    await started.wait()
+    assert queue._task is not None
+    queue._task.cancel()
+    with pytest.raises(RuntimeError, match="stopped"):
+        await asyncio.wait_for(submitted, 1)
+    await queue.stop()
+    assert await _notes(engine) == []
+
+
+async def test_memory_database_is_rejected() -> None:
+    """The writer's own connection would not see the app's in-memory database."""
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    with pytest.raises(ValueError):
+        await writer.WriteQueue(engine).start()
+    await engine.dispose()